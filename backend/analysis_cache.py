@@ -0,0 +1,128 @@
+"""
+분석 결과 캐시 - 정규화된 상황 해시 기반 (TTL + LRU)
+같은(또는 표기만 다른) situation_data가 반복해서 들어오면 Cypher 쿼리와
+Gemini 호출 없이 이전 분석 결과를 돌려준다.
+"""
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+def _normalize(value: Any) -> Any:
+    """비교에 영향 없는 표기 차이(공백, 키 순서)를 제거"""
+    if isinstance(value, dict):
+        return {str(k).strip(): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+# 분석 결과에 영향을 주는 최상위 필드 (title/thumbnail_desc는 벡터 재정렬용 상황 텍스트에 포함)
+KEY_FIELDS = ("situation", "title", "thumbnail_desc")
+
+
+def situation_key(situation_data: Dict[str, Any]) -> str:
+    """
+    분석 결과를 결정하는 필드(KEY_FIELDS)만 정규화하여 해시
+
+    Args:
+        situation_data: 시나리오 또는 상황 데이터
+
+    Returns:
+        sha256 hex 문자열
+    """
+    data = situation_data or {}
+    fields = {name: data[name] for name in KEY_FIELDS if data.get(name) is not None}
+    canonical = json.dumps(_normalize(fields), ensure_ascii=False,
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """크기(LRU)와 TTL로 제한되는 스레드 안전 분석 결과 캐시"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        """
+        Args:
+            max_entries: 최대 보관 항목 수 (초과 시 가장 오래 쓰지 않은 항목부터 제거)
+            ttl_seconds: 항목 유효 시간 (초)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.graph_version: Any = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """전체 무효화 (지식 그래프 재적재 시)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def check_graph_version(self, version: Any) -> bool:
+        """
+        그래프 버전 마커가 바뀌었으면 캐시를 비운다
+
+        Returns:
+            무효화했으면 True
+        """
+        if version == self.graph_version:
+            return False
+        changed = self.graph_version is not None
+        self.graph_version = version
+        if changed:
+            self.invalidate()
+            print(f"♻️ 지식 그래프 버전 변경 감지 ({version}) - 분석 캐시 무효화")
+        return changed
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "graph_version": self.graph_version,
+        }
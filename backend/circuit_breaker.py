@@ -0,0 +1,120 @@
+"""
+Neo4j 장애 대응용 서킷 브레이커 (CLOSED → OPEN → HALF_OPEN)
+연결 실패가 이어지면 회로를 열어 요청을 즉시 실패시키고, 재연결은 지수 백오프 간격의
+백그라운드 프로브 1건만 시도한다. 장애 중 요청마다 드라이버를 만들고
+verify_connectivity()에서 타임아웃까지 대기하는 일을 막는다.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple, Type
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """회로가 열려 있어 호출을 시도하지 않고 실패"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} 회로 차단 중 (재시도까지 {retry_in:.1f}초)")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Args:
+            name: 로그/상태 표시용 이름
+            failure_threshold: 연속 실패가 이 횟수에 도달하면 회로를 연다
+            base_delay: 첫 재시도까지 대기 시간 (초)
+            max_delay: 백오프 상한 (초)
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0               # 회복 전까지 연속으로 열린 횟수 (백오프 지수)
+        self.opened_total = 0
+        self.last_error: Optional[str] = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """일반 요청 허용 여부 (HALF_OPEN 동안은 프로브만 허용)"""
+        return self.state == CLOSED
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def begin_probe(self) -> bool:
+        """백오프가 끝난 OPEN 회로를 HALF_OPEN으로 전환 (프로브를 맡았으면 True)"""
+        with self._lock:
+            if self.state != OPEN or time.monotonic() < self._retry_at:
+                return False
+            self.state = HALF_OPEN
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"✅ {self.name} 회로 복구 (CLOSED)")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.trips = 0
+
+    def record_failure(self, error: Any = None):
+        with self._lock:
+            self.consecutive_failures += 1
+            if error is not None:
+                self.last_error = str(error)
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self, error: Any = None):
+        """임계값과 무관하게 즉시 회로를 연다 (연결 자체가 실패한 경우)"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if error is not None:
+                self.last_error = str(error)
+            self._open()
+
+    def _open(self):
+        delay = min(self.max_delay, self.base_delay * (2 ** self.trips))
+        self.trips += 1
+        self.opened_total += 1
+        self.state = OPEN
+        self._retry_at = time.monotonic() + delay
+        print(f"🚧 {self.name} 회로 열림 - {delay:.1f}초 후 재연결 시도")
+
+    @contextmanager
+    def guard(self, failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+        """
+        회로가 닫혀 있을 때만 블록을 실행하고 결과를 기록
+
+        Args:
+            failure_exceptions: 장애로 간주할 예외 (그 외 예외는 성공/실패로 세지 않음)
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+        try:
+            yield
+        except failure_exceptions as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": round(self.retry_in(), 3),
+            "opened_total": self.opened_total,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,162 @@
+"""
+규정/판례 요약(digest) - LLM 프롬프트용 짧은 구조화 요약을 미리 계산
+규정 전문(평균 650자)이나 판례 분석 대신 요약 한 줄과 핵심 조치/교훈만 프롬프트에 넣는다.
+그래프 원본 데이터(data/raw) 옆의 data/index/digests.json에 저장하고, 원본이 바뀌면 다시 만든다.
+그래프 조회 행(rule_id/situations/lessons)과 원본 JSON 행(id/trigger_situations/lessons_learned)을
+모두 받으므로, 요약 파일에 없는 항목은 요청 시 같은 함수로 만든다.
+
+빌드:
+    python backend/digest.py --data-dir data/raw --out data/index/digests.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from typing import Any, Dict, Iterable
+
+from source_files import read_sources
+
+DIGEST_FORMAT = 1
+
+SUMMARY_CHARS = 120
+MAX_ACTIONS = 3
+MAX_LESSONS = 2
+
+# 토큰 수 추정 (Gemini SentencePiece 기준 대략치: 영문/숫자 4자, 한글 1.5자당 1토큰)
+ASCII_CHARS_PER_TOKEN = 4.0
+OTHER_CHARS_PER_TOKEN = 1.5
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return int(ascii_chars / ASCII_CHARS_PER_TOKEN + other_chars / OTHER_CHARS_PER_TOKEN) + 1
+
+
+def first_sentence(text: Any, limit: int = SUMMARY_CHARS) -> str:
+    """공백을 정리한 첫 문장 (limit자를 넘으면 자르고 … 표시)"""
+    cleaned = " ".join(str(text or "").split())
+    sentence = _SENTENCE_END.split(cleaned, maxsplit=1)[0].strip() if cleaned else ""
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+
+
+def _digest(item_id: str, text: str) -> Dict[str, Any]:
+    return {"id": item_id, "text": text, "tokens": estimate_tokens(text)}
+
+
+def rule_digest(rule: Dict[str, Any]) -> Dict[str, Any]:
+    """예: 제15조 - 횡단하는 상태: 두 동력선이 교차하여 … | 조치: 우현 변침 (선미 통과); 감속/정지"""
+    rule_id = str(rule.get("rule_id") or rule.get("id"))
+    text = f"{rule.get('title') or rule_id}: {first_sentence(rule.get('summary') or rule.get('full_text'))}"
+    actions = (rule.get("actions") or [])[:MAX_ACTIONS]
+    if actions:
+        text += f" | 조치: {'; '.join(actions)}"
+    return _digest(rule_id, text)
+
+
+def case_digest(case: Dict[str, Any]) -> Dict[str, Any]:
+    """예: KMST-2023-001 안개 중 … 충돌 사고 (시계 제한 상황, 위반 rule_05/rule_19): 재결 첫 문장 | 교훈: …"""
+    case_id = str(case.get("case_id"))
+    tags = [t for t in [case.get("situation_type")] if t]
+    violated = case.get("colregs_violated") or []
+    if violated:
+        tags.append("위반 " + "/".join(violated))
+    text = f"{case_id} {case.get('title') or ''}" + (f" ({', '.join(tags)})" if tags else "")
+    text += f": {first_sentence(case.get('judgment') or case.get('analysis'))}"
+    lessons = (case.get("lessons_learned") or case.get("lessons") or [])[:MAX_LESSONS]
+    if lessons:
+        text += f" | 교훈: {'; '.join(lessons)}"
+    return _digest(case_id, text)
+
+
+class DigestStore:
+    """규정/판례 id → 요약 (없는 id는 조회 행에서 바로 만든다)"""
+
+    def __init__(self, rules: Dict[str, Dict[str, Any]], cases: Dict[str, Dict[str, Any]],
+                 source_hash: str = ""):
+        self.rules = rules
+        self.cases = cases
+        self.source_hash = source_hash
+
+    @classmethod
+    def build(cls, rules: Iterable[Dict[str, Any]], cases: Iterable[Dict[str, Any]],
+              source_hash: str = "") -> "DigestStore":
+        return cls({str(r["id"]): rule_digest(r) for r in rules if r.get("id") is not None},
+                   {str(c["case_id"]): case_digest(c) for c in cases if c.get("case_id") is not None},
+                   source_hash)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"format": DIGEST_FORMAT, "source_hash": self.source_hash,
+                       "rules": self.rules, "cases": self.cases}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DigestStore":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") != DIGEST_FORMAT:
+            raise ValueError(f"요약 파일 형식 불일치: {data.get('format')}")
+        return cls(data["rules"], data["cases"], data.get("source_hash", ""))
+
+    @classmethod
+    def open(cls, data_dir: str, path: str) -> "DigestStore":
+        """data/raw 원본 기준으로 open_items"""
+        return cls.open_items(*read_sources(data_dir), path)
+
+    @classmethod
+    def open_items(cls, rules: Iterable[Dict[str, Any]], cases: Iterable[Dict[str, Any]],
+                   source_hash: str, path: str) -> "DigestStore":
+        """
+        저장된 요약이 source_hash로 만든 것이면 읽고, 아니면 다시 만들어 저장
+
+        Args:
+            rules, cases: data/raw JSON 또는 GraphStore.export_snapshot()과 같은 필드의 목록
+            source_hash: 목록 내용 해시
+            path: 요약 파일 경로
+        """
+        try:
+            store = cls.load(path)
+            if store.source_hash == source_hash:
+                return store
+        except (OSError, ValueError, KeyError) as e:
+            print(f"ℹ️ 규정/판례 요약 재생성 ({e})")
+        store = cls.build(rules, cases, source_hash)
+        try:
+            store.save(path)
+        except OSError as e:
+            print(f"⚠️ 요약 파일 저장 실패 (메모리 요약으로 계속): {e}")
+        print(f"📝 규정/판례 요약 생성: 규정 {len(store.rules)}개, 판례 {len(store.cases)}개 ({path})")
+        return store
+
+    def rule(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return self.rules.get(str(row.get("rule_id") or row.get("id"))) or rule_digest(row)
+
+    def case(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return self.cases.get(str(row.get("case_id"))) or case_digest(row)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rules": len(self.rules), "cases": len(self.cases)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규정/판례 프롬프트 요약 빌드")
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--data-dir", default=os.path.join(base_dir, "data", "raw"))
+    parser.add_argument("--out", default=os.path.join(base_dir, "data", "index", "digests.json"))
+    args = parser.parse_args()
+
+    rules, cases, source_hash = read_sources(args.data_dir)
+    store = DigestStore.build(rules, cases, source_hash)
+    store.save(args.out)
+    tokens = sum(d["tokens"] for d in list(store.rules.values()) + list(store.cases.values()))
+    print(f"✅ 요약 빌드 완료: 규정 {len(store.rules)}개, 판례 {len(store.cases)}개, 약 {tokens}토큰 → {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
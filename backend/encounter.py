@@ -0,0 +1,157 @@
+"""
+조우 상황 분류 (COLREGs Rule 13 추월 / Rule 14 마주침 / Rule 15 횡단)
+자선 침로와 타선 방위/침로로 상대 방위, aspect(타선에서 본 자선의 상대 방위),
+피항선/유지선 역할을 계산한다. 모든 타선을 NumPy 배열로 한 번에 처리한다.
+상황 데이터에 타선 위치(relative_position)나 역할(role)이 명시되어 있으면 계산값보다 우선한다.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from situation_schema import ParsedSituation
+
+# Rule 13: 정횡 후방 22.5도를 넘는 방향(선미등만 보이는 범위)에서 접근하면 추월
+ASTERN_SECTOR = 112.5
+# Rule 14: 정선수 방향 마스트등이 일직선(또는 거의 일직선)으로 보이는 범위
+HEAD_ON_SECTOR = 6.0
+
+HEAD_ON = "head_on"
+CROSSING_STARBOARD = "crossing_starboard"   # 타선이 자선 우현에서 횡단 → 자선 피항
+CROSSING_PORT = "crossing_port"             # 타선이 자선 좌현에서 횡단 → 자선 유지
+OVERTAKING = "overtaking"                   # 자선이 타선을 추월 → 자선 피항
+OVERTAKEN = "overtaken"                     # 타선이 자선을 추월 → 자선 유지
+UNKNOWN = "unknown"
+
+GIVE_WAY = "give_way"
+STAND_ON = "stand_on"
+BOTH_GIVE_WAY = "both_give_way"             # Rule 14: 양 선박 모두 우현 변침
+
+ROLES = {
+    HEAD_ON: BOTH_GIVE_WAY,
+    CROSSING_STARBOARD: GIVE_WAY,
+    CROSSING_PORT: STAND_ON,
+    OVERTAKING: GIVE_WAY,
+    OVERTAKEN: STAND_ON,
+    UNKNOWN: UNKNOWN,
+}
+
+_ENCOUNTER_BY_CODE = np.array([UNKNOWN, OVERTAKING, OVERTAKEN, HEAD_ON,
+                               CROSSING_STARBOARD, CROSSING_PORT], dtype=object)
+_ROLE_BY_CODE = np.array([ROLES[e] for e in _ENCOUNTER_BY_CODE], dtype=object)
+
+# 명시된 타선 위치(situation_schema.parse_relative_position) → 조우 유형
+REPORTED_POSITIONS = {
+    "starboard": CROSSING_STARBOARD,
+    "port": CROSSING_PORT,
+    "ahead": HEAD_ON,
+    "astern": OVERTAKEN,
+}
+
+# 조우 유형 → 지식 그래프 SituationType 이름 (규정 trigger_situations / 판례 situation_type)
+SITUATION_TYPES = {
+    HEAD_ON: ["마주치는 상황", "마주 보는 상황", "정면 충돌 코스"],
+    CROSSING_STARBOARD: ["횡단 상황", "우현 접근", "피항 의무 발생"],
+    CROSSING_PORT: ["횡단 상황", "좌현 접근", "유지선 역할"],
+    OVERTAKING: ["추월 상황", "피항 의무 발생"],
+    OVERTAKEN: ["추월 상황", "후방에서 접근", "유지선 역할"],
+}
+# 조우 유형은 모르고 역할만 명시된 경우의 SituationType
+ROLE_SITUATION_TYPES = {
+    GIVE_WAY: ["피항 의무 발생"],
+    STAND_ON: ["유지선 역할"],
+}
+
+
+def wrap_degrees(angles: np.ndarray) -> np.ndarray:
+    """각도를 (-180, 180] 범위로 (양수 = 우현)"""
+    wrapped = np.mod(angles + 180.0, 360.0) - 180.0
+    return np.where(wrapped == -180.0, 180.0, wrapped)
+
+
+def classify_encounters(own_heading: float, bearings: np.ndarray,
+                        courses: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Args:
+        own_heading: 자선 침로 (도)
+        bearings: 자선에서 본 타선 진방위 (도, shape (N,))
+        courses: 타선 침로 (도, 모르면 NaN)
+
+    Returns:
+        relative_bearing, aspect(침로를 모르면 NaN), encounter, role 배열
+        (타선 침로를 모르면 마주침/횡단/추월을 구분할 수 없으므로 unknown)
+    """
+    bearings = np.asarray(bearings, dtype=np.float64)
+    if courses is None:
+        courses = np.full(bearings.shape, np.nan)
+    courses = np.asarray(courses, dtype=np.float64)
+
+    relative = wrap_degrees(bearings - own_heading)
+    # 타선 선수 기준으로 본 자선 방위 (타선에서 자선으로의 방위 = 방위 + 180)
+    aspect = wrap_degrees(bearings + 180.0 - courses)
+    abs_rel, abs_aspect = np.abs(relative), np.abs(aspect)
+    course_known = ~np.isnan(courses)
+    valid = ~np.isnan(relative)
+
+    # 조건 순서가 우선순위 (추월 판단이 횡단보다 우선: Rule 13(a))
+    codes = np.select(
+        [
+            ~valid | ~course_known,
+            abs_aspect > ASTERN_SECTOR,
+            abs_rel > ASTERN_SECTOR,
+            (abs_rel <= HEAD_ON_SECTOR) & (abs_aspect <= HEAD_ON_SECTOR),
+            relative > 0,
+        ],
+        [0, 1, 2, 3, 4],
+        default=5,
+    )
+    return {"relative_bearing": relative, "aspect": aspect,
+            "encounter": _ENCOUNTER_BY_CODE[codes], "role": _ROLE_BY_CODE[codes]}
+
+
+def apply_reports(result: Dict[str, np.ndarray], positions: Sequence[str],
+                  roles: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    명시된 위치/역할로 계산 결과를 보정
+    - 위치가 명시된 타선은 그 위치의 조우 유형을 쓴다
+    - 자선 역할이 명시된 타선은 그 역할을 쓰고, 조우 유형의 역할과 맞지 않으면 조우 유형은 unknown
+    """
+    encounter, role = result["encounter"].copy(), result["role"].copy()
+    for i, (position, reported_role) in enumerate(zip(positions, roles)):
+        if position in REPORTED_POSITIONS:
+            encounter[i] = REPORTED_POSITIONS[position]
+            role[i] = ROLES[encounter[i]]
+        if reported_role:
+            # 마주침(양선 피항)은 피항선 보고와 모순되지 않음
+            consistent = role[i] == reported_role or (role[i] == BOTH_GIVE_WAY and reported_role == GIVE_WAY)
+            if not consistent:
+                encounter[i] = UNKNOWN
+                role[i] = reported_role
+    return dict(result, encounter=encounter, role=role)
+
+
+def classify_situation(parsed: ParsedSituation) -> Dict[str, np.ndarray]:
+    """파싱된 상황(situation_schema.ParsedSituation)의 모든 타선 분류 (명시값 우선)"""
+    result = classify_encounters(parsed.own_heading_deg, parsed.bearing_deg, parsed.course_deg)
+    return apply_reports(result, parsed.reported_positions, parsed.reported_roles)
+
+
+def encounter_records(parsed: ParsedSituation, result: Dict[str, np.ndarray],
+                      indices: Sequence[int]) -> List[Dict[str, Any]]:
+    """
+    선택된 타선의 분류 결과 → 응답용 dict 목록
+    방위/침로가 없으면 encounter는 unknown (호출 측에서 역할/문자열 판정으로 보완)
+    """
+    return [
+        {
+            "target_id": parsed.target_ids[i],
+            "relative_bearing": round_or_none(result["relative_bearing"][i]),
+            "aspect": round_or_none(result["aspect"][i]),
+            "encounter": result["encounter"][i],
+            "role": result["role"][i],
+        }
+        for i in indices
+    ]
+
+
+def round_or_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
@@ -1,11 +1,36 @@
 """
 Graph-Guided RAG 엔진 (쿼리 수정 버전)
 """
-from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
 import google.generativeai as genai
-from dataclasses import dataclass
-import json
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+import threading
+import asyncio
+import time
+
+from analysis_cache import AnalysisCache, situation_key
+from llm_cache import LLMResponseCache
+from single_flight import SingleFlight, AsyncSingleFlight
+from circuit_breaker import CircuitBreaker
+from situation_schema import parse_situation, VisibilityClass
+from encounter import (classify_situation, encounter_records, SITUATION_TYPES,
+                       ROLE_SITUATION_TYPES, UNKNOWN)
+from kinematics import situation_kinematics, kinematics_records, closest_approach
+from triage import triage_targets, DEFAULT_TOP_K, DEFAULT_THRESHOLD
+from digest import DigestStore
+from prompt_budget import assemble_prompt, DEFAULT_BUDGET_TOKENS
+from llm_batcher import LLMBatcher
+from graph_store import (GraphStore, Neo4jGraphStore, AsyncNeo4jGraphStore,
+                         GRAPH_CONTEXT_QUERY, RULE_RETRIEVAL_QUERY, CASE_RETRIEVAL_QUERY,
+                         COMBINED_RETRIEVAL_QUERY, RULE_LIMIT, CASE_LIMIT)
+from metrics import (STEP_DURATION, STEP_ERRORS, DB_QUERY_DURATION, LLM_DURATION,
+                     LLM_ERRORS, ANALYSIS_DURATION, LOOKUP_CACHE, PROMPT_TOKENS)
+
+LLM_FAILURE_MESSAGE = "LLM 분석 실패"
+
+# Step 2~4 조회 방식: combined(저장소 왕복 1회) | stepwise(단계별 쿼리 3회)
+RETRIEVAL_MODES = ("combined", "stepwise")
 
 @dataclass
 class ReasoningStep:
@@ -15,36 +40,333 @@ class ReasoningStep:
     query: Optional[str] = None
     results: Optional[List[Dict]] = None
     reasoning: Optional[str] = None
+    duration_ms: Optional[float] = None
+
+
+class GraphLookupCache:
+    """
+    배치 분석에서 공유하는 그래프 조회 캐시
+    같은 상황 유형(또는 규정 목록)으로 귀결되는 항목들은 Neo4j 쿼리를 한 번만 실행한다.
+    """
+
+    def __init__(self):
+        self._values: Dict[Any, Any] = {}
+        self._locks: Dict[Any, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        # 같은 키를 동시에 요청한 항목은 먼저 들어온 조회 결과를 기다린다
+        with lock:
+            if key in self._values:
+                self.hits += 1
+                return self._values[key]
+            value = compute()
+            self._values[key] = value
+            self.misses += 1
+            return value
+
+
+class AsyncGraphLookupCache(GraphLookupCache):
+    """GraphLookupCache의 asyncio 버전 (compute는 코루틴 함수)"""
+
+    def __init__(self):
+        super().__init__()
+        self._async_locks: Dict[Any, asyncio.Lock] = {}
+
+    async def get_or_compute(self, key, compute):
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        lock = self._async_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._values:
+                self.hits += 1
+                return self._values[key]
+            value = await compute()
+            self._values[key] = value
+            self.misses += 1
+            return value
+
+
+@dataclass
+class AnalysisContext:
+    """
+    분석 1회분의 요청 단위 상태 (추론 단계, 단계별 소요 시간)
+    엔진 인스턴스에는 요청별 상태를 두지 않으므로 하나의 엔진과 드라이버 풀을
+    여러 요청이 동시에 공유할 수 있다.
+    """
+    lookup_cache: Optional[GraphLookupCache] = None
+    steps: List[ReasoningStep] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+    db_ms: float = 0.0
+    db_queries: int = 0
+    llm_ms: float = 0.0
+    query_vector: Any = None  # 벡터 재정렬용 상황 임베딩 (vector_index 사용 시)
+    perception: Optional[Dict[str, Any]] = None  # Step 1 결과 (프롬프트 조립용)
+    prompt_tokens: int = 0
+    llm_failed: bool = False  # Step 5 실패 (스트리밍 중간 실패 포함) → 결과 캐시 제외
+
+    def add_step(self, step: ReasoningStep):
+        self.steps.append(step)
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        블록 실행 시간을 timings[name]에 ms 단위로 기록하고 메트릭으로 내보낸다.
+        블록 안에서 추가된 ReasoningStep에는 duration_ms를 채운다.
+        """
+        start = time.perf_counter()
+        first_step = len(self.steps)
+        try:
+            yield
+        except Exception:
+            STEP_ERRORS.inc(step=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = round(elapsed * 1000, 3)
+            for step in self.steps[first_step:]:
+                step.duration_ms = self.timings[name]
+            STEP_DURATION.observe(elapsed, step=name)
+
+    def record_db(self, step: str, seconds: float):
+        self.db_ms += seconds * 1000
+        self.db_queries += 1
+        DB_QUERY_DURATION.observe(seconds, step=step)
+
+    def record_llm(self, mode: str, seconds: float):
+        self.llm_ms += seconds * 1000
+        LLM_DURATION.observe(seconds, mode=mode)
+
+    def timings_ms(self) -> Dict[str, float]:
+        return dict(self.timings, db=round(self.db_ms, 3), llm=round(self.llm_ms, 3),
+                    db_queries=self.db_queries, prompt_tokens=self.prompt_tokens,
+                    total=self.elapsed_ms())
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 3)
 
 
 class GraphGuidedRAG:
-    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str,
-                 gemini_api_key: str, llm_model: str = "gemini-2.0-flash-exp"):
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    def __init__(self, neo4j_uri: str = "", neo4j_user: str = "", neo4j_password: str = "",
+                 gemini_api_key: str = "", llm_model: str = "gemini-2.0-flash-exp",
+                 result_cache: Optional[AnalysisCache] = None,
+                 llm_cache: Optional[LLMResponseCache] = None,
+                 coalesce_requests: bool = True,
+                 breaker: Optional[CircuitBreaker] = None,
+                 store: Optional[GraphStore] = None,
+                 retrieval_mode: str = "combined",
+                 vector_index=None,
+                 candidate_factor: int = 4,
+                 triage_top_k: int = DEFAULT_TOP_K,
+                 triage_threshold: float = DEFAULT_THRESHOLD,
+                 digests: Optional[DigestStore] = None,
+                 prompt_budget: int = DEFAULT_BUDGET_TOKENS,
+                 llm_batch_max: int = 1,
+                 llm_batch_window_ms: float = 20.0):
+        """
+        Args:
+            store: 그래프 저장소 (없으면 neo4j_* 접속 정보로 Neo4j 저장소 생성)
+            retrieval_mode: Step 2~4 조회 방식 (RETRIEVAL_MODES 참고)
+            vector_index: 규정/판례 벡터 인덱스 (vector_index.VectorIndex, 없으면 legal_weight 순위만 사용)
+                그래프 버전이 바뀌면 호출 측이 새 인덱스로 교체할 수 있다 (후보 수는 교체를 따라감)
+            candidate_factor: 벡터 재정렬 시 그래프에서 가져올 후보 배수 (규정 5×N, 판례 3×N)
+            triage_top_k, triage_threshold: 그래프 조회/LLM 분석에 넘길 타선 수와 최소 위험도 (triage.py)
+            digests: 규정/판례 프롬프트 요약 (digest.DigestStore, 없으면 조회 결과에서 바로 요약)
+            prompt_budget: LLM 프롬프트 추정 토큰 상한 (prompt_budget.py)
+            llm_batch_max, llm_batch_window_ms: 동시 분석의 LLM 호출 묶음 크기/대기 시간
+                (비동기 엔진 전용, llm_batcher.py. 1이면 호출마다 개별 요청)
+        """
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"알 수 없는 retrieval_mode: {retrieval_mode} ({', '.join(RETRIEVAL_MODES)})")
+        self.retrieval_mode = retrieval_mode
+        self.vector_index = vector_index
+        self.candidate_factor = max(1, candidate_factor)
+        self.triage_top_k = triage_top_k
+        self.triage_threshold = triage_threshold
+        self.digests = digests if digests is not None else DigestStore({}, {})
+        self.prompt_budget = prompt_budget
+        self.store = store if store is not None else self._create_store(
+            neo4j_uri, neo4j_user, neo4j_password, breaker)
         genai.configure(api_key=gemini_api_key)
+        self.llm_model = llm_model
         self.model = genai.GenerativeModel(llm_model)
-        self.reasoning_history: List[ReasoningStep] = []
+        self.result_cache = result_cache
+        self.llm_cache = llm_cache
+        # 동일 상황에 대한 동시 분석 요청은 진행 중인 1건의 결과를 공유
+        self.single_flight = self._create_single_flight() if coalesce_requests else None
+        self.llm_batcher = self._create_llm_batcher(llm_batch_max, llm_batch_window_ms)
+
+    @property
+    def rule_candidates(self) -> int:
+        return RULE_LIMIT * (self.candidate_factor if self.vector_index is not None else 1)
+
+    @property
+    def case_candidates(self) -> int:
+        return CASE_LIMIT * (self.candidate_factor if self.vector_index is not None else 1)
+
+    def _create_single_flight(self):
+        return SingleFlight()
+
+    def _create_llm_batcher(self, max_batch: int, window_ms: float):
+        # 동기 엔진은 호출마다 스레드가 막히므로 묶을 대상이 없다
+        return None
+
+    def _create_store(self, uri: str, user: str, password: str,
+                      breaker: Optional[CircuitBreaker]) -> GraphStore:
+        return Neo4jGraphStore(uri, user, password, breaker=breaker)
 
     def close(self):
-        self.driver.close()
+        self.store.close()
+
+    def get_graph_version(self) -> Any:
+        return self.store.graph_version()
 
-    def reset_reasoning_history(self):
-        self.reasoning_history = []
+    def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        """배포 직후 첫 요청이 느리지 않도록 저장소 연결과 쿼리 플랜을 예열"""
+        return self.store.warm_up(connections)
 
-    def add_reasoning_step(self, step: ReasoningStep):
-        self.reasoning_history.append(step)
+    def _cached_result(self, ctx: AnalysisContext, key: str,
+                       situation_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.result_cache is None:
+            return None
+        cached = self.result_cache.get(key)
+        if cached is None:
+            return None
+        # 입력 원본(시나리오 메타데이터 등)은 이번 요청의 것을 그대로 돌려준다
+        return dict(cached, situation=situation_data, cache_hit=True,
+                    timings_ms={"total": ctx.elapsed_ms()})
+
+    def _store_result(self, ctx: AnalysisContext, key: str, result: Dict[str, Any]):
+        # LLM 실패 결과는 캐시하지 않음 (다음 요청에서 재시도)
+        if self.result_cache is None or ctx.llm_failed:
+            return
+        self.result_cache.put(key, result)
+
+    @staticmethod
+    def _shared_result(result: Dict[str, Any], situation_data: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(result, situation=situation_data, coalesced=True)
+
+    def analyze_situation(self, situation_data: Dict[str, Any],
+                          lookup_cache: Optional[GraphLookupCache] = None) -> Dict[str, Any]:
+        """
+        Args:
+            situation_data: 시나리오 또는 상황 데이터
+            lookup_cache: 배치 분석 시 항목 간 공유할 그래프 조회 캐시 (선택)
+        """
+        ctx = AnalysisContext(lookup_cache=lookup_cache)
+        key = situation_key(situation_data)
+        cached = self._cached_result(ctx, key, situation_data)
+        if cached is not None:
+            return cached
+
+        if self.single_flight is None:
+            return self._run_pipeline(ctx, key, situation_data)
+        result, shared = self.single_flight.do(
+            key, lambda: self._run_pipeline(ctx, key, situation_data)
+        )
+        return self._shared_result(result, situation_data) if shared else result
+
+    def _run_pipeline(self, ctx: AnalysisContext, key: str,
+                      situation_data: Dict[str, Any]) -> Dict[str, Any]:
+        perception = self._step1_perception(ctx, situation_data, key)
+        if self.retrieval_mode == "combined":
+            graph_context, relevant_rules, relevant_cases = self._graph_retrieval(ctx, perception)
+        else:
+            graph_context = self._step2_graph_context(ctx, perception)
+            relevant_rules = self._step3_rule_retrieval(ctx, graph_context)
+            relevant_cases = self._step4_case_retrieval(ctx, graph_context, relevant_rules)
+        analysis = self._step5_llm_analysis(ctx, situation_data, relevant_rules, relevant_cases)
+        recommendations = self._step6_action_recommendation(
+            ctx, situation_data, relevant_rules, relevant_cases, analysis
+        )
+
+        result = self._build_result(
+            ctx, situation_data, perception, graph_context, relevant_rules,
+            relevant_cases, analysis, recommendations
+        )
+        self._store_result(ctx, key, result)
+        return result
+
+    def stream_analysis(self, situation_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        analyze_situation의 스트리밍 버전
+        각 ReasoningStep이 끝나는 즉시 이벤트를 내보내고, LLM 응답은 청크 단위로 전달한다.
+
+        Yields:
+            {"event": "step" | "llm_chunk" | "result", "data": {...}}
+        """
+        ctx = AnalysisContext()
+        key = situation_key(situation_data)
+        cached = self._cached_result(ctx, key, situation_data)
+        if cached is not None:
+            yield from self._cached_events(cached)
+            return
+
+        perception = self._step1_perception(ctx, situation_data, key)
+        yield self._step_event(ctx)
+        if self.retrieval_mode == "combined":
+            graph_context, relevant_rules, relevant_cases = self._graph_retrieval(ctx, perception)
+            yield from self._step_events(ctx, 3)
+        else:
+            graph_context = self._step2_graph_context(ctx, perception)
+            yield self._step_event(ctx)
+            relevant_rules = self._step3_rule_retrieval(ctx, graph_context)
+            yield self._step_event(ctx)
+            relevant_cases = self._step4_case_retrieval(ctx, graph_context, relevant_rules)
+            yield self._step_event(ctx)
+
+        chunks: List[str] = []
+        for chunk in self._step5_llm_analysis_stream(ctx, situation_data, relevant_rules, relevant_cases):
+            chunks.append(chunk)
+            yield {"event": "llm_chunk", "data": {"text": chunk}}
+        analysis = "".join(chunks)
 
-    def analyze_situation(self, situation_data: Dict[str, Any]) -> Dict[str, Any]:
-        self.reset_reasoning_history()
-        perception = self._step1_perception(situation_data)
-        graph_context = self._step2_graph_context(perception)
-        relevant_rules = self._step3_rule_retrieval(graph_context)
-        relevant_cases = self._step4_case_retrieval(graph_context, relevant_rules)
-        analysis = self._step5_llm_analysis(situation_data, relevant_rules, relevant_cases)
         recommendations = self._step6_action_recommendation(
-            situation_data, relevant_rules, relevant_cases, analysis
+            ctx, situation_data, relevant_rules, relevant_cases, analysis
+        )
+        result = self._build_result(
+            ctx, situation_data, perception, graph_context, relevant_rules,
+            relevant_cases, analysis, recommendations
         )
+        self._store_result(ctx, key, result)
+        yield {"event": "result", "data": result}
 
+    @staticmethod
+    def _cached_events(cached: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        for step in cached.get("reasoning_history", []):
+            yield {"event": "step", "data": step}
+        yield {"event": "llm_chunk", "data": {"text": cached.get("analysis", "")}}
+        yield {"event": "result", "data": cached}
+
+    def _step_event(self, ctx: AnalysisContext) -> Dict[str, Any]:
+        return {"event": "step", "data": self._serialize_step(ctx.steps[-1])}
+
+    def _step_events(self, ctx: AnalysisContext, count: int) -> List[Dict[str, Any]]:
+        return [{"event": "step", "data": self._serialize_step(step)} for step in ctx.steps[-count:]]
+
+    @staticmethod
+    def _serialize_step(step: ReasoningStep) -> Dict[str, Any]:
+        return {
+            "step_name": step.step_name,
+            "step_number": step.step_number,
+            "description": step.description,
+            "reasoning": step.reasoning,
+            "results_count": len(step.results) if step.results else 0,
+            "duration_ms": step.duration_ms
+        }
+
+    def _build_result(self, ctx: AnalysisContext, situation_data, perception, graph_context,
+                      relevant_rules, relevant_cases, analysis, recommendations) -> Dict[str, Any]:
+        ANALYSIS_DURATION.observe(ctx.elapsed_ms() / 1000)
         return {
             "situation": situation_data,
             "perception": perception,
@@ -53,56 +375,111 @@ class GraphGuidedRAG:
             "relevant_cases": relevant_cases,
             "analysis": analysis,
             "recommendations": recommendations,
-            "reasoning_history": [
-                {
-                    "step_name": step.step_name,
-                    "step_number": step.step_number,
-                    "description": step.description,
-                    "reasoning": step.reasoning,
-                    "results_count": len(step.results) if step.results else 0
-                }
-                for step in self.reasoning_history
-            ]
+            "reasoning_history": [self._serialize_step(step) for step in ctx.steps],
+            "timings_ms": ctx.timings_ms()
         }
 
-    def _step1_perception(self, situation_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _step1_perception(self, ctx: AnalysisContext, situation_data: Dict[str, Any],
+                          key: Optional[str] = None) -> Dict[str, Any]:
+        with ctx.timed("perception"):
+            situation = situation_data.get('situation', {})
+            own_ship = situation.get('own_ship', {})
+            targets = situation.get('target_vessels', [])
+
+            # 문자열 필드는 상황별로 한 번만 파싱 (이후 단계는 수치 배열만 사용)
+            parsed = parse_situation(situation_data, key)
+            encounters = classify_situation(parsed)
+            kinematics = situation_kinematics(parsed)
+            # 위험도 상위 타선만 이후 단계(그래프 조회, LLM)로 넘긴다
+            triage = triage_targets(parsed, kinematics, self.triage_top_k, self.triage_threshold)
+            selected = triage["selected"]
+
+            perception = {
+                "visibility": situation.get('visibility'),
+                "visibility_class": parsed.visibility_class.value,
+                "own_ship_type": own_ship.get('type'),
+                "target_count": len(targets),
+                "targets": [targets[i] for i in selected],
+                "encounters": encounter_records(parsed, encounters, selected),
+                "kinematics": kinematics_records(parsed, kinematics, selected),
+                "risk_scores": triage["scores"],
+                "target_indices": selected,
+                "unit_warnings": list(parsed.unit_warnings)
+            }
+            ctx.perception = perception
+            closest = closest_approach(parsed, kinematics)
+            summary = ", ".join(f"{e['target_id']} {e['encounter']}/{e['role']} 위험도 {triage['scores'][i]}"
+                                for i, e in zip(selected, perception["encounters"]))
+
+            ctx.add_step(ReasoningStep(
+                step_name="Perception",
+                step_number=1,
+                description="상황 데이터 인식",
+                results=[perception],
+                reasoning=f"시계: {perception['visibility']}, 타선: {len(targets)}척 중 {len(selected)}척 선별"
+                          + (f" ({summary})" if summary else "")
+                          + (f", 최근접 {closest['target_id']} CPA {closest['cpa_nm']}마일"
+                             f"/TCPA {closest['tcpa_min']}분" if closest else "")
+                          + f", 충돌 위험(Rule 7) {int(kinematics['risk'].sum())}척"
+                          + (f", 단위 확인 필요: {', '.join(parsed.unit_warnings)}"
+                             if parsed.unit_warnings else "")
+            ))
+            if self.vector_index is not None:
+                ctx.query_vector = self.vector_index.embed_query(
+                    self._situation_text(situation_data, perception))
+            return perception
+
+    def _situation_text(self, situation_data: Dict[str, Any], perception: Dict[str, Any]) -> str:
+        """
+        벡터 재정렬 질의 텍스트 (상황 유형 + 시나리오 설명 + 자선/타선 상태)
+        여기서 읽는 최상위 필드는 결과 캐시 키(analysis_cache.KEY_FIELDS)에 포함되어야 한다.
+        """
         situation = situation_data.get('situation', {})
-        own_ship = situation.get('own_ship', {})
-        targets = situation.get('target_vessels', [])
-
-        perception = {
-            "visibility": situation.get('visibility'),
-            "own_ship_type": own_ship.get('type'),
-            "target_count": len(targets),
-            "targets": targets
-        }
+        parts = self._determine_situation_types(perception) + [
+            situation_data.get('title'), situation_data.get('thumbnail_desc'),
+            situation.get('visibility'), situation.get('weather'), situation.get('sea_state'),
+            perception.get('own_ship_type'),
+        ]
+        for t in perception.get("targets", []):
+            parts += [t.get('type'), t.get('vessel_status'), t.get('relative_position'), t.get('bearing')]
+        return "\n".join(str(p) for p in parts if p)
 
-        self.add_reasoning_step(ReasoningStep(
-            step_name="Perception",
-            step_number=1,
-            description="상황 데이터 인식",
-            results=[perception],
-            reasoning=f"시계: {perception['visibility']}, 타선: {len(targets)}척"
-        ))
-        return perception
-
-    def _step2_graph_context(self, perception: Dict[str, Any]) -> Dict[str, Any]:
-        situation_types = self._determine_situation_types(perception)
-        
-        with self.driver.session() as session:
-            query = """
-            MATCH (st:SituationType)
-            WHERE st.name IN $situation_types
-            OPTIONAL MATCH (st)<-[:APPLIES_TO]-(r:Rule)
-            OPTIONAL MATCH (st)<-[:OCCURRED_IN]-(c:Case)
-            RETURN st.name as situation_type,
-                   count(DISTINCT r) as rule_count,
-                   count(DISTINCT c) as case_count
-            """
-            results = session.run(query, situation_types=situation_types)
-            graph_data = [dict(record) for record in results]
-
-        self.add_reasoning_step(ReasoningStep(
+    def _timed_query(self, ctx: AnalysisContext, step: str, fetch, *args) -> List[Dict[str, Any]]:
+        """저장소 왕복 시간을 단계 시간과 별도로 기록"""
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            ctx.record_db(step, time.perf_counter() - start)
+
+    @staticmethod
+    def _lookup(ctx: AnalysisContext, step: str, key, compute):
+        if ctx.lookup_cache is None:
+            return compute()
+        computed = []
+
+        def run():
+            computed.append(True)
+            return compute()
+
+        value = ctx.lookup_cache.get_or_compute(key, run)
+        LOOKUP_CACHE.inc(step=step, result="miss" if computed else "hit")
+        return value
+
+    def _step2_graph_context(self, ctx: AnalysisContext, perception: Dict[str, Any]) -> Dict[str, Any]:
+        with ctx.timed("graph_context"):
+            situation_types = self._determine_situation_types(perception)
+            graph_data = self._lookup(
+                ctx, "graph_context", ("graph_context", tuple(sorted(situation_types))),
+                lambda: self._timed_query(ctx, "graph_context", self.store.graph_context,
+                                          situation_types)
+            )
+            return self._record_graph_context(ctx, situation_types, graph_data)
+
+    def _record_graph_context(self, ctx: AnalysisContext, situation_types: List[str],
+                              graph_data: List[Dict[str, Any]],
+                              query: str = GRAPH_CONTEXT_QUERY) -> Dict[str, Any]:
+        ctx.add_step(ReasoningStep(
             step_name="Graph Context",
             step_number=2,
             description="상황 맥락 추출",
@@ -113,97 +490,405 @@ class GraphGuidedRAG:
         return {"identified_situations": situation_types, "graph_nodes": graph_data}
 
     def _determine_situation_types(self, perception: Dict[str, Any]) -> List[str]:
+        """
+        조우 분류(encounter.py) 결과를 그래프 SituationType 이름으로 변환
+        조우 유형을 모르는 타선(unknown)은 명시된 역할과 기존 문자열 판정으로 보완한다.
+        순서를 유지해 중복 제거 (조회 캐시 키/쿼리 파라미터가 매번 같도록)
+        """
         types = []
-        vis = perception.get("visibility", "")
-        if "안개" in vis or "농무" in vis: types.append("시계 제한")
-        for t in perception.get("targets", []):
+        if VisibilityClass(perception.get("visibility_class", VisibilityClass.UNKNOWN)).restricted:
+            types.append("시계 제한")
+        targets = perception.get("targets", [])
+        encounters = perception.get("encounters") or [{"encounter": UNKNOWN}] * len(targets)
+        for t, encounter in zip(targets, encounters):
+            if encounter["encounter"] != UNKNOWN:
+                types.extend(SITUATION_TYPES[encounter["encounter"]])
+                continue
+            types.extend(ROLE_SITUATION_TYPES.get(encounter.get("role"), []))
             if "우현" in str(t.get("relative_position", "")): types.append("횡단 상황")
             if "마주" in str(t.get("bearing", "")): types.append("마주치는 상황")
-        return list(set(types)) if types else ["일반 항행"]
+        return list(dict.fromkeys(types)) if types else ["일반 항행"]
 
-    def _step3_rule_retrieval(self, graph_context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _step3_rule_retrieval(self, ctx: AnalysisContext,
+                              graph_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Step 3: 규정 검색 (쿼리 수정됨)"""
-        situation_types = graph_context.get("identified_situations", [])
-
-        with self.driver.session() as session:
-            # [수정] ORDER BY에서 별칭(legal_weight) 사용
-            query = """
-            MATCH (r:Rule)-[:APPLIES_TO]->(st:SituationType)
-            WHERE st.name IN $situation_types
-            RETURN DISTINCT r.id as rule_id,
-                   r.title as title,
-                   r.summary as summary,
-                   r.full_text as full_text,
-                   r.legal_weight as legal_weight,
-                   collect(DISTINCT st.name) as situations
-            ORDER BY legal_weight DESC
-            LIMIT 5
-            """
-            results = session.run(query, situation_types=situation_types)
-            rules = [dict(record) for record in results]
-
-        self.add_reasoning_step(ReasoningStep(
+        with ctx.timed("rule_retrieval"):
+            situation_types = graph_context.get("identified_situations", [])
+            rules = self._lookup(
+                ctx, "rule_retrieval", ("rules", tuple(sorted(situation_types))),
+                lambda: self._timed_query(ctx, "rule_retrieval", self.store.rules_for_situations,
+                                          situation_types, self.rule_candidates)
+            )
+            return self._record_rule_retrieval(ctx, rules)
+
+    def _record_rule_retrieval(self, ctx: AnalysisContext, rules: List[Dict[str, Any]],
+                               query: str = RULE_RETRIEVAL_QUERY) -> List[Dict[str, Any]]:
+        rules, reasoning = self._rerank(ctx, "rules", rules, "rule_id", RULE_LIMIT)
+        ctx.add_step(ReasoningStep(
             step_name="Rule Retrieval",
             step_number=3,
             description="관련 규정 검색",
             query=query,
-            results=rules
+            results=rules,
+            reasoning=reasoning
         ))
         return rules
 
-    def _step4_case_retrieval(self, graph_context: Dict[str, Any], rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _rerank(self, ctx: AnalysisContext, kind: str, items: List[Dict[str, Any]],
+                id_key: str, limit: int):
+        """그래프 후보를 상황 임베딩과의 코사인 유사도로 재정렬 (벡터 인덱스가 없으면 그대로)"""
+        if self.vector_index is None or ctx.query_vector is None:
+            return items[:limit], None
+        ranked = self.vector_index.rerank(kind, ctx.query_vector, items, id_key, limit)
+        return ranked, f"그래프 후보 {len(items)}건 → 벡터 유사도 상위 {len(ranked)}건"
+
+    def _step4_case_retrieval(self, ctx: AnalysisContext, graph_context: Dict[str, Any],
+                              rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Step 4: 사례 검색 (쿼리 수정됨 - 에러 원인 해결)"""
-        rule_ids = [r['rule_id'] for r in rules]
-
-        with self.driver.session() as session:
-            # [수정] 
-            # 1. RETURN 절에 c.legal_weight as legal_weight 추가
-            # 2. ORDER BY 절을 c.legal_weight -> legal_weight (별칭)로 변경
-            query = """
-            MATCH (c:Case)-[:VIOLATED]->(r:Rule)
-            WHERE r.id IN $rule_ids
-            OPTIONAL MATCH (c)-[:TEACHES]->(l:Lesson)
-            RETURN DISTINCT c.case_id as case_id,
-                   c.title as title,
-                   c.situation_type as situation_type,
-                   c.analysis as analysis,
-                   c.judgment as judgment,
-                   c.legal_weight as legal_weight,
-                   collect(DISTINCT l.text) as lessons
-            ORDER BY legal_weight DESC
-            LIMIT 3
-            """
-            results = session.run(query, rule_ids=rule_ids)
-            cases = [dict(record) for record in results]
-
-        self.add_reasoning_step(ReasoningStep(
+        with ctx.timed("case_retrieval"):
+            rule_ids = [r['rule_id'] for r in rules]
+            cases = self._lookup(
+                ctx, "case_retrieval", ("cases", tuple(rule_ids)),
+                lambda: self._timed_query(ctx, "case_retrieval", self.store.cases_for_rules,
+                                          rule_ids, self.case_candidates)
+            )
+            return self._record_case_retrieval(ctx, cases)
+
+    def _record_case_retrieval(self, ctx: AnalysisContext, cases: List[Dict[str, Any]],
+                               query: str = CASE_RETRIEVAL_QUERY) -> List[Dict[str, Any]]:
+        cases, reasoning = self._rerank(ctx, "cases", cases, "case_id", CASE_LIMIT)
+        ctx.add_step(ReasoningStep(
             step_name="Case Retrieval",
             step_number=4,
             description="유사 판례 검색",
             query=query,
-            results=cases
+            results=cases,
+            reasoning=reasoning
         ))
         return cases
 
-    def _step5_llm_analysis(self, situation, rules, cases) -> str:
-        prompt = f"""
-        상황: {json.dumps(situation.get('situation', {}), ensure_ascii=False)}
-        규정: {[r['title'] for r in rules]}
-        사례: {[c['title'] for c in cases]}
-        
-        위 상황에 대해 COLREGs 기반으로 분석하고 조치를 권고해줘.
+    def _graph_retrieval(self, ctx: AnalysisContext, perception: Dict[str, Any]):
+        """
+        Step 2~4 통합 조회 (retrieval_mode="combined")
+        저장소 왕복 1회로 상황 맥락/규정/판례를 받아 단계별 ReasoningStep을 그대로 남긴다.
+        세 단계의 duration_ms는 통합 조회 시간(timings_ms["graph_retrieval"])이다.
+        벡터 재정렬 시 판례 후보는 재정렬 전 규정 후보 전체에 대해 가져오고,
+        규정 재정렬 후 남은 규정을 위반한 판례만 남긴다.
         """
+        with ctx.timed("graph_retrieval"):
+            situation_types = self._determine_situation_types(perception)
+            data = self._lookup(
+                ctx, "graph_retrieval", ("retrieval", tuple(sorted(situation_types))),
+                lambda: self._timed_query(ctx, "graph_retrieval", self.store.retrieve, situation_types,
+                                          self.rule_candidates, self.case_candidates)
+            )
+            return self._record_retrieval(ctx, situation_types, data)
+
+    def _record_retrieval(self, ctx: AnalysisContext, situation_types: List[str],
+                          data: Dict[str, List[Dict[str, Any]]]):
+        graph_context = self._record_graph_context(
+            ctx, situation_types, data["graph_context"], COMBINED_RETRIEVAL_QUERY)
+        rules = self._record_rule_retrieval(ctx, data["rules"], COMBINED_RETRIEVAL_QUERY)
+        # 재정렬에서 잘린 규정만 인용하는 판례가 relevant_cases에 남지 않도록
+        rule_ids = {r['rule_id'] for r in rules}
+        cases = [c for c in data["cases"]
+                 if c.get("violated_rules") is None or rule_ids.intersection(c["violated_rules"])]
+        cases = self._record_case_retrieval(ctx, cases, COMBINED_RETRIEVAL_QUERY)
+        return graph_context, rules, cases
+
+    def _build_llm_prompt(self, ctx: AnalysisContext, situation, rules, cases) -> str:
+        """토큰 예산 안에서 선별된 타선 행과 규정/판례 요약으로 프롬프트 조립"""
+        prompt, stats = assemble_prompt(situation, ctx.perception or {}, rules, cases,
+                                        self.digests, self.prompt_budget)
+        ctx.prompt_tokens = stats["tokens"]
+        PROMPT_TOKENS.observe(stats["tokens"])
+        return prompt
+
+    def _llm_cache_get(self, prompt: str) -> Optional[str]:
+        if self.llm_cache is None:
+            return None
+        return self.llm_cache.get(self.llm_model, prompt)
+
+    def _llm_cache_put(self, prompt: str, text: str):
+        if self.llm_cache is not None and text and text != LLM_FAILURE_MESSAGE:
+            self.llm_cache.put(self.llm_model, prompt, text)
+
+    def _step5_llm_analysis(self, ctx: AnalysisContext, situation, rules, cases) -> str:
+        with ctx.timed("llm_analysis"):
+            prompt = self._build_llm_prompt(ctx, situation, rules, cases)
+            cached = self._llm_cache_get(prompt)
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            try:
+                response = self.model.generate_content(prompt)
+                text = response.text
+            except:
+                LLM_ERRORS.inc(mode="generate")
+                ctx.llm_failed = True
+                return LLM_FAILURE_MESSAGE
+            finally:
+                ctx.record_llm("generate", time.perf_counter() - start)
+            self._llm_cache_put(prompt, text)
+            return text
+
+    def _step5_llm_analysis_stream(self, ctx: AnalysisContext, situation, rules, cases) -> Iterator[str]:
+        """Step 5 스트리밍: Gemini 응답을 받는 대로 텍스트 청크로 전달"""
+        with ctx.timed("llm_analysis"):
+            prompt = self._build_llm_prompt(ctx, situation, rules, cases)
+            cached = self._llm_cache_get(prompt)
+            if cached is not None:
+                yield cached
+                return
+            chunks: List[str] = []
+            start = time.perf_counter()
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        chunks.append(text)
+                        yield text
+            except Exception:
+                LLM_ERRORS.inc(mode="stream")
+                ctx.llm_failed = True
+                yield LLM_FAILURE_MESSAGE
+                return
+            finally:
+                ctx.record_llm("stream", time.perf_counter() - start)
+            self._llm_cache_put(prompt, "".join(chunks))
+
+    def _step6_action_recommendation(self, ctx: AnalysisContext, situation, rules, cases,
+                                     analysis) -> Dict[str, Any]:
+        with ctx.timed("action_recommendation"):
+            return {
+                "priority_actions": [
+                    {"action": "안전 속력 유지", "priority": 1, "colregs": "Rule 6"},
+                    {"action": "경계 강화", "priority": 2, "colregs": "Rule 5"}
+                ],
+                "warnings": []
+            }
+
+
+class AsyncGraphGuidedRAG(GraphGuidedRAG):
+    """
+    GraphGuidedRAG의 비동기 버전
+    비동기 저장소(AsyncNeo4jGraphStore 등)와 generate_content_async를 사용하므로
+    FastAPI 이벤트 루프를 막지 않고 한 프로세스에서 여러 분석을 동시에 처리한다.
+    """
+
+    def _create_store(self, uri: str, user: str, password: str,
+                      breaker: Optional[CircuitBreaker]) -> GraphStore:
+        return AsyncNeo4jGraphStore(uri, user, password, breaker=breaker)
+
+    def _create_single_flight(self):
+        return AsyncSingleFlight()
+
+    def _create_llm_batcher(self, max_batch: int, window_ms: float):
+        return LLMBatcher(self.model, window_ms, max_batch) if max_batch > 1 else None
+
+    async def close(self):
+        await self.store.close()
+
+    async def get_graph_version(self) -> Any:
+        return await self.store.graph_version()
+
+    async def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        return await self.store.warm_up(connections)
+
+    async def analyze_situation(self, situation_data: Dict[str, Any],
+                                lookup_cache: Optional[AsyncGraphLookupCache] = None) -> Dict[str, Any]:
+        ctx = AnalysisContext(lookup_cache=lookup_cache)
+        key = situation_key(situation_data)
+        cached = self._cached_result(ctx, key, situation_data)
+        if cached is not None:
+            return cached
+
+        if self.single_flight is None:
+            return await self._run_pipeline(ctx, key, situation_data)
+        result, shared = await self.single_flight.do(
+            key, lambda: self._run_pipeline(ctx, key, situation_data)
+        )
+        return self._shared_result(result, situation_data) if shared else result
+
+    async def _run_pipeline(self, ctx: AnalysisContext, key: str,
+                            situation_data: Dict[str, Any]) -> Dict[str, Any]:
+        perception = self._step1_perception(ctx, situation_data, key)
+        if self.retrieval_mode == "combined":
+            graph_context, relevant_rules, relevant_cases = await self._graph_retrieval(ctx, perception)
+        else:
+            graph_context = await self._step2_graph_context(ctx, perception)
+            relevant_rules = await self._step3_rule_retrieval(ctx, graph_context)
+            relevant_cases = await self._step4_case_retrieval(ctx, graph_context, relevant_rules)
+        analysis = await self._step5_llm_analysis(ctx, situation_data, relevant_rules, relevant_cases)
+        recommendations = self._step6_action_recommendation(
+            ctx, situation_data, relevant_rules, relevant_cases, analysis
+        )
+
+        result = self._build_result(
+            ctx, situation_data, perception, graph_context, relevant_rules,
+            relevant_cases, analysis, recommendations
+        )
+        self._store_result(ctx, key, result)
+        return result
+
+    async def stream_analysis(self, situation_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        ctx = AnalysisContext()
+        key = situation_key(situation_data)
+        cached = self._cached_result(ctx, key, situation_data)
+        if cached is not None:
+            for event in self._cached_events(cached):
+                yield event
+            return
+
+        perception = self._step1_perception(ctx, situation_data, key)
+        yield self._step_event(ctx)
+        if self.retrieval_mode == "combined":
+            graph_context, relevant_rules, relevant_cases = await self._graph_retrieval(ctx, perception)
+            for event in self._step_events(ctx, 3):
+                yield event
+        else:
+            graph_context = await self._step2_graph_context(ctx, perception)
+            yield self._step_event(ctx)
+            relevant_rules = await self._step3_rule_retrieval(ctx, graph_context)
+            yield self._step_event(ctx)
+            relevant_cases = await self._step4_case_retrieval(ctx, graph_context, relevant_rules)
+            yield self._step_event(ctx)
+
+        chunks: List[str] = []
+        async for chunk in self._step5_llm_analysis_stream(ctx, situation_data, relevant_rules, relevant_cases):
+            chunks.append(chunk)
+            yield {"event": "llm_chunk", "data": {"text": chunk}}
+        analysis = "".join(chunks)
+
+        recommendations = self._step6_action_recommendation(
+            ctx, situation_data, relevant_rules, relevant_cases, analysis
+        )
+        result = self._build_result(
+            ctx, situation_data, perception, graph_context, relevant_rules,
+            relevant_cases, analysis, recommendations
+        )
+        self._store_result(ctx, key, result)
+        yield {"event": "result", "data": result}
+
+    async def _timed_query(self, ctx: AnalysisContext, step: str, fetch, *args) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except:
-            return "LLM 분석 실패"
+            return await fetch(*args)
+        finally:
+            ctx.record_db(step, time.perf_counter() - start)
 
-    def _step6_action_recommendation(self, situation, rules, cases, analysis) -> Dict[str, Any]:
-        return {
-            "priority_actions": [
-                {"action": "안전 속력 유지", "priority": 1, "colregs": "Rule 6"},
-                {"action": "경계 강화", "priority": 2, "colregs": "Rule 5"}
-            ],
-            "warnings": []
-        }
+    @staticmethod
+    async def _lookup(ctx: AnalysisContext, step: str, key, compute):
+        if ctx.lookup_cache is None:
+            return await compute()
+        computed = []
+
+        async def run():
+            computed.append(True)
+            return await compute()
+
+        value = await ctx.lookup_cache.get_or_compute(key, run)
+        LOOKUP_CACHE.inc(step=step, result="miss" if computed else "hit")
+        return value
+
+    async def _step2_graph_context(self, ctx: AnalysisContext, perception: Dict[str, Any]) -> Dict[str, Any]:
+        with ctx.timed("graph_context"):
+            situation_types = self._determine_situation_types(perception)
+            graph_data = await self._lookup(
+                ctx, "graph_context", ("graph_context", tuple(sorted(situation_types))),
+                lambda: self._timed_query(ctx, "graph_context", self.store.graph_context,
+                                          situation_types)
+            )
+            return self._record_graph_context(ctx, situation_types, graph_data)
+
+    async def _graph_retrieval(self, ctx: AnalysisContext, perception: Dict[str, Any]):
+        with ctx.timed("graph_retrieval"):
+            situation_types = self._determine_situation_types(perception)
+            data = await self._lookup(
+                ctx, "graph_retrieval", ("retrieval", tuple(sorted(situation_types))),
+                lambda: self._timed_query(ctx, "graph_retrieval", self.store.retrieve, situation_types,
+                                          self.rule_candidates, self.case_candidates)
+            )
+            return self._record_retrieval(ctx, situation_types, data)
+
+    async def _step3_rule_retrieval(self, ctx: AnalysisContext,
+                                    graph_context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with ctx.timed("rule_retrieval"):
+            situation_types = graph_context.get("identified_situations", [])
+            rules = await self._lookup(
+                ctx, "rule_retrieval", ("rules", tuple(sorted(situation_types))),
+                lambda: self._timed_query(ctx, "rule_retrieval", self.store.rules_for_situations,
+                                          situation_types, self.rule_candidates)
+            )
+            return self._record_rule_retrieval(ctx, rules)
+
+    async def _step4_case_retrieval(self, ctx: AnalysisContext, graph_context: Dict[str, Any],
+                                    rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with ctx.timed("case_retrieval"):
+            rule_ids = [r['rule_id'] for r in rules]
+            cases = await self._lookup(
+                ctx, "case_retrieval", ("cases", tuple(rule_ids)),
+                lambda: self._timed_query(ctx, "case_retrieval", self.store.cases_for_rules,
+                                          rule_ids, self.case_candidates)
+            )
+            return self._record_case_retrieval(ctx, cases)
+
+    async def _llm_cache_get_async(self, prompt: str) -> Optional[str]:
+        # SQLite I/O는 이벤트 루프 밖에서 수행
+        if self.llm_cache is None:
+            return None
+        return await asyncio.to_thread(self._llm_cache_get, prompt)
+
+    async def _llm_cache_put_async(self, prompt: str, text: str):
+        if self.llm_cache is not None:
+            await asyncio.to_thread(self._llm_cache_put, prompt, text)
+
+    async def _step5_llm_analysis(self, ctx: AnalysisContext, situation, rules, cases) -> str:
+        with ctx.timed("llm_analysis"):
+            prompt = self._build_llm_prompt(ctx, situation, rules, cases)
+            cached = await self._llm_cache_get_async(prompt)
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            try:
+                batched = False
+                if self.llm_batcher is not None:
+                    text, batched = await self.llm_batcher.generate(prompt)
+                else:
+                    response = await self.model.generate_content_async(prompt)
+                    text = response.text
+            except Exception:
+                LLM_ERRORS.inc(mode="generate")
+                ctx.llm_failed = True
+                return LLM_FAILURE_MESSAGE
+            finally:
+                ctx.record_llm("generate", time.perf_counter() - start)
+            # 다른 요청과 프롬프트를 공유한 묶음 응답은 이 프롬프트의 응답으로 영구 저장하지 않음
+            if not batched:
+                await self._llm_cache_put_async(prompt, text)
+            return text
+
+    async def _step5_llm_analysis_stream(self, ctx: AnalysisContext, situation, rules, cases) -> AsyncIterator[str]:
+        with ctx.timed("llm_analysis"):
+            prompt = self._build_llm_prompt(ctx, situation, rules, cases)
+            cached = await self._llm_cache_get_async(prompt)
+            if cached is not None:
+                yield cached
+                return
+            chunks: List[str] = []
+            start = time.perf_counter()
+            try:
+                response = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        chunks.append(text)
+                        yield text
+            except Exception:
+                LLM_ERRORS.inc(mode="stream")
+                ctx.llm_failed = True
+                yield LLM_FAILURE_MESSAGE
+                return
+            finally:
+                ctx.record_llm("stream", time.perf_counter() - start)
+            await self._llm_cache_put_async(prompt, "".join(chunks))
@@ -0,0 +1,862 @@
+"""
+지식 그래프 저장소 인터페이스
+GraphGuidedRAG의 Step 2~4 조회(상황 맥락, 규정, 판례)를 저장소 구현 뒤로 분리한다.
+retrieve()는 세 조회를 한 번에 돌려주며, Neo4j 구현은 이를 단일 읽기 트랜잭션의 쿼리 1회로 처리한다.
+- Neo4jGraphStore / AsyncNeo4jGraphStore: 기존 Cypher 쿼리 그대로
+- InMemoryGraphStore: data/raw/*.json 또는 TTL에서 만든 인접 딕셔너리 + 인덱스
+  (DB 없이 선박 탑재 실행, 테스트/벤치마크용 결정적 백엔드)
+- SnapshotGraphStore / AsyncSnapshotGraphStore: Neo4j 내용을 버전별 InMemoryGraphStore로
+  적재해 조회는 메모리에서, 버전 마커가 바뀌면 새 스냅샷으로 교체
+"""
+import os
+import json
+import asyncio
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional
+
+from neo4j import GraphDatabase, AsyncGraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+from circuit_breaker import CircuitBreaker
+from source_files import read_sources
+
+# Step 2: 상황 맥락 추출
+GRAPH_CONTEXT_QUERY = """
+            MATCH (st:SituationType)
+            WHERE st.name IN $situation_types
+            OPTIONAL MATCH (st)<-[:APPLIES_TO]-(r:Rule)
+            OPTIONAL MATCH (st)<-[:OCCURRED_IN]-(c:Case)
+            RETURN st.name as situation_type,
+                   count(DISTINCT r) as rule_count,
+                   count(DISTINCT c) as case_count
+            """
+
+# Step 3: 규정 검색
+# [수정] ORDER BY에서 별칭(legal_weight) 사용
+RULE_RETRIEVAL_QUERY = """
+            MATCH (r:Rule)-[:APPLIES_TO]->(st:SituationType)
+            WHERE st.name IN $situation_types
+            RETURN DISTINCT r.id as rule_id,
+                   r.title as title,
+                   r.summary as summary,
+                   r.full_text as full_text,
+                   r.legal_weight as legal_weight,
+                   collect(DISTINCT st.name) as situations
+            ORDER BY legal_weight DESC
+            LIMIT $limit
+            """
+
+# Step 4: 사례 검색
+# [수정]
+# 1. RETURN 절에 c.legal_weight as legal_weight 추가
+# 2. ORDER BY 절을 c.legal_weight -> legal_weight (별칭)로 변경
+CASE_RETRIEVAL_QUERY = """
+            MATCH (c:Case)-[:VIOLATED]->(r:Rule)
+            WHERE r.id IN $rule_ids
+            OPTIONAL MATCH (c)-[:TEACHES]->(l:Lesson)
+            RETURN DISTINCT c.case_id as case_id,
+                   c.title as title,
+                   c.situation_type as situation_type,
+                   c.analysis as analysis,
+                   c.judgment as judgment,
+                   c.legal_weight as legal_weight,
+                   collect(DISTINCT r.id) as violated_rules,
+                   collect(DISTINCT l.text) as lessons
+            ORDER BY legal_weight DESC
+            LIMIT $limit
+            """
+
+# Step 2~4 통합 조회: 상황 맥락, 상위 규정, 그 규정들의 판례(교훈 포함)를 한 번의 왕복으로
+# 각 CALL 서브쿼리는 집계로 끝나므로 결과가 없어도 빈 리스트로 항상 1행을 반환한다
+COMBINED_RETRIEVAL_QUERY = """
+            CALL {
+                MATCH (st:SituationType)
+                WHERE st.name IN $situation_types
+                OPTIONAL MATCH (st)<-[:APPLIES_TO]-(r:Rule)
+                OPTIONAL MATCH (st)<-[:OCCURRED_IN]-(c:Case)
+                WITH st, count(DISTINCT r) as rule_count, count(DISTINCT c) as case_count
+                RETURN collect({situation_type: st.name,
+                                rule_count: rule_count,
+                                case_count: case_count}) as graph_context
+            }
+            CALL {
+                MATCH (r:Rule)-[:APPLIES_TO]->(st:SituationType)
+                WHERE st.name IN $situation_types
+                WITH r, collect(DISTINCT st.name) as situations
+                ORDER BY r.legal_weight DESC
+                LIMIT $rule_limit
+                RETURN collect({rule_id: r.id,
+                                title: r.title,
+                                summary: r.summary,
+                                full_text: r.full_text,
+                                legal_weight: r.legal_weight,
+                                situations: situations}) as rules
+            }
+            CALL {
+                WITH rules
+                MATCH (c:Case)-[:VIOLATED]->(r:Rule)
+                WHERE r.id IN [rule IN rules | rule.rule_id]
+                WITH c, collect(DISTINCT r.id) as violated_rules
+                OPTIONAL MATCH (c)-[:TEACHES]->(l:Lesson)
+                WITH c, violated_rules, collect(DISTINCT l.text) as lessons
+                ORDER BY c.legal_weight DESC
+                LIMIT $case_limit
+                RETURN collect({case_id: c.case_id,
+                                title: c.title,
+                                situation_type: c.situation_type,
+                                analysis: c.analysis,
+                                judgment: c.judgment,
+                                legal_weight: c.legal_weight,
+                                violated_rules: violated_rules,
+                                lessons: lessons}) as cases
+            }
+            RETURN graph_context, rules, cases
+            """
+
+# 지식 그래프 버전 마커 (neo4j_loader.py가 적재 완료 시 갱신)
+GRAPH_VERSION_QUERY = """
+            MATCH (v:GraphVersion {id: 'current'})
+            RETURN v.version as version
+            """
+
+# 스냅샷 적재: 규정/판례 전체를 InMemoryGraphStore 입력 형식(data/raw JSON과 같은 필드)으로
+# /rules, /cases 리소스와 벡터 인덱스/요약도 이 내보내기로 만들므로 neo4j_loader.py가 저장하는 속성을 모두 읽는다
+SNAPSHOT_RULES_QUERY = """
+            MATCH (r:Rule)
+            OPTIONAL MATCH (r)-[:APPLIES_TO]->(st:SituationType)
+            WITH r, collect(DISTINCT st.name) as trigger_situations
+            OPTIONAL MATCH (r)-[:RECOMMENDS]->(a:Action)
+            WITH r, trigger_situations, collect(DISTINCT a.name) as actions
+            OPTIONAL MATCH (r)-[:GOVERNS]->(vt:VesselType)
+            RETURN r.id as id,
+                   r.title as title,
+                   r.category as category,
+                   trigger_situations,
+                   r.summary as summary,
+                   r.full_text as full_text,
+                   actions,
+                   collect(DISTINCT vt.name) as vessel_types,
+                   r.legal_weight as legal_weight
+            ORDER BY id
+            """
+
+SNAPSHOT_CASES_QUERY = """
+            MATCH (c:Case)
+            OPTIONAL MATCH (c)-[:VIOLATED]->(r:Rule)
+            WITH c, collect(DISTINCT r.id) as colregs_violated
+            OPTIONAL MATCH (c)-[:TEACHES]->(l:Lesson)
+            RETURN c.case_id as case_id,
+                   c.title as title,
+                   c.date as date,
+                   c.location as location,
+                   c.situation_type as situation_type,
+                   colregs_violated,
+                   c.incident_description as incident_description,
+                   c.analysis as analysis,
+                   c.judgment as judgment,
+                   collect(DISTINCT l.text) as lessons_learned,
+                   c.penalty as penalty,
+                   c.legal_weight as legal_weight
+            ORDER BY case_id
+            """
+
+RULE_LIMIT = 5
+CASE_LIMIT = 3
+
+# 서킷 브레이커가 장애로 세는 예외 (Cypher 오류 등은 제외)
+DB_UNAVAILABLE_ERRORS = (ServiceUnavailable, SessionExpired, OSError, asyncio.TimeoutError)
+
+
+def snapshot_hash(data: Dict[str, Any]) -> str:
+    """export_snapshot() 결과의 규정/판례 내용 해시 (파생 인덱스가 그래프 변경을 알아채는 기준)"""
+    return hashlib.sha256(json.dumps(
+        [data["rules"], data["cases"]], ensure_ascii=False, sort_keys=True, default=str
+    ).encode("utf-8")).hexdigest()
+
+# 시작 시 플랜 캐시 예열에 쓰는 상황 유형 (_determine_situation_types가 내는 값 전체)
+WARMUP_SITUATION_TYPES = ["시계 제한", "횡단 상황", "마주치는 상황", "마주 보는 상황", "정면 충돌 코스",
+                          "우현 접근", "좌현 접근", "피항 의무 발생", "유지선 역할",
+                          "추월 상황", "후방에서 접근", "일반 항행"]
+
+
+class GraphStore(ABC):
+    """
+    저장소 인터페이스 (동기)
+    비동기 엔진용 구현은 같은 이름의 메서드를 코루틴으로 제공한다.
+    조회 메서드를 구현하지 않은 저장소는 생성 시점에 TypeError로 실패한다.
+    """
+    backend = "abstract"
+
+    @abstractmethod
+    def graph_context(self, situation_types: List[str]) -> List[Dict[str, Any]]:
+        """상황 유형별 관련 규정/판례 수 (situation_type, rule_count, case_count)"""
+
+    @abstractmethod
+    def rules_for_situations(self, situation_types: List[str],
+                             limit: int = RULE_LIMIT) -> List[Dict[str, Any]]:
+        """상황 유형에 적용되는 규정 (legal_weight 내림차순 상위 limit건)"""
+
+    @abstractmethod
+    def cases_for_rules(self, rule_ids: List[str], limit: int = CASE_LIMIT) -> List[Dict[str, Any]]:
+        """규정 위반 판례 (legal_weight 내림차순 상위 limit건)"""
+
+    def retrieve(self, situation_types: List[str], rule_limit: int = RULE_LIMIT,
+                 case_limit: int = CASE_LIMIT) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Step 2~4 조회를 한 번에 수행 (graph_context, rules, cases)
+        기본 구현은 개별 조회를 차례로 호출하며, 원격 저장소는 단일 쿼리로 재정의한다.
+        """
+        rules = self.rules_for_situations(situation_types, rule_limit)
+        return {
+            "graph_context": self.graph_context(situation_types),
+            "rules": rules,
+            "cases": self.cases_for_rules([r['rule_id'] for r in rules], case_limit),
+        }
+
+    @abstractmethod
+    def graph_version(self) -> Any:
+        """그래프 버전 마커 (결과 캐시 무효화와 스냅샷 교체 기준)"""
+
+    @abstractmethod
+    def export_snapshot(self) -> Dict[str, Any]:
+        """
+        규정/판례 전체 내보내기 {"version", "rules", "cases"} (data/raw JSON과 같은 필드)
+        /rules, /cases 리소스와 벡터 인덱스/요약을 엔진이 조회하는 그래프와 같은 내용으로 만드는 데 쓴다.
+        """
+
+    def verify_connectivity(self):
+        pass
+
+    def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        return {"connections": 0, "queries": 0, "elapsed_ms": 0.0}
+
+    def close(self):
+        pass
+
+
+class Neo4jGraphStore(GraphStore):
+    backend = "neo4j"
+
+    def __init__(self, uri: str, user: str, password: str,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.driver = self._create_driver(uri, user, password)
+        # Neo4j 장애 시 쿼리를 즉시 실패시키는 회로 (없으면 항상 시도)
+        self.breaker = breaker
+
+    def _create_driver(self, uri: str, user: str, password: str):
+        return GraphDatabase.driver(uri, auth=(user, password))
+
+    def _db_guard(self):
+        if self.breaker is None:
+            return nullcontext()
+        return self.breaker.guard(DB_UNAVAILABLE_ERRORS)
+
+    def run(self, query: str, **params) -> List[Dict[str, Any]]:
+        with self._db_guard():
+            with self.driver.session() as session:
+                results = session.run(query, **params)
+                return [dict(record) for record in results]
+
+    @staticmethod
+    def _read_single(tx, query: str, **params) -> Dict[str, Any]:
+        record = tx.run(query, **params).single()
+        return dict(record) if record is not None else {}
+
+    def graph_context(self, situation_types):
+        return self.run(GRAPH_CONTEXT_QUERY, situation_types=situation_types)
+
+    def rules_for_situations(self, situation_types, limit=RULE_LIMIT):
+        return self.run(RULE_RETRIEVAL_QUERY, situation_types=situation_types, limit=limit)
+
+    def cases_for_rules(self, rule_ids, limit=CASE_LIMIT):
+        return self.run(CASE_RETRIEVAL_QUERY, rule_ids=rule_ids, limit=limit)
+
+    def retrieve(self, situation_types, rule_limit=RULE_LIMIT, case_limit=CASE_LIMIT):
+        # 세션 1개, 읽기 트랜잭션 1개, 쿼리 1회 (단계별 조회 대비 왕복 2회와 세션 2개 절약)
+        with self._db_guard():
+            with self.driver.session() as session:
+                row = session.execute_read(self._read_single, COMBINED_RETRIEVAL_QUERY,
+                                           situation_types=situation_types,
+                                           rule_limit=rule_limit, case_limit=case_limit)
+        return {key: row.get(key) or [] for key in ("graph_context", "rules", "cases")}
+
+    def graph_version(self) -> Any:
+        rows = self.run(GRAPH_VERSION_QUERY)
+        return rows[0]["version"] if rows else None
+
+    @staticmethod
+    def _read_snapshot(tx) -> Dict[str, Any]:
+        version = tx.run(GRAPH_VERSION_QUERY).single()
+        return {
+            "version": version["version"] if version is not None else None,
+            "rules": [dict(record) for record in tx.run(SNAPSHOT_RULES_QUERY)],
+            "cases": [dict(record) for record in tx.run(SNAPSHOT_CASES_QUERY)],
+        }
+
+    def export_snapshot(self) -> Dict[str, Any]:
+        """버전 마커와 규정/판례 전체를 한 읽기 트랜잭션에서 읽는다 (version, rules, cases)"""
+        with self._db_guard():
+            with self.driver.session() as session:
+                return session.execute_read(self._read_snapshot)
+
+    def verify_connectivity(self):
+        self.driver.verify_connectivity()
+
+    def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        """
+        배포 직후 첫 요청이 느리지 않도록 연결 풀과 Neo4j 쿼리 플랜 캐시를 예열
+
+        Args:
+            connections: 미리 열어 둘 풀 연결 수
+
+        Returns:
+            예열 결과 (연결 수, 쿼리 수, 소요 시간)
+        """
+        start = time.perf_counter()
+        connections = max(1, connections)
+        barrier = threading.Barrier(connections)
+
+        def hold_connection():
+            # 모든 세션이 동시에 연결을 잡고 있어야 풀에 N개가 생성된다
+            with self.driver.session() as session:
+                result = session.run("RETURN 1")
+                try:
+                    barrier.wait(timeout=10)
+                except threading.BrokenBarrierError:
+                    pass
+                result.consume()
+
+        threads = [threading.Thread(target=hold_connection, daemon=True) for _ in range(connections)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 파이프라인이 쓰는 쿼리를 한 번씩 실행해 플랜을 컴파일해 둔다
+        self.graph_context(WARMUP_SITUATION_TYPES)
+        rules = self.rules_for_situations(WARMUP_SITUATION_TYPES)
+        self.cases_for_rules([r['rule_id'] for r in rules])
+        self.retrieve(WARMUP_SITUATION_TYPES)
+        self.graph_version()
+        return {"connections": connections, "queries": 5,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    def close(self):
+        self.driver.close()
+
+
+class AsyncNeo4jGraphStore(Neo4jGraphStore):
+    def _create_driver(self, uri: str, user: str, password: str):
+        return AsyncGraphDatabase.driver(uri, auth=(user, password))
+
+    async def run(self, query: str, **params) -> List[Dict[str, Any]]:
+        with self._db_guard():
+            async with self.driver.session() as session:
+                results = await session.run(query, **params)
+                return [dict(record) async for record in results]
+
+    @staticmethod
+    async def _read_single_async(tx, query: str, **params) -> Dict[str, Any]:
+        result = await tx.run(query, **params)
+        record = await result.single()
+        return dict(record) if record is not None else {}
+
+    async def graph_context(self, situation_types):
+        return await self.run(GRAPH_CONTEXT_QUERY, situation_types=situation_types)
+
+    async def rules_for_situations(self, situation_types, limit=RULE_LIMIT):
+        return await self.run(RULE_RETRIEVAL_QUERY, situation_types=situation_types, limit=limit)
+
+    async def cases_for_rules(self, rule_ids, limit=CASE_LIMIT):
+        return await self.run(CASE_RETRIEVAL_QUERY, rule_ids=rule_ids, limit=limit)
+
+    async def retrieve(self, situation_types, rule_limit=RULE_LIMIT, case_limit=CASE_LIMIT):
+        with self._db_guard():
+            async with self.driver.session() as session:
+                row = await session.execute_read(self._read_single_async, COMBINED_RETRIEVAL_QUERY,
+                                                 situation_types=situation_types,
+                                                 rule_limit=rule_limit, case_limit=case_limit)
+        return {key: row.get(key) or [] for key in ("graph_context", "rules", "cases")}
+
+    async def graph_version(self) -> Any:
+        rows = await self.run(GRAPH_VERSION_QUERY)
+        return rows[0]["version"] if rows else None
+
+    @staticmethod
+    async def _read_snapshot_async(tx) -> Dict[str, Any]:
+        version = await (await tx.run(GRAPH_VERSION_QUERY)).single()
+        rules = await tx.run(SNAPSHOT_RULES_QUERY)
+        rules = [dict(record) async for record in rules]
+        cases = await tx.run(SNAPSHOT_CASES_QUERY)
+        cases = [dict(record) async for record in cases]
+        return {"version": version["version"] if version is not None else None,
+                "rules": rules, "cases": cases}
+
+    async def export_snapshot(self) -> Dict[str, Any]:
+        with self._db_guard():
+            async with self.driver.session() as session:
+                return await session.execute_read(self._read_snapshot_async)
+
+    async def verify_connectivity(self):
+        await self.driver.verify_connectivity()
+
+    async def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        start = time.perf_counter()
+        connections = max(1, connections)
+        opened = 0
+        all_open = asyncio.Event()
+
+        async def hold_connection():
+            nonlocal opened
+            async with self.driver.session() as session:
+                result = await session.run("RETURN 1")
+                opened += 1
+                if opened >= connections:
+                    all_open.set()
+                try:
+                    await asyncio.wait_for(all_open.wait(), timeout=10)
+                except asyncio.TimeoutError:
+                    pass
+                await result.consume()
+
+        try:
+            await asyncio.gather(*(hold_connection() for _ in range(connections)))
+        finally:
+            all_open.set()
+
+        await self.graph_context(WARMUP_SITUATION_TYPES)
+        rules = await self.rules_for_situations(WARMUP_SITUATION_TYPES)
+        await self.cases_for_rules([r['rule_id'] for r in rules])
+        await self.retrieve(WARMUP_SITUATION_TYPES)
+        await self.graph_version()
+        return {"connections": connections, "queries": 5,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    async def close(self):
+        await self.driver.close()
+
+
+class InMemoryGraphStore(GraphStore):
+    """
+    인프로세스 그래프 (neo4j_loader.py가 만드는 노드/관계와 같은 구조)
+    Rule -APPLIES_TO-> SituationType, Case -OCCURRED_IN-> SituationType,
+    Case -VIOLATED-> Rule, Case -TEACHES-> Lesson
+    """
+    backend = "memory"
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], cases: Iterable[Dict[str, Any]],
+                 version: Any = None):
+        """
+        Args:
+            rules: colregs_rules.json 형식의 규정 목록
+            cases: kmst_cases.json 형식의 판례 목록
+            version: 그래프 버전 (None이면 내용 해시)
+        """
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        self.cases: Dict[str, Dict[str, Any]] = {}
+        # export_snapshot()용 입력 행 (같은 id는 나중 값, 순서는 처음 적재 순서)
+        self.rule_sources: Dict[str, Dict[str, Any]] = {}
+        self.case_sources: Dict[str, Dict[str, Any]] = {}
+        self.rules_by_situation: Dict[str, List[str]] = {}
+        self.cases_by_situation: Dict[str, List[str]] = {}
+        self.cases_by_rule: Dict[str, List[str]] = {}
+        self._rule_order: Dict[str, int] = {}
+        self._case_order: Dict[str, int] = {}
+
+        for rule in rules:
+            rule_id = rule.get("id")
+            if rule_id is None:
+                continue
+            # MERGE 의미: 같은 id는 나중 값으로 덮어씀
+            self._rule_order.setdefault(rule_id, len(self._rule_order))
+            self.rule_sources[rule_id] = rule
+            self.rules[rule_id] = {
+                "rule_id": rule_id,
+                "title": rule.get("title"),
+                "summary": rule.get("summary"),
+                "full_text": rule.get("full_text"),
+                "legal_weight": rule.get("legal_weight"),
+            }
+            for situation in rule.get("trigger_situations") or []:
+                self._link(self.rules_by_situation, situation, rule_id)
+
+        for case in cases:
+            case_id = case.get("case_id")
+            if case_id is None:
+                continue
+            self._case_order.setdefault(case_id, len(self._case_order))
+            self.case_sources[case_id] = case
+            lessons = []
+            for lesson in case.get("lessons_learned") or []:
+                if lesson not in lessons:
+                    lessons.append(lesson)
+            self.cases[case_id] = {
+                "case_id": case_id,
+                "title": case.get("title"),
+                "situation_type": case.get("situation_type"),
+                "analysis": case.get("analysis"),
+                "judgment": case.get("judgment"),
+                "legal_weight": case.get("legal_weight"),
+                "lessons": lessons,
+            }
+            if case.get("situation_type") is not None:
+                self._link(self.cases_by_situation, case["situation_type"], case_id)
+            for rule_id in case.get("colregs_violated") or []:
+                # 로더와 동일하게 존재하는 Rule 노드에만 VIOLATED 관계 생성
+                if rule_id in self.rules:
+                    self._link(self.cases_by_rule, rule_id, case_id)
+
+        if version is None:
+            digest = hashlib.sha256(json.dumps(
+                [self.rules, self.cases], ensure_ascii=False, sort_keys=True, default=str
+            ).encode("utf-8")).hexdigest()
+            version = f"memory-{digest[:16]}"
+        self.version = version
+
+    @staticmethod
+    def _link(index: Dict[str, List[str]], key: str, value: str):
+        values = index.setdefault(key, [])
+        if value not in values:
+            values.append(value)
+
+    @classmethod
+    def from_json(cls, data_dir: str) -> "InMemoryGraphStore":
+        """data/raw의 colregs_rules.json, kmst_cases.json으로 구성"""
+        rules, cases, _ = read_sources(data_dir)
+        store = cls(rules, cases)
+        print(f"🧠 인메모리 그래프 구성: 규정 {len(store.rules)}개, 판례 {len(store.cases)}개 ({data_dir})")
+        return store
+
+    @classmethod
+    def from_ttl(cls, ttl_path: str) -> "InMemoryGraphStore":
+        """
+        scripts/migrate_to_rdf.py가 만든 TTL(mso 네임스페이스)로 구성 (rdflib 필요)
+        SafetyIssue는 SituationType, Regulation은 Rule, MaritimeCase는 Case로 대응한다.
+        """
+        try:
+            from rdflib import Graph, Namespace
+            from rdflib.namespace import RDF
+        except ImportError as e:
+            raise ImportError("TTL 그래프를 읽으려면 rdflib가 필요합니다 (pip install rdflib)") from e
+
+        mso = Namespace("http://weoffice.ai/ontology/maritime-safety#")
+        graph = Graph()
+        graph.parse(ttl_path, format="turtle")
+
+        def value(subject, predicate):
+            obj = graph.value(subject, predicate)
+            return obj.toPython() if obj is not None else None
+
+        rules = []
+        rule_ids = {}
+        for subject in graph.subjects(RDF.type, mso.Regulation):
+            rule_id = value(subject, mso.regulationId)
+            if rule_id is None:
+                continue
+            rule_ids[subject] = rule_id
+            rules.append({
+                "id": rule_id,
+                "title": value(subject, mso.titleKr),
+                "summary": value(subject, mso.summaryKr),
+                "full_text": value(subject, mso.fullTextKr),
+                "legal_weight": value(subject, mso.legalWeight),
+                "trigger_situations": [value(issue, mso.nameKr)
+                                       for issue in graph.objects(subject, mso.addresses)],
+            })
+
+        cases = []
+        for subject in graph.subjects(RDF.type, mso.MaritimeCase):
+            situations = [value(issue, mso.nameKr) for issue in graph.objects(subject, mso.exampleOf)]
+            cases.append({
+                "case_id": value(subject, mso.caseId),
+                "title": value(subject, mso.titleKr),
+                "situation_type": situations[0] if situations else None,
+                "analysis": value(subject, mso.analysis),
+                "judgment": value(subject, mso.judgment),
+                "legal_weight": value(subject, mso.legalWeight),
+                "colregs_violated": [rule_ids[r] for r in graph.objects(subject, mso.violated)
+                                     if r in rule_ids],
+                "lessons_learned": [value(lesson, mso.textKr)
+                                    for lesson in graph.objects(subject, mso.teaches)],
+            })
+
+        store = cls(rules, cases)
+        print(f"🧠 인메모리 그래프 구성 (TTL): 규정 {len(store.rules)}개, 판례 {len(store.cases)}개")
+        return store
+
+    @classmethod
+    def from_source(cls, source: str) -> "InMemoryGraphStore":
+        """디렉터리면 JSON, .ttl 파일이면 TTL로 구성"""
+        if os.path.isdir(source):
+            return cls.from_json(source)
+        return cls.from_ttl(source)
+
+    @staticmethod
+    def _by_weight(items: List[Dict[str, Any]], order: Dict[str, int], key: str):
+        # ORDER BY legal_weight DESC (null은 마지막, 동점은 적재 순서)
+        return sorted(items, key=lambda item: (
+            item.get("legal_weight") is None,
+            -(item.get("legal_weight") or 0),
+            order[item[key]],
+        ))
+
+    def graph_context(self, situation_types):
+        rows = []
+        for name in dict.fromkeys(situation_types):
+            rule_ids = self.rules_by_situation.get(name)
+            case_ids = self.cases_by_situation.get(name)
+            if rule_ids is None and case_ids is None:
+                continue  # SituationType 노드 없음
+            rows.append({"situation_type": name,
+                         "rule_count": len(rule_ids or []),
+                         "case_count": len(case_ids or [])})
+        return rows
+
+    def rules_for_situations(self, situation_types, limit=RULE_LIMIT):
+        matched: Dict[str, List[str]] = {}
+        for name in dict.fromkeys(situation_types):
+            for rule_id in self.rules_by_situation.get(name, []):
+                matched.setdefault(rule_id, []).append(name)
+        rows = [dict(self.rules[rule_id], situations=names) for rule_id, names in matched.items()]
+        return self._by_weight(rows, self._rule_order, "rule_id")[:limit]
+
+    def cases_for_rules(self, rule_ids, limit=CASE_LIMIT):
+        matched: Dict[str, List[str]] = {}
+        for rule_id in dict.fromkeys(rule_ids):
+            for case_id in self.cases_by_rule.get(rule_id, []):
+                matched.setdefault(case_id, []).append(rule_id)
+        rows = [dict(self.cases[case_id], violated_rules=violated,
+                     lessons=list(self.cases[case_id]["lessons"]))
+                for case_id, violated in matched.items()]
+        return self._by_weight(rows, self._case_order, "case_id")[:limit]
+
+    def graph_version(self) -> Any:
+        return self.version
+
+    def export_snapshot(self) -> Dict[str, Any]:
+        return {"version": self.version,
+                "rules": list(self.rule_sources.values()),
+                "cases": list(self.case_sources.values())}
+
+
+class AsyncInMemoryGraphStore(InMemoryGraphStore):
+    """비동기 엔진용 (조회는 마이크로초 단위라 이벤트 루프에서 바로 실행)"""
+
+    async def graph_context(self, situation_types):
+        return InMemoryGraphStore.graph_context(self, situation_types)
+
+    async def rules_for_situations(self, situation_types, limit=RULE_LIMIT):
+        return InMemoryGraphStore.rules_for_situations(self, situation_types, limit)
+
+    async def cases_for_rules(self, rule_ids, limit=CASE_LIMIT):
+        return InMemoryGraphStore.cases_for_rules(self, rule_ids, limit)
+
+    async def retrieve(self, situation_types, rule_limit=RULE_LIMIT, case_limit=CASE_LIMIT):
+        rules = InMemoryGraphStore.rules_for_situations(self, situation_types, rule_limit)
+        return {
+            "graph_context": InMemoryGraphStore.graph_context(self, situation_types),
+            "rules": rules,
+            "cases": InMemoryGraphStore.cases_for_rules(self, [r['rule_id'] for r in rules],
+                                                        case_limit),
+        }
+
+    async def graph_version(self) -> Any:
+        return self.version
+
+    async def export_snapshot(self) -> Dict[str, Any]:
+        return InMemoryGraphStore.export_snapshot(self)
+
+    async def verify_connectivity(self):
+        pass
+
+    async def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        return InMemoryGraphStore.warm_up(self, connections)
+
+    async def close(self):
+        pass
+
+
+class SnapshotGraphStore(GraphStore):
+    """
+    원격 그래프(Neo4j)의 버전별 인프로세스 스냅샷
+    규정/판례는 neo4j_loader.py 재적재 사이에 바뀌지 않으므로 한 번 읽어 InMemoryGraphStore로
+    두고 조회는 메모리에서 처리한다. graph_version()이 원본 버전 마커를 확인해 바뀌었으면
+    새 스냅샷을 만든 뒤 참조만 교체하므로, 진행 중인 요청은 이전 스냅샷으로 끝까지 처리된다.
+    원본에 버전 마커가 없으면(None) 변경을 알 수 없으므로 처음 한 번만 적재하고, 마커가 생기면 다시 적재한다.
+    스냅샷 버전(snapshot.version)은 마커가 없을 때 내용 해시이므로 원본 마커(source_version)와 따로 보관한다.
+    원본 확인이 실패해도 적재된 스냅샷이 있으면 그 버전으로 계속 서비스한다 (원본 장애 중 조회 유지).
+    """
+    backend = "snapshot"
+
+    def __init__(self, source: GraphStore):
+        """
+        Args:
+            source: 스냅샷 원본 (export_snapshot/graph_version 제공)
+        """
+        self.source = source
+        self.snapshot: Optional[InMemoryGraphStore] = None
+        self.source_version: Any = None  # 현재 스냅샷을 만든 원본 버전 마커 (없으면 None)
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self.refresh_failures = 0  # 연속된 원본 확인 실패 수 (0이 아니면 스냅샷이 오래됐을 수 있음)
+        self._lock = threading.Lock()
+
+    def _build(self, data: Dict[str, Any]) -> InMemoryGraphStore:
+        start = time.perf_counter()
+        snapshot = InMemoryGraphStore(data["rules"], data["cases"], version=data["version"])
+        print(f"🧠 그래프 스냅샷 적재 (버전 {snapshot.version}): 규정 {len(snapshot.rules)}개, "
+              f"판례 {len(snapshot.cases)}개, {(time.perf_counter() - start) * 1000:.0f}ms")
+        return snapshot
+
+    def _swap(self, snapshot: InMemoryGraphStore, source_version: Any):
+        if self.snapshot is not None:
+            self.reloads += 1
+        self.source_version = source_version
+        self.snapshot = snapshot  # 참조 교체 (원자적)
+        self.loaded_at = time.time()
+
+    def _stale_version(self, error: Exception) -> Any:
+        self.refresh_failures += 1
+        print(f"⚠️ 그래프 원본 확인 실패 ({self.refresh_failures}회 연속) - "
+              f"스냅샷 버전 {self.snapshot.version}로 계속 서비스: {error}")
+        return self.snapshot.version
+
+    def _is_current(self, version: Any) -> bool:
+        # 마커가 없는 원본은 적재된 스냅샷을 계속 사용 (폴링마다 전체 export 방지)
+        return self.snapshot is not None and (version is None or version == self.source_version)
+
+    def refresh(self) -> bool:
+        """원본 버전 마커가 바뀌었으면 다시 적재 (교체했으면 True)"""
+        version = self.source.graph_version()
+        if self._is_current(version):
+            return False
+        with self._lock:
+            if self._is_current(version):
+                return False
+            data = self.source.export_snapshot()
+            self._swap(self._build(data), data["version"])
+            return True
+
+    def _current(self) -> InMemoryGraphStore:
+        snapshot = self.snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self.snapshot
+        return snapshot
+
+    def graph_context(self, situation_types):
+        return self._current().graph_context(situation_types)
+
+    def rules_for_situations(self, situation_types, limit=RULE_LIMIT):
+        return self._current().rules_for_situations(situation_types, limit)
+
+    def cases_for_rules(self, rule_ids, limit=CASE_LIMIT):
+        return self._current().cases_for_rules(rule_ids, limit)
+
+    def retrieve(self, situation_types, rule_limit=RULE_LIMIT, case_limit=CASE_LIMIT):
+        # 세 조회가 같은 스냅샷을 보도록 참조를 한 번만 읽는다
+        return self._current().retrieve(situation_types, rule_limit, case_limit)
+
+    def graph_version(self) -> Any:
+        try:
+            self.refresh()
+        except Exception as e:
+            if self.snapshot is None:
+                raise
+            return self._stale_version(e)
+        self.refresh_failures = 0
+        return self.snapshot.version
+
+    def export_snapshot(self) -> Dict[str, Any]:
+        # 원본을 다시 읽지 않고 현재 스냅샷을 내보낸다 (조회와 같은 내용)
+        return self._current().export_snapshot()
+
+    def verify_connectivity(self):
+        self.source.verify_connectivity()
+
+    def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        info = self.source.warm_up(connections)
+        self._current()
+        return info
+
+    def close(self):
+        self.source.close()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version if snapshot is not None else None,
+            "source_version": self.source_version,
+            "rules": len(snapshot.rules) if snapshot is not None else 0,
+            "cases": len(snapshot.cases) if snapshot is not None else 0,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+class AsyncSnapshotGraphStore(SnapshotGraphStore):
+    """비동기 원본(AsyncNeo4jGraphStore)용, 조회는 스냅샷에서 바로 처리"""
+
+    def __init__(self, source: GraphStore):
+        super().__init__(source)
+        self._async_lock = asyncio.Lock()
+
+    async def refresh(self) -> bool:
+        version = await self.source.graph_version()
+        if self._is_current(version):
+            return False
+        async with self._async_lock:
+            if self._is_current(version):
+                return False
+            data = await self.source.export_snapshot()
+            # 인덱스 구성은 이벤트 루프 밖에서 (그동안 요청은 이전 스냅샷으로 처리)
+            self._swap(await asyncio.to_thread(self._build, data), data["version"])
+            return True
+
+    async def _current(self) -> InMemoryGraphStore:
+        snapshot = self.snapshot
+        if snapshot is None:
+            await self.refresh()
+            snapshot = self.snapshot
+        return snapshot
+
+    async def graph_context(self, situation_types):
+        return (await self._current()).graph_context(situation_types)
+
+    async def rules_for_situations(self, situation_types, limit=RULE_LIMIT):
+        return (await self._current()).rules_for_situations(situation_types, limit)
+
+    async def cases_for_rules(self, rule_ids, limit=CASE_LIMIT):
+        return (await self._current()).cases_for_rules(rule_ids, limit)
+
+    async def retrieve(self, situation_types, rule_limit=RULE_LIMIT, case_limit=CASE_LIMIT):
+        return (await self._current()).retrieve(situation_types, rule_limit, case_limit)
+
+    async def graph_version(self) -> Any:
+        try:
+            await self.refresh()
+        except Exception as e:
+            if self.snapshot is None:
+                raise
+            return self._stale_version(e)
+        self.refresh_failures = 0
+        return self.snapshot.version
+
+    async def export_snapshot(self) -> Dict[str, Any]:
+        return (await self._current()).export_snapshot()
+
+    async def verify_connectivity(self):
+        await self.source.verify_connectivity()
+
+    async def warm_up(self, connections: int = 1) -> Dict[str, Any]:
+        info = await self.source.warm_up(connections)
+        await self._current()
+        return info
+
+    async def close(self):
+        await self.source.close()
@@ -0,0 +1,106 @@
+"""
+충돌 위험 기하 계산 (COLREGs Rule 7)
+자선 침로/속력과 타선 방위·거리·침로·속력으로 CPA, TCPA, 거리 변화율을 계산한다.
+모든 타선을 NumPy 배열로 한 번에 처리한다 (좌표: 동(x)/북(y), 거리 해리, 속력 노트).
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from encounter import round_or_none
+from situation_schema import ParsedSituation
+
+# Rule 7 위험 판단 기준: CPA 0.5해리 이내, TCPA 6분 이내
+CPA_LIMIT_NM = 0.5
+TCPA_LIMIT_MIN = 6.0
+
+# 상대 속력이 이보다 작으면 거리 변화 없음으로 본다 (노트)
+_MIN_RELATIVE_SPEED = 1e-6
+
+
+def _vectors(degrees: np.ndarray, magnitude: np.ndarray) -> np.ndarray:
+    radians = np.radians(degrees)
+    return np.stack([magnitude * np.sin(radians), magnitude * np.cos(radians)], axis=-1)
+
+
+def compute_cpa(own_heading: float, own_speed: float, bearings: np.ndarray, distances: np.ndarray,
+                courses: np.ndarray, speeds: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Args:
+        own_heading, own_speed: 자선 침로(도), 속력(노트)
+        bearings, distances: 자선에서 본 타선 진방위(도), 거리(해리) (shape (N,))
+        courses, speeds: 타선 침로(도), 속력(노트)
+
+    Returns:
+        cpa_nm, tcpa_min(음수면 이미 지나감), range_rate_kn(음수면 접근 중),
+        risk(Rule 7 기준 충돌 위험) 배열. 입력이 없는 타선은 NaN / False
+    """
+    bearings = np.asarray(bearings, dtype=np.float64)
+    distances = np.asarray(distances, dtype=np.float64)
+    position = _vectors(bearings, distances)
+    relative = (_vectors(np.asarray(courses, dtype=np.float64), np.asarray(speeds, dtype=np.float64))
+                - _vectors(np.float64(own_heading), np.float64(own_speed)))
+
+    closing = np.einsum("ij,ij->i", position, relative)
+    rel_speed_sq = np.einsum("ij,ij->i", relative, relative)
+    moving = rel_speed_sq > _MIN_RELATIVE_SPEED
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tcpa_hours = np.where(moving, -closing / np.where(moving, rel_speed_sq, 1.0), 0.0)
+        cpa = np.linalg.norm(position + relative * tcpa_hours[:, None], axis=-1)
+        range_rate = np.where(distances > 0, closing / distances, 0.0)
+
+    invalid = np.isnan(closing)
+    tcpa = np.where(moving, tcpa_hours * 60.0, np.inf)
+    tcpa[invalid] = np.nan
+    risk = (cpa <= CPA_LIMIT_NM) & (tcpa >= 0) & (tcpa <= TCPA_LIMIT_MIN)
+    return {"cpa_nm": cpa, "tcpa_min": tcpa, "range_rate_kn": range_rate, "risk": risk}
+
+
+# source 코드 → 표시값
+_SOURCES = np.array([None, "computed", "reported"], dtype=object)
+
+
+def situation_kinematics(parsed: ParsedSituation) -> Dict[str, np.ndarray]:
+    """
+    파싱된 상황의 모든 타선 CPA/TCPA
+    타선 침로가 없어 계산할 수 없으면 센서(ARPA 등)가 보고한 cpa/tcpa 값을 쓴다 (source: reported)
+    """
+    result = compute_cpa(parsed.own_heading_deg, parsed.own_speed_kn, parsed.bearing_deg,
+                         parsed.distance_nm, parsed.course_deg, parsed.speed_kn)
+    reported_tcpa = parsed.reported_tcpa_s / 60.0
+    computed = ~np.isnan(result["tcpa_min"])
+    reported = ~computed & ~np.isnan(parsed.reported_cpa_nm) & ~np.isnan(reported_tcpa)
+    return {
+        "cpa_nm": np.where(computed, result["cpa_nm"], parsed.reported_cpa_nm),
+        "tcpa_min": np.where(computed, result["tcpa_min"], reported_tcpa),
+        "range_rate_kn": np.where(computed, result["range_rate_kn"], np.nan),
+        "risk": np.where(computed, result["risk"],
+                         reported & (parsed.reported_cpa_nm <= CPA_LIMIT_NM)
+                         & (reported_tcpa <= TCPA_LIMIT_MIN)),
+        "source": np.select([computed, reported], [1, 2], default=0),
+    }
+
+
+def kinematics_records(parsed: ParsedSituation, result: Dict[str, np.ndarray],
+                       indices: Sequence[int]) -> List[Dict[str, Any]]:
+    """선택된 타선의 CPA/TCPA → 응답용 dict 목록 (상대 운동이 없으면 tcpa_min None)"""
+    return [
+        {
+            "target_id": parsed.target_ids[i],
+            "cpa_nm": round_or_none(result["cpa_nm"][i]),
+            "tcpa_min": None if np.isinf(result["tcpa_min"][i]) else round_or_none(result["tcpa_min"][i]),
+            "range_rate_kn": round_or_none(result["range_rate_kn"][i]),
+            "risk_of_collision": bool(result["risk"][i]),
+            "source": _SOURCES[result["source"][i]],
+        }
+        for i in indices
+    ]
+
+
+def closest_approach(parsed: ParsedSituation, result: Dict[str, np.ndarray]) -> Optional[Dict[str, Any]]:
+    """CPA가 가장 작은 (아직 지나가지 않은) 타선"""
+    ahead = ~np.isnan(result["cpa_nm"]) & ~(result["tcpa_min"] < 0)
+    if not ahead.any():
+        return None
+    candidates = np.flatnonzero(ahead)
+    return kinematics_records(parsed, result, [candidates[np.argmin(result["cpa_nm"][candidates])]])[0]
@@ -0,0 +1,114 @@
+"""
+지식 베이스 리소스 - COLREGs 규정 / KMST 판례의 인프로세스 사본
+그래프 적재 원본(data/raw/*.json)을 한 번만 파싱하고, 항목별 직렬화 결과와 ETag를
+미리 계산해 둔다. /rules, /cases 요청은 해시 비교와 바이트 전송만 한다.
+파일 재적재 규칙은 시나리오와 같다 (source_files.ReloadableJSON: 파일이 없어지면 비움).
+엔진이 그래프에 연결되면 use_graph()로 그래프 내보내기(GraphStore.export_snapshot)의 규정/판례로
+교체하므로, /rules, /cases는 /analyze가 인용하는 그래프와 같은 id/제목을 제공한다.
+"""
+import os
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from response_views import dumps
+from source_files import RULES_FILE, CASES_FILE, ReloadableJSON
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+@dataclass(frozen=True)
+class Resource:
+    """미리 직렬화된 응답 본문과 강한 ETag"""
+    body: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class ResourceSnapshot:
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    by_id: Dict[str, Resource] = field(default_factory=dict)
+    lists: Dict[str, Resource] = field(default_factory=dict)  # view → 목록 응답
+    content_hash: str = ""
+
+
+class ResourceFile:
+    """JSON 배열 파일 하나를 id 인덱스와 사전 직렬화 응답으로 캐시 (변경 시에만 재적재)"""
+
+    def __init__(self, file_path: str, id_field: str, summary_fields: Sequence[str]):
+        """
+        Args:
+            file_path: JSON 배열 파일 경로
+            id_field: 항목 식별자 필드명
+            summary_fields: 목록 summary 뷰에 남길 필드 (본문 텍스트 제외)
+        """
+        self.file_path = file_path
+        self.id_field = id_field
+        self.summary_fields = tuple(summary_fields)
+        self._source = ReloadableJSON(file_path, self._build, ResourceSnapshot(), "지식 베이스")
+        # 그래프 내보내기로 만든 스냅샷 (있으면 파일보다 우선)
+        self._graph: Optional[ResourceSnapshot] = None
+
+    def snapshot(self) -> ResourceSnapshot:
+        graph = self._graph
+        return graph if graph is not None else self._source.get()
+
+    def use_items(self, items: List[Dict[str, Any]], label: str):
+        """파일 대신 주어진 항목으로 리소스를 구성 (그래프 내용이 바뀌었을 때만 다시 직렬화)"""
+        content_hash = hashlib.sha256(dumps(items)).hexdigest()
+        graph = self._graph
+        if graph is not None and graph.content_hash == content_hash:
+            return
+        self._graph = self._build(items, content_hash, label)
+
+    def _build(self, items: Any, content_hash: str, label: Optional[str] = None) -> ResourceSnapshot:
+        if not isinstance(items, list):
+            items = []
+
+        by_id = {}
+        for item in items:
+            item_id = item.get(self.id_field)
+            if item_id is not None:
+                body = dumps(item)
+                by_id[str(item_id)] = Resource(body, _etag(body))
+        summaries = [{k: item.get(k) for k in self.summary_fields if k in item} for item in items]
+        lists = {}
+        for view, payload in (("summary", summaries), ("full", items)):
+            body = dumps({"items": payload, "count": len(payload)})
+            lists[view] = Resource(body, _etag(body))
+
+        print(f"📚 지식 베이스 {len(items)}건 적재: {label or self.file_path}")
+        return ResourceSnapshot(items, by_id, lists, content_hash)
+
+    def get(self, item_id: str) -> Optional[Resource]:
+        return self.snapshot().by_id.get(item_id)
+
+    def list(self, view: str = "summary") -> Optional[Resource]:
+        return self.snapshot().lists.get(view)
+
+
+class KnowledgeBase:
+    """규정(rules)과 판례(cases) 리소스 묶음"""
+
+    def __init__(self, data_dir: str):
+        self.rules = ResourceFile(
+            os.path.join(data_dir, RULES_FILE), "id",
+            ("id", "title", "category", "summary", "legal_weight")
+        )
+        self.cases = ResourceFile(
+            os.path.join(data_dir, CASES_FILE), "case_id",
+            ("case_id", "title", "date", "situation_type", "colregs_violated", "legal_weight")
+        )
+
+    def use_graph(self, data: Dict[str, Any]):
+        """
+        그래프 내보내기로 규정/판례 리소스 교체
+
+        Args:
+            data: GraphStore.export_snapshot() 결과 {"version", "rules", "cases"}
+        """
+        label = f"그래프 버전 {data.get('version')}"
+        self.rules.use_items(data["rules"], label)
+        self.cases.use_items(data["cases"], label)
@@ -0,0 +1,161 @@
+"""
+LLM 마이크로 배칭 - 짧은 시간 창 안에 들어온 분석 프롬프트를 한 번의 요청으로 묶는다
+/analyze/batch나 재생(replay)처럼 작은 프롬프트 수백 개를 보낼 때 호출당 고정 비용(연결, 큐 대기,
+시스템 프롬프트 처리)이 대부분을 차지하므로, 여러 항목을 번호 붙인 JSON 배열 응답으로 받아
+항목별로 나눠 돌려준다. 응답에서 빠졌거나 나누지 못한 항목만 개별 호출로 다시 보내고,
+요청 자체가 실패하면(할당량, 인증, 네트워크) 재시도로 부하를 늘리지 않고 묶음 전체를 실패로 돌려준다.
+
+묶음의 항목들은 한 프롬프트를 공유하므로 한 항목의 문구가 다른 항목의 답에 영향을 줄 수 있다.
+신뢰할 수 있는 입력(내부 재생 등)에만 켜고, 묶음 응답은 프롬프트 캐시에 저장하지 않는다.
+"""
+import re
+import json
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import LLM_BATCH_SIZE
+
+BATCH_INSTRUCTION = (
+    "아래 {count}개 항목은 서로 독립된 요청이다. 각 항목에 대해 따로 답하고, "
+    "다른 설명 없이 JSON 배열 하나로만 응답해줘: "
+    '[{{"id": "<항목 번호>", "answer": "<해당 항목에 대한 전체 답변>"}}, ...]'
+)
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    items = "\n\n".join(f"### 항목 {i}\n{prompt.strip()}" for i, prompt in enumerate(prompts, 1))
+    return f"{BATCH_INSTRUCTION.format(count=len(prompts))}\n\n{items}"
+
+
+def split_batch_response(text: str, count: int) -> Dict[int, str]:
+    """
+    묶음 응답 → {항목 순번(0부터): 답변}
+    JSON이 아니거나 형식이 다르면 빈 dict, 일부 항목만 있으면 있는 항목만 반환
+    """
+    try:
+        data = json.loads(_FENCE.sub("", text.strip()))
+    except ValueError:
+        return {}
+    if not isinstance(data, list):
+        return {}
+    answers: Dict[int, str] = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(str(entry.get("id")).strip()) - 1
+        except ValueError:
+            continue
+        answer = entry.get("answer")
+        if 0 <= index < count and isinstance(answer, str) and answer.strip():
+            answers[index] = answer
+    return answers
+
+
+class LLMBatcher:
+    """
+    generate_content_async 호출을 모아 보내는 디스패처 (이벤트 루프 1개 기준)
+    첫 요청이 들어오면 window_ms 뒤에, 또는 max_batch개가 차면 즉시 전송한다.
+    """
+
+    def __init__(self, model, window_ms: float = 20.0, max_batch: int = 8):
+        """
+        Args:
+            model: generate_content_async(prompt)를 제공하는 모델
+            window_ms: 묶음을 기다리는 최대 시간
+            max_batch: 한 요청에 담을 최대 항목 수 (1이면 배칭하지 않음)
+        """
+        self.model = model
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[str, asyncio.Future]] = []  # future 결과: (텍스트, 묶음 여부)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.requests = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+        self.failed_batches = 0
+
+    async def generate(self, prompt: str) -> Tuple[str, bool]:
+        """
+        프롬프트 1건의 (응답 텍스트, 묶음 응답 여부)
+        모델 오류는 그대로 전파 (묶음 요청이 실패하면 묶음의 모든 항목에 같은 오류)
+        """
+        self.requests += 1
+        if self.max_batch == 1:
+            return await self._single(prompt), False
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch))
+            # 완료 전에 태스크가 GC되지 않도록 참조 유지
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _single(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        LLM_BATCH_SIZE.observe(len(batch))
+        if len(batch) == 1:
+            await self._resolve(*batch[0])
+            return
+
+        self.batches += 1
+        try:
+            response = await self.model.generate_content_async(build_batch_prompt([p for p, _ in batch]))
+            text = response.text
+        except Exception as e:
+            # 할당량/인증/네트워크 오류는 개별 재시도해도 같은 결과라 부하만 늘어난다
+            self.failed_batches += 1
+            print(f"⚠️ LLM 묶음 요청 실패 ({len(batch)}건): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        answers = split_batch_response(text, len(batch))
+        retry = []
+        for index, (prompt, future) in enumerate(batch):
+            if index in answers:
+                self.batched_items += 1
+                if not future.done():
+                    future.set_result((answers[index], True))
+            else:
+                retry.append((prompt, future))
+        if retry:
+            self.fallbacks += len(retry)
+            await asyncio.gather(*(self._resolve(prompt, future) for prompt, future in retry))
+
+    async def _resolve(self, prompt: str, future: asyncio.Future):
+        try:
+            text = await self._single(prompt)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result((text, False))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "batches": self.batches,
+                "batched_items": self.batched_items, "fallbacks": self.fallbacks,
+                "failed_batches": self.failed_batches,
+                "pending": len(self._pending), "window_ms": self.window * 1000,
+                "max_batch": self.max_batch}
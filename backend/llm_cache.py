@@ -0,0 +1,217 @@
+"""
+LLM 응답 캐시 - SQLite 기반 영구 저장소
+프롬프트 내용과 모델명으로 키를 만들기 때문에 같은 프롬프트는 재시작이나 배포 후에도
+Gemini를 다시 호출하지 않는다. WAL 모드로 같은 호스트의 uvicorn 워커들이 공유한다.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+# 크기/항목 수 합계는 트리거가 유지하는 한 행짜리 테이블에서 읽는다 (put마다 전체 SUM/COUNT를 하지 않음)
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS llm_responses (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS llm_responses_last_access ON llm_responses (last_access)",
+    """
+    CREATE TABLE IF NOT EXISTS llm_response_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        bytes INTEGER NOT NULL,
+        entries INTEGER NOT NULL
+    )
+    """,
+    # 트리거 도입 전에 만들어진 파일이면 기존 행으로 합계를 한 번 계산
+    "INSERT OR IGNORE INTO llm_response_totals (id, bytes, entries) "
+    "SELECT 1, COALESCE(SUM(size), 0), COUNT(*) FROM llm_responses",
+    """
+    CREATE TRIGGER IF NOT EXISTS llm_responses_insert AFTER INSERT ON llm_responses BEGIN
+        UPDATE llm_response_totals SET bytes = bytes + NEW.size, entries = entries + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS llm_responses_delete AFTER DELETE ON llm_responses BEGIN
+        UPDATE llm_response_totals SET bytes = bytes - OLD.size, entries = entries - 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS llm_responses_resize AFTER UPDATE OF size ON llm_responses BEGIN
+        UPDATE llm_response_totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 1;
+    END
+    """,
+)
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    """모델명 + 프롬프트의 내용 주소 (sha256)"""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """크기 제한과 LRU 제거를 지원하는 프롬프트 → 응답 캐시"""
+
+    def __init__(self, db_path: str, max_bytes: int = 256 * 1024 * 1024,
+                 max_entries: int = 50000, access_flush_size: int = 256,
+                 access_flush_interval: float = 30.0):
+        """
+        Args:
+            db_path: SQLite 파일 경로 (워커 간 공유)
+            max_bytes: 저장된 응답 총 크기 상한 (바이트)
+            max_entries: 저장 항목 수 상한
+            access_flush_size: 모아 둔 최근 사용 시각이 이 개수에 이르면 한 번에 기록
+            access_flush_interval: 마지막 기록 후 이 시간(초)이 지나면 기록
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.access_flush_size = access_flush_size
+        self.access_flush_interval = access_flush_interval
+        self._local = threading.local()
+        # 조회 적중 시 last_access를 바로 쓰지 않고 모아 두었다가 한 트랜잭션으로 기록 (LRU 근사)
+        self._pending_access: Dict[str, float] = {}
+        self._access_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        # 다른 워커가 동시에 초기화해도 합계 계산과 트리거 생성 사이에 쓰기가 끼지 않도록
+        conn.execute("BEGIN IMMEDIATE")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드 간 공유하지 않음
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        key = prompt_key(model, prompt)
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM 캐시 조회 실패: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key)
+        return row[0]
+
+    def _touch(self, key: str):
+        """최근 사용 시각을 모아 두고, 개수나 시간 기준을 넘으면 기록"""
+        with self._access_lock:
+            self._pending_access[key] = time.time()
+            due = (len(self._pending_access) >= self.access_flush_size
+                   or time.monotonic() - self._last_flush >= self.access_flush_interval)
+        if due:
+            try:
+                conn = self._connection()
+                self._flush_access(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ LLM 캐시 사용 시각 기록 실패: {e}")
+
+    def _flush_access(self, conn: sqlite3.Connection):
+        """모아 둔 last_access를 한 번에 UPDATE (commit은 호출자가)"""
+        with self._access_lock:
+            pending = self._pending_access
+            self._pending_access = {}
+            self._last_flush = time.monotonic()
+        if pending:
+            conn.executemany("UPDATE llm_responses SET last_access = ? WHERE key = ?",
+                             [(ts, key) for key, ts in pending.items()])
+
+    def put(self, model: str, prompt: str, response: str):
+        key = prompt_key(model, prompt)
+        now = time.time()
+        try:
+            conn = self._connection()
+            # INSERT OR REPLACE는 삭제 트리거를 건너뛰므로 upsert로 합계를 맞춤
+            conn.execute(
+                "INSERT INTO llm_responses "
+                "(key, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET model = excluded.model, "
+                "response = excluded.response, size = excluded.size, "
+                "created_at = excluded.created_at, last_access = excluded.last_access",
+                (key, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM 캐시 저장 실패: {e}")
+
+    def _totals(self, conn: sqlite3.Connection):
+        return conn.execute(
+            "SELECT bytes, entries FROM llm_response_totals WHERE id = 1"
+        ).fetchone()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """상한을 넘으면 가장 오래 사용하지 않은 항목부터 제거"""
+        total_bytes, count = self._totals(conn)
+        if total_bytes <= self.max_bytes and count <= self.max_entries:
+            return
+        # 제거 순서가 최근 적중을 반영하도록 모아 둔 사용 시각을 먼저 기록
+        self._flush_access(conn)
+        rows = conn.execute(
+            "SELECT key, size FROM llm_responses ORDER BY last_access ASC"
+        )
+        stale = []
+        for key, size in rows:
+            if total_bytes <= self.max_bytes and count <= self.max_entries:
+                break
+            stale.append((key,))
+            total_bytes -= size
+            count -= 1
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self):
+        with self._access_lock:
+            self._pending_access = {}
+        conn = self._connection()
+        conn.execute("DELETE FROM llm_responses")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            total_bytes, count = self._totals(self._connection())
+        except sqlite3.Error:
+            total_bytes, count = None, None
+        total = self.hits + self.misses
+        return {
+            "path": self.db_path,
+            "entries": count,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+        }
@@ -5,25 +5,83 @@ FastAPI 백엔드 - Maritime Navigation System API
 import os
 import sys
 import json
+import base64
+import asyncio
+import hashlib
+import time
 import traceback
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
 
 # 경로 설정
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field
+
+from scenario_store import ScenarioStore
+from situation_schema import situation_parser
+from analysis_cache import AnalysisCache
+from llm_cache import LLMResponseCache
+from metrics import REGISTRY, REQUEST_ERRORS, SEARCH_DURATION
+from circuit_breaker import CircuitBreaker, HALF_OPEN
+from response_views import (FastJSONResponse, VIEWS, parse_fields, project_analysis,
+                            cacheable_response, etag_matches, dumps)
+from knowledge_base import KnowledgeBase
+from search_index import SearchIndex, KINDS as SEARCH_KINDS, source_documents, combined_hash
 
 # RAG 엔진 임포트
 try:
-    from graph_rag_engine import GraphGuidedRAG
+    from graph_rag_engine import AsyncGraphGuidedRAG, AsyncGraphLookupCache
+    from graph_store import (AsyncInMemoryGraphStore, AsyncNeo4jGraphStore, AsyncSnapshotGraphStore,
+                             snapshot_hash)
+    from vector_index import VectorIndex, create_embedder
+    from digest import DigestStore
 except ImportError as e:
     print(f"⚠️ 모듈 임포트 실패: {e}")
-    GraphGuidedRAG = None
+    AsyncGraphGuidedRAG = None
+    AsyncGraphLookupCache = None
+    AsyncInMemoryGraphStore = None
+    AsyncNeo4jGraphStore = None
+    AsyncSnapshotGraphStore = None
+    snapshot_hash = None
+    VectorIndex = None
+    create_embedder = None
+    DigestStore = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 부팅 시 엔진 생성 + 예열: 배포 직후 첫 요청이 연결/플랜 컴파일 비용을 떠안지 않도록
+    # 검색 인덱스는 그래프 연결과 무관하므로 먼저 빌드/로드
+    try:
+        await _current_search_index()
+    except Exception as e:
+        print(f"⚠️ 검색 인덱스 준비 실패: {e}")
+    boot = asyncio.create_task(get_rag_engine())
+    try:
+        await asyncio.wait_for(asyncio.shield(boot), timeout=STARTUP_WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"⏳ 엔진 예열이 {STARTUP_WARMUP_TIMEOUT:.0f}초 안에 끝나지 않음 - 백그라운드에서 계속")
+    except Exception as e:
+        print(f"⚠️ 엔진 초기화 실패: {e}")
+
+    background = [asyncio.create_task(_probe_neo4j())]
+    if GRAPH_VERSION_POLL_SECONDS > 0:
+        background.append(asyncio.create_task(_poll_graph_version()))
+    yield
+
+    for task in background:
+        task.cancel()
+    if not boot.done():
+        boot.cancel()
+    await close_rag_engine()
 
-app = FastAPI(title="Maritime API", version="1.0.0")
+app = FastAPI(title="Maritime API", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,50 +90,276 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Accept-Encoding: gzip 협상 (스트리밍 응답은 Content-Encoding: identity로 제외)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "5"))
+)
 
 # 데이터 경로 설정
 BASE_DIR = os.path.dirname(current_dir)
 DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
 SCENARIOS_PATH = os.path.join(DATA_DIR, "demo_scenarios.json")
 
+# 시나리오는 한 번만 파싱하고 파일 변경 시에만 재적재
+scenario_store = ScenarioStore(SCENARIOS_PATH)
+SCENARIOS_PAGE_SIZE = int(os.getenv("SCENARIOS_PAGE_SIZE", "100"))
+SCENARIOS_MAX_PAGE_SIZE = int(os.getenv("SCENARIOS_MAX_PAGE_SIZE", "1000"))
+# 시나리오 파일은 바뀔 수 있으므로 기본은 매번 ETag 재검증 (max-age=0)
+SCENARIOS_CACHE_MAX_AGE = int(os.getenv("SCENARIOS_CACHE_MAX_AGE", "0"))
+
+# 규정/판례 리소스 (ETag로 클라이언트 캐시)
+# 엔진 연결 전에는 data/raw 파일로, 연결 후에는 그래프 내보내기로 구성 (_sync_graph_knowledge)
+knowledge_base = KnowledgeBase(DATA_DIR)
+_UNSYNCED = object()
+graph_knowledge_version = _UNSYNCED  # 리소스를 만든 그래프 버전
+RESOURCE_CACHE_MAX_AGE = int(os.getenv("RESOURCE_CACHE_MAX_AGE", "3600"))
+
+# 지식 검색 (BM25 역색인, 기동 시 빌드 후 디스크에 저장, 원본 변경 시 재빌드)
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(BASE_DIR, "data", "index", "search_index.json"))
+SEARCH_NGRAM = int(os.getenv("SEARCH_NGRAM", "2"))
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+search_index = None
+_search_index_lock = asyncio.Lock()
+
+# 배치 분석 설정
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# 분석 결과 캐시 (정규화된 상황 해시 → 결과)
+analysis_cache = AnalysisCache(
+    max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "300"))
+)
+GRAPH_VERSION_POLL_SECONDS = float(os.getenv("GRAPH_VERSION_POLL_SECONDS", "30"))
+
+# 시작 시 예열 설정 (미리 열어 둘 Neo4j 풀 연결 수, 부팅 대기 상한)
+NEO4J_WARM_CONNECTIONS = int(os.getenv("NEO4J_WARM_CONNECTIONS", str(BATCH_MAX_CONCURRENCY)))
+STARTUP_WARMUP_TIMEOUT = float(os.getenv("STARTUP_WARMUP_TIMEOUT", "30"))
+
+# LLM 응답 영구 캐시 (같은 호스트의 워커들이 공유, LLM_CACHE_PATH를 비우면 비활성화)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(BASE_DIR, "data", "cache", "llm_cache.sqlite3"))
+llm_cache = None
+if LLM_CACHE_PATH:
+    try:
+        llm_cache = LLMResponseCache(
+            LLM_CACHE_PATH,
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+        )
+    except Exception as e:
+        print(f"⚠️ LLM 캐시 초기화 실패 (비활성화): {e}")
+
+# 그래프 저장소 선택
+# - snapshot(기본): Neo4j 내용을 메모리 스냅샷으로 적재해 조회, 버전 마커 변경 시 교체
+# - neo4j: 요청마다 Neo4j 쿼리
+# - memory: DB 없이 data/raw JSON 또는 TTL 파일로 구성
+GRAPH_BACKENDS = ("snapshot", "neo4j", "memory")
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "snapshot").lower()
+if GRAPH_BACKEND not in GRAPH_BACKENDS:
+    raise ValueError(f"알 수 없는 GRAPH_BACKEND: {GRAPH_BACKEND} ({', '.join(GRAPH_BACKENDS)})")
+GRAPH_SOURCE = os.getenv("GRAPH_SOURCE", DATA_DIR)
+# Step 2~4 조회 방식 (combined: 단일 쿼리 왕복 1회, stepwise: 단계별 쿼리 3회)
+GRAPH_RETRIEVAL_MODE = os.getenv("GRAPH_RETRIEVAL_MODE", "combined").lower()
+
+# 하이브리드 검색: 그래프 후보를 로컬 임베딩 코사인 유사도로 재정렬
+# (엔진 그래프 내보내기로 빌드해 저장, 그래프 내용이 같으면 저장된 인덱스를 연다)
+VECTOR_RERANK = os.getenv("VECTOR_RERANK", "true").lower() != "false"
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(BASE_DIR, "data", "index"))
+VECTOR_EMBEDDER = os.getenv("VECTOR_EMBEDDER", "hashing")
+VECTOR_CANDIDATE_FACTOR = int(os.getenv("VECTOR_CANDIDATE_FACTOR", "4"))
+vector_index = None
+
+# 위험도 선별: 점수(0~1)가 기준 이상인 상위 K척만 그래프 조회/LLM 분석에 사용
+TRIAGE_TOP_K = int(os.getenv("TRIAGE_TOP_K", "5"))
+TRIAGE_THRESHOLD = float(os.getenv("TRIAGE_THRESHOLD", "0.3"))
+
+# LLM 프롬프트: 규정/판례 요약(엔진 그래프 내보내기로 생성, 그래프 내용이 바뀌면 재생성)과 추정 토큰 예산
+DIGEST_PATH = os.getenv("DIGEST_PATH", os.path.join(BASE_DIR, "data", "index", "digests.json"))
+LLM_PROMPT_BUDGET = int(os.getenv("LLM_PROMPT_BUDGET", "800"))
+digest_store = None
+
+# LLM 마이크로 배칭: 창(ms) 안에 모인 동시 분석 프롬프트를 최대 N개씩 한 요청으로 (기본 1 = 끔)
+# 묶인 요청들은 프롬프트를 공유하므로 신뢰할 수 있는 입력만 들어오는 배포에서만 켤 것
+LLM_BATCH_MAX = int(os.getenv("LLM_BATCH_MAX", "1"))
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "20"))
+
+# Neo4j 서킷 브레이커 (장애 중에는 요청마다 재연결하지 않고 즉시 실패)
+NEO4J_CONNECT_TIMEOUT = float(os.getenv("NEO4J_CONNECT_TIMEOUT", "10"))
+def _create_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=int(os.getenv("NEO4J_BREAKER_THRESHOLD", "3")),
+        base_delay=float(os.getenv("NEO4J_BREAKER_BASE_DELAY", "1")),
+        max_delay=float(os.getenv("NEO4J_BREAKER_MAX_DELAY", "60"))
+    )
+
+neo4j_breaker = _create_breaker("Neo4j")
+# snapshot 원본(버전 마커 폴링/재적재) 전용 회로: 폴링 실패가 요청 경로의 neo4j_breaker를 열지 않도록 분리
+snapshot_source_breaker = _create_breaker("Neo4j 스냅샷 원본")
+
 # RAG 엔진 관리
 rag_engine = None
 connection_error = None
+warmup_info = None
+_engine_lock = asyncio.Lock()
 
-def get_rag_engine():
+async def get_rag_engine():
     global rag_engine, connection_error
-    
-    if rag_engine is not None:
+
+    # 요청마다 Neo4j를 조회하는 neo4j 백엔드만 회로 상태로 요청을 막는다
+    # (snapshot/memory는 메모리에서 조회하므로 엔진이 있으면 Neo4j 장애 중에도 계속 서비스)
+    if rag_engine is not None and (GRAPH_BACKEND != "neo4j" or neo4j_breaker.allow()):
         return rag_engine
+    # 엔진이 없을 때는 회로가 열려 있으면 재연결을 백그라운드 프로브에 맡기고 즉시 실패
+    if not neo4j_breaker.allow():
+        return None
+
+    # 동시에 들어온 첫 요청들이 드라이버를 여러 개 만들지 않도록 직렬화
+    async with _engine_lock:
+        if not neo4j_breaker.allow():
+            return None
+        if rag_engine is not None:
+            return rag_engine
+        return await _connect_rag_engine()
+
+def _connection_error_message() -> str:
+    if not neo4j_breaker.allow():
+        retry = f"{neo4j_breaker.retry_in():.1f}초 후 재연결 시도" if neo4j_breaker.retry_in() else "재연결 확인 중"
+        return f"Neo4j 회로 차단 중 ({retry}): {neo4j_breaker.last_error or connection_error}"
+    return connection_error if connection_error else "알 수 없는 연결 오류"
+
+async def _probe_neo4j():
+    """회로가 열려 있는 동안 백오프 간격마다 1건씩 재연결을 시도"""
+    while True:
+        await asyncio.sleep(max(neo4j_breaker.retry_in(), 0.5))
+        if not neo4j_breaker.begin_probe():
+            continue
+        async with _engine_lock:
+            if rag_engine is None:
+                # 환경변수 누락처럼 예외 없이 None으로 끝난 경우도 실패로 기록해 HALF_OPEN에 머물지 않게 함
+                # (연결 예외는 _connect_rag_engine이 이미 trip으로 회로를 다시 열었음)
+                if await _connect_rag_engine() is None and neo4j_breaker.state == HALF_OPEN:
+                    neo4j_breaker.record_failure(connection_error)
+                continue
+            try:
+                await asyncio.wait_for(rag_engine.store.verify_connectivity(),
+                                       timeout=NEO4J_CONNECT_TIMEOUT)
+                neo4j_breaker.record_success()
+            except Exception as e:
+                neo4j_breaker.record_failure(e)
+
+async def _load_vector_index(data: Dict[str, Any], source_hash: str):
+    """그래프 내보내기로 벡터 인덱스를 열거나 다시 빌드 (실패하면 이전 인덱스 유지)"""
+    global vector_index
+    if not VECTOR_RERANK or VectorIndex is None:
+        return None
+    if vector_index is not None and vector_index.source_hash == source_hash:
+        return vector_index
+    try:
+        vector_index = await asyncio.to_thread(
+            VectorIndex.open_items, data["rules"], data["cases"], source_hash,
+            VECTOR_INDEX_DIR, create_embedder(VECTOR_EMBEDDER))
+    except Exception as e:
+        print(f"⚠️ 벡터 인덱스 로드 실패 (legal_weight 순위로 계속): {e}")
+    return vector_index
+
+async def _load_digests(data: Dict[str, Any], source_hash: str):
+    """그래프 내보내기로 규정/판례 요약을 열거나 다시 생성 (실패하면 이전 요약 유지)"""
+    global digest_store
+    if DigestStore is None:
+        return None
+    if digest_store is not None and digest_store.source_hash == source_hash:
+        return digest_store
+    try:
+        digest_store = await asyncio.to_thread(
+            DigestStore.open_items, data["rules"], data["cases"], source_hash, DIGEST_PATH)
+    except Exception as e:
+        print(f"⚠️ 규정/판례 요약 로드 실패 (조회 결과에서 바로 요약): {e}")
+    return digest_store
+
+def _create_snapshot_store(uri: str, user: str, password: str):
+    return AsyncSnapshotGraphStore(
+        AsyncNeo4jGraphStore(uri, user, password, breaker=snapshot_source_breaker)
+    )
+
+async def _connect_rag_engine():
+    global rag_engine, connection_error, warmup_info
 
     NEO4J_URI = os.getenv("NEO4J_URI", "")
     NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
-    print(f"🔌 Neo4j 연결 시도: URI={NEO4J_URI}, User={NEO4J_USER}")
+    store = None
+    if GRAPH_BACKEND == "memory":
+        try:
+            store = AsyncInMemoryGraphStore.from_source(GRAPH_SOURCE)
+        except Exception as e:
+            connection_error = f"인메모리 그래프 구성 실패: {e}"
+            print(f"❌ {connection_error}")
+            return None
+    else:
+        print(f"🔌 Neo4j 연결 시도: URI={NEO4J_URI}, User={NEO4J_USER}")
 
-    if not NEO4J_URI or not NEO4J_PASSWORD:
-        connection_error = "Render 환경변수(NEO4J_URI 또는 NEO4J_PASSWORD)가 설정되지 않았습니다."
-        print(f"❌ {connection_error}")
-        return None
+        if not NEO4J_URI or not NEO4J_PASSWORD:
+            connection_error = "Render 환경변수(NEO4J_URI 또는 NEO4J_PASSWORD)가 설정되지 않았습니다."
+            print(f"❌ {connection_error}")
+            return None
 
+    engine = None
     try:
-        rag_engine = GraphGuidedRAG(
+        if GRAPH_BACKEND == "snapshot":
+            store = _create_snapshot_store(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+        engine = AsyncGraphGuidedRAG(
             neo4j_uri=NEO4J_URI,
             neo4j_user=NEO4J_USER,
             neo4j_password=NEO4J_PASSWORD,
             gemini_api_key=GEMINI_API_KEY,
-            llm_model=os.getenv("LLM_MODEL", "gemini-2.5-flash")
+            llm_model=os.getenv("LLM_MODEL", "gemini-2.5-flash"),
+            result_cache=analysis_cache,
+            llm_cache=llm_cache,
+            coalesce_requests=os.getenv("COALESCE_ANALYSES", "true").lower() != "false",
+            breaker=neo4j_breaker,
+            store=store,
+            retrieval_mode=GRAPH_RETRIEVAL_MODE,
+            vector_index=vector_index,
+            candidate_factor=VECTOR_CANDIDATE_FACTOR,
+            triage_top_k=TRIAGE_TOP_K,
+            triage_threshold=TRIAGE_THRESHOLD,
+            digests=digest_store,
+            prompt_budget=LLM_PROMPT_BUDGET,
+            llm_batch_max=LLM_BATCH_MAX,
+            llm_batch_window_ms=LLM_BATCH_WINDOW_MS
         )
-        rag_engine.driver.verify_connectivity()
-        print("✅ Neo4j 연결 성공!")
+        await asyncio.wait_for(engine.store.verify_connectivity(), timeout=NEO4J_CONNECT_TIMEOUT)
+        neo4j_breaker.record_success()
+        print(f"✅ 그래프 저장소 연결 성공! ({engine.store.backend})")
+        try:
+            version = await engine.get_graph_version()
+            analysis_cache.check_graph_version(version)
+            await _sync_graph_knowledge(engine, version)
+        except Exception as e:
+            print(f"⚠️ 그래프 버전 확인 실패: {e}")
+        # 예열이 끝난 뒤에 엔진을 공개하므로 rag_engine이 있으면 곧 준비 완료 상태
+        try:
+            warmup_info = await engine.warm_up(NEO4J_WARM_CONNECTIONS)
+            print(f"🔥 엔진 예열 완료: 연결 {warmup_info['connections']}개, "
+                  f"{warmup_info['elapsed_ms']:.0f}ms")
+        except Exception as e:
+            print(f"⚠️ 엔진 예열 실패 (연결은 정상, 계속 진행): {e}")
+        rag_engine = engine
         connection_error = None
         return rag_engine
 
     except Exception as e:
+        if engine is not None:
+            await engine.close()
         rag_engine = None
-        connection_error = f"Neo4j 연결 실패: {str(e)}"
+        connection_error = f"Neo4j 연결 실패: {str(e) or type(e).__name__}"
+        neo4j_breaker.trip(connection_error)
         print(f"❌ {connection_error}")
         traceback.print_exc()
         return None
@@ -90,52 +374,267 @@ class AnalyzeResponse(BaseModel):
     analysis: Dict[str, Any]
     reasoning_steps: List[Dict[str, Any]]
 
-def load_json_file(filepath):
-    if not os.path.exists(filepath):
-        return []
+class BatchAnalyzeRequest(BaseModel):
+    items: List[AnalyzeRequest] = Field(default_factory=list)
+    max_concurrency: Optional[int] = None
+
+class BatchItemResult(BaseModel):
+    index: int
+    scenario_id: Optional[str]
+    analysis: Optional[Dict[str, Any]] = None
+    reasoning_steps: List[Dict[str, Any]] = Field(default_factory=list)
+    error: Optional[str] = None
+
+class BatchAnalyzeResponse(BaseModel):
+    results: List[BatchItemResult]
+    count: int
+    succeeded: int
+    failed: int
+    graph_lookups: Dict[str, int]
+
+async def _poll_graph_version():
+    """
+    지식 그래프 버전 마커를 주기적으로 확인해 재적재 시 분석 캐시를 비운다
+    (snapshot 저장소는 같은 확인에서 새 스냅샷으로 교체)
+    """
+    while True:
+        await asyncio.sleep(GRAPH_VERSION_POLL_SECONDS)
+        await _check_graph_version()
+
+async def _check_graph_version():
+    rag = rag_engine
+    if rag is None:
+        return
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
+        version = await rag.get_graph_version()
+        analysis_cache.check_graph_version(version)
+        await _sync_graph_knowledge(rag, version)
+    except Exception as e:
+        print(f"⚠️ 그래프 버전 확인 실패: {e}")
+
+async def _sync_graph_knowledge(engine, version):
+    """
+    그래프 버전이 바뀌었으면 엔진 저장소의 내보내기로 규정/판례 리소스, 벡터 인덱스, 요약을 다시 만든다
+    (/rules, /cases와 재정렬이 /analyze와 같은 그래프를 보도록. 실패하면 이전 것을 유지하고 다음 확인에서 재시도)
+    """
+    global graph_knowledge_version
+    if version == graph_knowledge_version:
+        return
+    try:
+        data = await engine.store.export_snapshot()
+        await asyncio.to_thread(knowledge_base.use_graph, data)
+    except Exception as e:
+        print(f"⚠️ 그래프 내보내기 실패 (이전 규정/판례 리소스 유지): {e}")
+        return
+    # 재정렬 인덱스와 프롬프트 요약도 같은 내보내기로
+    # (그래프에만 있는 규정/판례가 유사도 0이나 빈 요약이 되지 않도록)
+    source_hash = snapshot_hash(data)
+    engine.vector_index = await _load_vector_index(data, source_hash)
+    digests = await _load_digests(data, source_hash)
+    if digests is not None:
+        engine.digests = digests
+    graph_knowledge_version = version
+
+async def close_rag_engine():
+    global rag_engine
+    if rag_engine is not None:
+        await rag_engine.close()
+        rag_engine = None
 
 @app.get("/")
 async def root():
-    rag = get_rag_engine()
+    rag = await get_rag_engine()
     status = "connected" if rag else "disconnected"
     return {
         "status": status,
-        "last_error": connection_error
+        "ready": rag is not None,
+        "last_error": connection_error,
+        "circuit": neo4j_breaker.snapshot(),
+        "snapshot_circuit": snapshot_source_breaker.snapshot() if GRAPH_BACKEND == "snapshot" else None
     }
 
+@app.get("/ready")
+async def ready():
+    # 로드밸런서 readiness 프로브용: 연결을 새로 시도하지 않고 현재 상태만 보고
+    if rag_engine is None:
+        return JSONResponse(status_code=503, content={
+            "ready": False, "last_error": connection_error, "circuit": neo4j_breaker.snapshot()
+        })
+    return {"ready": True, "warmup": warmup_info, "circuit": neo4j_breaker.snapshot()}
+
+def _check_view(view: str):
+    if view not in VIEWS:
+        raise HTTPException(status_code=422, detail=f"view는 {', '.join(VIEWS)} 중 하나여야 합니다.")
+
+# 커서 = (스냅샷 내용 해시 앞부분, 목록 내 위치). 파일이 바뀌면 위치가 달라지므로 이전 커서는 거부
+_CURSOR_HASH_CHARS = 16
+
+def _encode_cursor(content_hash: str, position: int) -> str:
+    raw = f"{content_hash[:_CURSOR_HASH_CHARS]}:{position}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, content_hash: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        cursor_hash, position = raw.split(":")
+        position = int(position)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor입니다.")
+    if cursor_hash != content_hash[:_CURSOR_HASH_CHARS]:
+        raise HTTPException(status_code=409, detail="시나리오 목록이 갱신되었습니다. 처음부터 다시 조회하세요.")
+    return position
+
+def _scenario_etag(content_hash: str, *parts) -> str:
+    # 파일 내용 해시 + 요청 조건으로 계산하므로 본문을 만들기 전에 304 판단 가능
+    key = "|".join([content_hash] + [str(p) for p in parts])
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
 @app.get("/scenarios")
-async def list_scenarios():
-    scenarios = load_json_file(SCENARIOS_PATH)
-    return {"scenarios": scenarios, "count": len(scenarios)}
+async def list_scenarios(request: Request, view: str = "full",
+                         min_risk_level: Optional[float] = None,
+                         difficulty: Optional[str] = None,
+                         weather: Optional[str] = None,
+                         cursor: Optional[str] = None,
+                         limit: Optional[int] = None):
+    """
+    view=summary: 목록 표시용 필드만 (situation 등 대용량 필드 제외)
+    min_risk_level / difficulty / weather: 사전 계산된 인덱스로 필터
+    limit / cursor: 페이지 단위 조회 (cursor는 이전 응답의 next_cursor).
+        둘 다 없으면 기존처럼 전체 목록, cursor만 있으면 SCENARIOS_PAGE_SIZE
+    """
+    _check_view(view)
+    if limit is not None or cursor is not None:
+        limit = max(1, min(limit or SCENARIOS_PAGE_SIZE, SCENARIOS_MAX_PAGE_SIZE))
+    snapshot = scenario_store.snapshot()
+    etag = _scenario_etag(snapshot.content_hash, view, min_risk_level, difficulty, weather, cursor, limit)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return cacheable_response(request, b"", etag, SCENARIOS_CACHE_MAX_AGE)
+
+    after = _decode_cursor(cursor, snapshot.content_hash) if cursor else None
+    snapshot, page, next_after = scenario_store.query(
+        min_risk_level=min_risk_level, difficulty=difficulty, weather=weather,
+        after=after, limit=limit, snapshot=snapshot
+    )
+    source = snapshot.summaries if view == "summary" else snapshot.scenarios
+    scenarios = [source[position] for position in page]
+    body = dumps({
+        "scenarios": scenarios,
+        "count": len(scenarios),
+        "next_cursor": _encode_cursor(snapshot.content_hash, next_after) if next_after is not None else None
+    })
+    return cacheable_response(request, body, etag, SCENARIOS_CACHE_MAX_AGE)
 
 @app.get("/scenarios/{scenario_id}")
-async def get_scenario(scenario_id: str):
-    scenarios = load_json_file(SCENARIOS_PATH)
-    scenario = next((s for s in scenarios if s.get("scenario_id") == scenario_id), None)
+async def get_scenario(request: Request, scenario_id: str):
+    snapshot = scenario_store.snapshot()
+    scenario = snapshot.by_id.get(scenario_id)
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
-    return scenario
+    etag = _scenario_etag(snapshot.content_hash, scenario_id)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return cacheable_response(request, b"", etag, SCENARIOS_CACHE_MAX_AGE)
+    return cacheable_response(request, dumps(scenario), etag, SCENARIOS_CACHE_MAX_AGE)
+
+def _list_resource(request: Request, resources, view: str, label: str):
+    _check_view(view)
+    resource = resources.list(view)
+    if resource is None:
+        raise HTTPException(status_code=503, detail=f"{label} 데이터를 불러올 수 없습니다.")
+    return cacheable_response(request, resource.body, resource.etag, RESOURCE_CACHE_MAX_AGE)
+
+@app.get("/rules")
+async def list_rules(request: Request, view: str = "summary"):
+    return _list_resource(request, knowledge_base.rules, view, "규정")
+
+@app.get("/rules/{rule_id}")
+async def get_rule(request: Request, rule_id: str):
+    resource = knowledge_base.rules.get(rule_id)
+    if resource is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return cacheable_response(request, resource.body, resource.etag, RESOURCE_CACHE_MAX_AGE)
+
+@app.get("/cases")
+async def list_cases(request: Request, view: str = "summary"):
+    return _list_resource(request, knowledge_base.cases, view, "판례")
+
+@app.get("/cases/{case_id}")
+async def get_case(request: Request, case_id: str):
+    resource = knowledge_base.cases.get(case_id)
+    if resource is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    return cacheable_response(request, resource.body, resource.etag, RESOURCE_CACHE_MAX_AGE)
+
+async def _current_search_index():
+    """지식 베이스 파일이 바뀌었으면(해시 비교) 이벤트 루프 밖에서 인덱스를 다시 만든다"""
+    global search_index
+    rules, cases = knowledge_base.rules.snapshot(), knowledge_base.cases.snapshot()
+    expected = combined_hash(rules.content_hash, cases.content_hash)
+    if search_index is not None and search_index.source_hash == expected:
+        return search_index
+    async with _search_index_lock:
+        if search_index is None or search_index.source_hash != expected:
+            search_index = await asyncio.to_thread(
+                SearchIndex.open, SEARCH_INDEX_PATH, source_documents(rules.items, cases.items),
+                expected, SEARCH_NGRAM
+            )
+        return search_index
+
+@app.get("/search")
+async def search(q: str, kind: Optional[str] = None, offset: int = 0,
+                 limit: int = SEARCH_PAGE_SIZE):
+    """
+    규정/판례 전문 검색 (BM25, 문자 n-gram)
+    kind: rules | cases (없으면 전체)
+    offset/limit: 점수순 페이지, 다음 페이지는 next_offset
+    """
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="검색어(q)를 입력해주세요.")
+    kind = kind or None
+    if kind is not None and kind not in SEARCH_KINDS:
+        raise HTTPException(status_code=422, detail=f"kind는 {', '.join(SEARCH_KINDS)} 중 하나여야 합니다.")
+    offset = max(0, offset)
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    index = await _current_search_index()
+
+    start = time.perf_counter()
+    found = index.search(q, kind=kind, offset=offset, limit=limit)
+    elapsed = time.perf_counter() - start
+    SEARCH_DURATION.observe(elapsed)
+    return {
+        "query": q,
+        "kind": kind,
+        "total": found["total"],
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if offset + limit < found["total"] else None,
+        "results": found["results"],
+        "took_ms": round(elapsed * 1000, 3),
+        "index": index.stats()
+    }
 
 @app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_situation(request: AnalyzeRequest):
-    # 1. 시나리오 데이터 로드
+async def analyze_situation(request: AnalyzeRequest, view: str = "full", fields: Optional[str] = None):
+    """
+    view=summary: 규정/판례는 ID·제목만, 입력 상황 원본과 중복 reasoning_history 제외
+    fields: analysis에 남길 최상위 키 (쉼표 구분, 예: recommendations,analysis)
+    """
+    _check_view(view)
+    # 1. 시나리오 데이터 로드 (배치/스트림과 같은 검증)
     if request.scenario_id:
-        scenarios = load_json_file(SCENARIOS_PATH)
-        situation_data = next((s for s in scenarios if s.get("scenario_id") == request.scenario_id), None)
-    else:
+        situation_data = scenario_store.get(request.scenario_id)
+        if situation_data is None:
+            raise HTTPException(status_code=404, detail="Scenario not found")
+    elif request.situation_data is not None:
         situation_data = request.situation_data
+    else:
+        raise HTTPException(status_code=422, detail="scenario_id 또는 situation_data가 필요합니다.")
 
     # 2. RAG 엔진 로드
-    rag = get_rag_engine()
+    rag = await get_rag_engine()
     
     # 3. 연결 실패 시 에러 반환
     if not rag:
-        error_msg = connection_error if connection_error else "알 수 없는 연결 오류"
+        error_msg = _connection_error_message()
         return AnalyzeResponse(
             scenario_id=request.scenario_id,
             analysis={
@@ -156,14 +655,16 @@ async def analyze_situation(request: AnalyzeRequest):
 
     # 4. 분석 실행
     try:
-        result = rag.analyze_situation(situation_data)
-        return AnalyzeResponse(
-            scenario_id=request.scenario_id,
-            analysis=result,
-            reasoning_steps=result.get("reasoning_history", [])
-        )
+        result = await rag.analyze_situation(situation_data)
+        # 응답 모델 검증/jsonable_encoder 순회를 건너뛰고 바로 직렬화
+        return FastJSONResponse({
+            "scenario_id": request.scenario_id,
+            "analysis": project_analysis(result, view, parse_fields(fields)),
+            "reasoning_steps": result.get("reasoning_history", [])
+        })
     except Exception as e:
         # [핵심 수정] 에러 발생 시 recommendations를 빈 딕셔너리({})로 반환
+        REQUEST_ERRORS.inc(endpoint="analyze")
         print(f"Runtime Error: {e}")
         traceback.print_exc()
         return AnalyzeResponse(
@@ -175,6 +676,182 @@ async def analyze_situation(request: AnalyzeRequest):
             reasoning_steps=[{"step_name": "Runtime Error", "reasoning": str(e)}]
         )
 
+@app.post("/analyze/batch", response_model=BatchAnalyzeResponse)
+async def analyze_batch(request: BatchAnalyzeRequest, view: str = "full", fields: Optional[str] = None):
+    _check_view(view)
+    selected_fields = parse_fields(fields)
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"배치 항목은 최대 {BATCH_MAX_ITEMS}개까지 허용됩니다."
+        )
+
+    rag = await get_rag_engine()
+    if not rag:
+        error_msg = _connection_error_message()
+        raise HTTPException(status_code=503, detail=f"DB 연결 실패: {error_msg}")
+
+    concurrency = BATCH_MAX_CONCURRENCY
+    if request.max_concurrency:
+        concurrency = max(1, min(request.max_concurrency, BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # 같은 상황 유형으로 귀결되는 항목끼리 그래프 조회를 공유
+    lookup_cache = AsyncGraphLookupCache()
+
+    async def run_item(index: int, item: AnalyzeRequest) -> BatchItemResult:
+        if item.scenario_id:
+            situation_data = scenario_store.get(item.scenario_id)
+            if situation_data is None:
+                return BatchItemResult(index=index, scenario_id=item.scenario_id,
+                                       error="Scenario not found")
+        elif item.situation_data is not None:
+            situation_data = item.situation_data
+        else:
+            return BatchItemResult(index=index, scenario_id=None,
+                                   error="scenario_id 또는 situation_data가 필요합니다.")
+
+        async with semaphore:
+            try:
+                result = await rag.analyze_situation(situation_data, lookup_cache)
+            except Exception as e:
+                REQUEST_ERRORS.inc(endpoint="batch")
+                print(f"Runtime Error (batch #{index}): {e}")
+                return BatchItemResult(index=index, scenario_id=item.scenario_id,
+                                       error=str(e))
+
+        return BatchItemResult(
+            index=index,
+            scenario_id=item.scenario_id,
+            analysis=project_analysis(result, view, selected_fields),
+            reasoning_steps=result.get("reasoning_history", [])
+        )
+
+    results = await asyncio.gather(
+        *(run_item(i, item) for i, item in enumerate(request.items))
+    )
+    failed = sum(1 for r in results if r.error)
+    return BatchAnalyzeResponse(
+        results=results,
+        count=len(results),
+        succeeded=len(results) - failed,
+        failed=failed,
+        graph_lookups={"queries": lookup_cache.misses, "shared": lookup_cache.hits}
+    )
+
+def _cache_stats() -> Dict[str, Any]:
+    return {
+        "analysis": analysis_cache.stats(),
+        "llm": llm_cache.stats() if llm_cache else None,
+        "single_flight": rag_engine.single_flight.stats()
+        if rag_engine is not None and rag_engine.single_flight is not None else None,
+        "graph_snapshot": rag_engine.store.stats()
+        if rag_engine is not None and isinstance(rag_engine.store, AsyncSnapshotGraphStore) else None,
+        "vector_index": vector_index.stats() if vector_index is not None else None,
+        "situation_parser": situation_parser.stats(),
+        "digests": digest_store.stats() if digest_store is not None else None,
+        "llm_batcher": rag_engine.llm_batcher.stats()
+        if rag_engine is not None and rag_engine.llm_batcher is not None else None
+    }
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return _cache_stats()
+
+@app.post("/cache/invalidate")
+async def invalidate_cache():
+    # LLM 응답 캐시는 프롬프트 내용 주소이므로 그래프 재적재와 무관하게 유지
+    analysis_cache.invalidate()
+    return _cache_stats()
+
+def _collect_cache_metrics():
+    """스크레이프 시점의 캐시/요청 병합 카운터를 Prometheus 샘플로 변환"""
+    stats = _cache_stats()
+    caches = [("analysis", stats["analysis"])]
+    if stats["llm"] is not None:
+        caches.append(("llm", stats["llm"]))
+    yield ("hass_cache_requests_total", "counter", "Cache lookups by outcome",
+           [({"cache": name, "result": result}, s[key])
+            for name, s in caches for result, key in (("hit", "hits"), ("miss", "misses"))])
+    yield ("hass_cache_hit_ratio", "gauge", "Cache hit ratio since process start",
+           [({"cache": name}, s["hit_ratio"]) for name, s in caches])
+    yield ("hass_cache_evictions_total", "counter", "Entries evicted by size limits",
+           [({"cache": name}, s["evictions"]) for name, s in caches])
+    flight = stats["single_flight"]
+    if flight is not None:
+        yield ("hass_coalesced_requests_total", "counter",
+               "Analyses that reused an in-flight computation",
+               [({}, flight["followers"])])
+        yield ("hass_inflight_analyses", "gauge", "Analyses currently computing",
+               [({}, flight["inflight"])])
+
+REGISTRY.register_collector(_collect_cache_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(),
+                             media_type="text/plain; version=0.0.4")
+
+def _encode_stream_event(event: Dict[str, Any], fmt: str) -> str:
+    if fmt == "ndjson":
+        return json.dumps(event, ensure_ascii=False, default=str) + "\n"
+    payload = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {payload}\n\n"
+
+def _stream_format(request: Request, fmt: Optional[str]) -> str:
+    if fmt in ("sse", "ndjson"):
+        return fmt
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        return "ndjson"
+    return "sse"
+
+async def _analysis_stream(scenario_id: Optional[str], situation_data: Optional[Dict[str, Any]], fmt: str):
+    """추론 단계를 끝나는 대로 SSE/NDJSON 이벤트로 변환"""
+    if scenario_id:
+        situation_data = scenario_store.get(scenario_id)
+        if situation_data is None:
+            yield _encode_stream_event({"event": "error", "data": {"error": "Scenario not found"}}, fmt)
+            return
+    if situation_data is None:
+        yield _encode_stream_event(
+            {"event": "error", "data": {"error": "scenario_id 또는 situation_data가 필요합니다."}}, fmt
+        )
+        return
+
+    rag = await get_rag_engine()
+    if not rag:
+        error_msg = _connection_error_message()
+        yield _encode_stream_event({"event": "error", "data": {"error": f"DB 연결 실패: {error_msg}"}}, fmt)
+        return
+
+    try:
+        async for event in rag.stream_analysis(situation_data):
+            yield _encode_stream_event(event, fmt)
+    except Exception as e:
+        REQUEST_ERRORS.inc(endpoint="stream")
+        print(f"Runtime Error (stream): {e}")
+        traceback.print_exc()
+        yield _encode_stream_event({"event": "error", "data": {"error": str(e)}}, fmt)
+
+def _streaming_response(request: Request, scenario_id, situation_data, fmt) -> StreamingResponse:
+    fmt = _stream_format(request, fmt)
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        _analysis_stream(scenario_id, situation_data, fmt),
+        media_type=media_type,
+        # identity: GZip 미들웨어가 이벤트를 버퍼링하지 않도록 압축 제외
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                 "Content-Encoding": "identity"}
+    )
+
+@app.get("/analyze/stream")
+async def analyze_stream_get(request: Request, scenario_id: str, format: Optional[str] = None):
+    return _streaming_response(request, scenario_id, None, format)
+
+@app.post("/analyze/stream")
+async def analyze_stream_post(request: Request, body: AnalyzeRequest, format: Optional[str] = None):
+    return _streaming_response(request, body.scenario_id, body.situation_data, format)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
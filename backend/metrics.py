@@ -0,0 +1,192 @@
+"""
+Prometheus 텍스트 형식 메트릭 (외부 의존성 없는 최소 구현)
+단계별 지연 시간 히스토그램, 에러 카운터, 캐시 적중률을 /metrics로 노출한다.
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# 초 단위 기본 버킷 (Neo4j 수 ms ~ Gemini 수 초 범위)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """HELP/TYPE 줄 뒤에 붙는 샘플 줄 (exposition 형식)"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _render_samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(k))} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [버킷별 개수..., 합계, 전체 개수]
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def _render_samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """메트릭 모음 + 스크레이프 시점에 값을 계산하는 콜렉터"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        # 콜렉터: (이름, 타입, 설명, 샘플 목록 [(labels, value)])을 돌려주는 함수
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, list]]]] = []
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"⚠️ 메트릭 수집 실패: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(float(value))}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STEP_DURATION = REGISTRY.histogram(
+    "hass_step_duration_seconds", "Duration of each reasoning pipeline step", ["step"]
+)
+STEP_ERRORS = REGISTRY.counter(
+    "hass_step_errors_total", "Exceptions raised inside a reasoning pipeline step", ["step"]
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "hass_db_query_duration_seconds", "Neo4j round-trip time per query", ["step"]
+)
+LLM_DURATION = REGISTRY.histogram(
+    "hass_llm_duration_seconds", "Gemini call time (cache hits excluded)", ["mode"]
+)
+LLM_ERRORS = REGISTRY.counter(
+    "hass_llm_errors_total", "Failed Gemini calls", ["mode"]
+)
+ANALYSIS_DURATION = REGISTRY.histogram(
+    "hass_analysis_duration_seconds", "End-to-end pipeline time for computed analyses"
+)
+LOOKUP_CACHE = REGISTRY.counter(
+    "hass_lookup_cache_total", "Batch graph lookup cache outcomes per step", ["step", "result"]
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    "hass_request_errors_total", "Analysis requests that ended in an error", ["endpoint"]
+)
+SEARCH_DURATION = REGISTRY.histogram(
+    "hass_search_duration_seconds", "In-memory BM25 search time per /search request"
+)
+PROMPT_TOKENS = REGISTRY.histogram(
+    "hass_llm_prompt_tokens", "Estimated prompt tokens per LLM call (prompt_budget.py)",
+    buckets=(100, 200, 400, 600, 800, 1200, 1600, 2400, 3200, 6400)
+)
+LLM_BATCH_SIZE = REGISTRY.histogram(
+    "hass_llm_batch_size", "Prompts per dispatched LLM request (llm_batcher.py)",
+    buckets=(1, 2, 4, 8, 16, 32)
+)
@@ -282,6 +282,20 @@ class Neo4jMaritimeKnowledgeGraph:
             """)
             print("✅ Case-Case 관계 생성 완료")
 
+    def mark_graph_version(self):
+        """
+        지식 그래프 버전 마커 갱신
+        API 서버는 이 값이 바뀌면 분석 캐시를 무효화한다.
+        """
+        with self.driver.session() as session:
+            result = session.run("""
+                MERGE (v:GraphVersion {id: 'current'})
+                SET v.version = timestamp()
+                RETURN v.version as version
+            """)
+            version = result.single()['version']
+            print(f"✅ 그래프 버전 갱신: {version}")
+
     def verify_data(self):
         """데이터 로딩 검증"""
         with self.driver.session() as session:
@@ -384,10 +398,13 @@ def main():
         print("\n🔗 추가 관계 생성 중...")
         kg.create_additional_relationships()
 
-        # 5. 검증
+        # 5. 그래프 버전 갱신 (API 서버 캐시 무효화)
+        kg.mark_graph_version()
+
+        # 6. 검증
         kg.verify_data()
 
-        # 6. 샘플 쿼리 출력
+        # 7. 샘플 쿼리 출력
         kg.create_sample_query_patterns()
 
         print("\n✅ 모든 데이터 로딩 완료!")
@@ -0,0 +1,113 @@
+"""
+LLM 프롬프트 조립 - 토큰 예산 안에서 중요도 순으로 항목을 고른다
+자선/시계/지시문은 항상 넣고, 위험도순 타선 행 → 규정 요약 → 판례 요약 → 기타 상황 필드 순으로
+예산(추정 토큰 수)에 들어가는 항목만 담는다. 들어가지 않는 항목은 건너뛰고 더 작은 다음 항목을 시도한다.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from digest import DigestStore, estimate_tokens
+
+DEFAULT_BUDGET_TOKENS = 800
+
+INSTRUCTION = "위 상황에 대해 COLREGs 기반으로 분석하고 조치를 권고해줘. (규정/사례는 요약본)"
+
+# 기타 상황 필드에서 제외 (별도 행으로 넣는 항목)
+_CORE_KEYS = ("own_ship", "target_vessels", "visibility")
+
+
+def _join(parts: List[Any]) -> str:
+    return " ".join(str(p) for p in parts if p not in (None, ""))
+
+
+def own_ship_line(situation: Dict[str, Any], perception: Dict[str, Any]) -> str:
+    own_ship = situation.get("own_ship") or {}
+    visibility_class = perception.get("visibility_class")
+    return _join([
+        "자선", own_ship.get("type"), "침로", own_ship.get("heading"), "속력", own_ship.get("speed"),
+        "| 시계", situation.get("visibility"),
+        f"({visibility_class})" if visibility_class else None,
+    ])
+
+
+def target_line(target: Dict[str, Any], encounter: Optional[Dict[str, Any]],
+                kinematics: Optional[Dict[str, Any]], score: Optional[float]) -> str:
+    """타선 1척 = 1행 (원문 표기 + 계산된 조우/CPA/위험도)"""
+    parts = [f"- {target.get('id')}", target.get("type"), "방위", target.get("bearing"),
+             "거리", target.get("distance"), "속력", target.get("speed")]
+    if encounter is not None:
+        parts.append(f"{encounter['encounter']}/{encounter['role']}")
+    if kinematics is not None and kinematics.get("cpa_nm") is not None:
+        parts.append(f"CPA {kinematics['cpa_nm']}마일/TCPA {kinematics['tcpa_min']}분")
+    if score is not None:
+        parts.append(f"위험도 {score}")
+    parts.append(target.get("vessel_status") or target.get("action_status"))
+    return _join(parts)
+
+
+def _field_line(key: str, value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return f"- {key}: {value}"
+
+
+def assemble_prompt(situation_data: Dict[str, Any], perception: Dict[str, Any],
+                    rules: List[Dict[str, Any]], cases: List[Dict[str, Any]],
+                    digests: DigestStore,
+                    budget_tokens: int = DEFAULT_BUDGET_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    """
+    Args:
+        situation_data: 시나리오 또는 상황 데이터
+        perception: Step 1 결과 (위험도 선별된 targets/encounters/kinematics)
+        rules, cases: Step 3/4 결과 (순위순)
+        digests: 규정/판례 요약 저장소
+        budget_tokens: 프롬프트 추정 토큰 상한
+
+    Returns:
+        (프롬프트, {"tokens", "budget", "targets", "rules", "cases", "fields", "dropped"})
+    """
+    situation = situation_data.get("situation", {}) or {}
+    header = own_ship_line(situation, perception)
+    used = estimate_tokens(header) + estimate_tokens(INSTRUCTION)
+
+    targets = perception.get("targets", [])
+    encounters = perception.get("encounters") or [None] * len(targets)
+    kinematics = perception.get("kinematics") or [None] * len(targets)
+    scores = perception.get("risk_scores") or []
+    indices = perception.get("target_indices") or []
+    candidates = {
+        "targets": [target_line(t, encounters[i], kinematics[i],
+                                scores[indices[i]] if i < len(indices) else None)
+                    for i, t in enumerate(targets)],
+        "rules": ["- " + digests.rule(r)["text"] for r in rules],
+        "cases": ["- " + digests.case(c)["text"] for c in cases],
+        "fields": [_field_line(k, v) for k, v in situation.items()
+                   if k not in _CORE_KEYS and v not in (None, "", [], {})],
+    }
+
+    chosen: Dict[str, List[str]] = {section: [] for section in candidates}
+    dropped = 0
+    for section, lines in candidates.items():
+        for line in lines:
+            cost = estimate_tokens(line)
+            if used + cost > budget_tokens:
+                dropped += 1
+                continue
+            chosen[section].append(line)
+            used += cost
+
+    blocks = [f"상황: {header}"]
+    if chosen["targets"]:
+        blocks.append(f"타선 (위험도순 {len(chosen['targets'])}/{perception.get('target_count', len(targets))}척):\n"
+                      + "\n".join(chosen["targets"]))
+    if chosen["fields"]:
+        blocks.append("기타:\n" + "\n".join(chosen["fields"]))
+    if chosen["rules"]:
+        blocks.append("규정:\n" + "\n".join(chosen["rules"]))
+    if chosen["cases"]:
+        blocks.append("사례:\n" + "\n".join(chosen["cases"]))
+    blocks.append(INSTRUCTION)
+
+    stats = {"tokens": used, "budget": budget_tokens, "dropped": dropped,
+             **{section: len(lines) for section, lines in chosen.items()}}
+    return "\n\n".join(blocks), stats
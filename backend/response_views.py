@@ -0,0 +1,97 @@
+"""
+분석 응답 투영(view/fields)과 빠른 JSON 직렬화
+대시보드는 규정 전문, 판례 판결문, 입력 상황 원본을 표시하지 않으므로 summary 뷰에서는
+규정/판례를 ID 참조로 줄이고 중복 필드를 뺀다. 전문은 ID로 따로 조회한다.
+"""
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json으로 동작
+    orjson = None
+
+VIEWS = ("full", "summary")
+
+# summary 뷰에서 남기는 규정/판례 필드 (본문 텍스트 제외)
+RULE_REF_FIELDS = ("rule_id", "title", "legal_weight")
+CASE_REF_FIELDS = ("case_id", "title", "situation_type", "legal_weight")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"),
+                      default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson(없으면 공백 없는 json)으로 직렬화하는 JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _refs(items: Optional[Iterable[Dict[str, Any]]], keys) -> list:
+    return [{k: item.get(k) for k in keys if k in item} for item in items or []]
+
+
+def summarize_analysis(result: Dict[str, Any]) -> Dict[str, Any]:
+    """full 분석 결과 → summary 뷰 (원본 dict는 캐시와 공유하므로 수정하지 않음)"""
+    summary = {k: v for k, v in result.items()
+               if k not in ("situation", "reasoning_history")}
+    perception = result.get("perception")
+    if isinstance(perception, dict):
+        summary["perception"] = {k: v for k, v in perception.items() if k != "targets"}
+    if "relevant_rules" in result:
+        summary["relevant_rules"] = _refs(result["relevant_rules"], RULE_REF_FIELDS)
+    if "relevant_cases" in result:
+        summary["relevant_cases"] = _refs(result["relevant_cases"], CASE_REF_FIELDS)
+    return summary
+
+
+def parse_fields(fields: Optional[str]) -> Optional[set]:
+    if not fields:
+        return None
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    return selected or None
+
+
+def project_analysis(result: Dict[str, Any], view: str = "full",
+                     fields: Optional[set] = None) -> Dict[str, Any]:
+    """
+    Args:
+        result: 엔진이 돌려준 분석 결과
+        view: "full"(기존 응답 그대로) 또는 "summary"
+        fields: 남길 최상위 키 (None이면 전체)
+    """
+    projected = summarize_analysis(result) if view == "summary" else result
+    if fields is not None:
+        projected = {k: v for k, v in projected.items() if k in fields}
+    return projected
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 비교 (약한 비교: W/ 접두사 무시, * 허용)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cacheable_response(request: Request, body: bytes, etag: str, max_age: int) -> Response:
+    """ETag/Cache-Control을 붙인 JSON 응답, 클라이언트 사본이 최신이면 304"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
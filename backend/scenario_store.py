@@ -0,0 +1,178 @@
+"""
+시나리오 저장소 - demo_scenarios.json 인메모리 인덱스
+파일은 한 번만 파싱하고, mtime 또는 내용 해시가 바뀔 때만 다시 읽는다 (source_files.ReloadableJSON).
+상황 수치 레코드(ParsedSituation)도 적재 시점에 만들어 스냅샷에 두고 situation_parser에 pin한다.
+"""
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from analysis_cache import situation_key
+from situation_schema import ParsedSituation, build_parsed_situation, situation_parser
+from source_files import ReloadableJSON
+
+# 목록 summary 뷰 필드 (situation, yolo_detection, expected_reasoning_flow 등 대용량 필드 제외)
+SUMMARY_FIELDS = ("scenario_id", "title", "thumbnail_desc", "difficulty", "risk_level")
+
+
+@dataclass(frozen=True)
+class ScenarioSnapshot:
+    """한 시점의 시나리오 목록과 인덱스 (교체 단위, 읽기 전용)"""
+    scenarios: List[Dict[str, Any]] = field(default_factory=list)
+    by_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # 페이지네이션/필터용 위치 인덱스 (목록 내 순번, 오름차순)
+    positions_by_risk: Dict[Any, List[int]] = field(default_factory=dict)
+    positions_by_difficulty: Dict[Any, List[int]] = field(default_factory=dict)
+    positions_by_weather: Dict[Any, List[int]] = field(default_factory=dict)
+    risk_levels: List[float] = field(default_factory=list)
+    summaries: List[Dict[str, Any]] = field(default_factory=list)
+    # situation_key → 수치 레코드 (분석 첫 요청에서 문자열 파싱을 하지 않도록 적재 시점에 생성)
+    parsed: Dict[str, ParsedSituation] = field(default_factory=dict)
+    content_hash: str = ""
+
+
+def _weather(scenario: Dict[str, Any]) -> Any:
+    situation = scenario.get("situation")
+    return situation.get("weather") if isinstance(situation, dict) else None
+
+
+def _summary(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {k: scenario.get(k) for k in SUMMARY_FIELDS}
+    situation = scenario.get("situation")
+    if isinstance(situation, dict):
+        summary["weather"] = situation.get("weather")
+        summary["visibility"] = situation.get("visibility")
+        summary["target_count"] = len(situation.get("target_vessels") or [])
+    return summary
+
+
+def _build_snapshot(scenarios: List[Dict[str, Any]], content_hash: str) -> ScenarioSnapshot:
+    by_id: Dict[str, Dict[str, Any]] = {}
+    positions_by_risk: Dict[Any, List[int]] = {}
+    positions_by_difficulty: Dict[Any, List[int]] = {}
+    positions_by_weather: Dict[Any, List[int]] = {}
+    parsed: Dict[str, ParsedSituation] = {}
+
+    for position, scenario in enumerate(scenarios):
+        parsed[situation_key(scenario)] = build_parsed_situation(scenario)
+        scenario_id = scenario.get("scenario_id")
+        if scenario_id is not None:
+            by_id[scenario_id] = scenario
+        positions_by_risk.setdefault(scenario.get("risk_level"), []).append(position)
+        positions_by_difficulty.setdefault(scenario.get("difficulty"), []).append(position)
+        positions_by_weather.setdefault(_weather(scenario), []).append(position)
+
+    risk_levels = sorted(level for level in positions_by_risk
+                         if isinstance(level, (int, float)) and not isinstance(level, bool))
+
+    return ScenarioSnapshot(
+        scenarios=scenarios,
+        by_id=by_id,
+        positions_by_risk=positions_by_risk,
+        positions_by_difficulty=positions_by_difficulty,
+        positions_by_weather=positions_by_weather,
+        risk_levels=risk_levels,
+        summaries=[_summary(scenario) for scenario in scenarios],
+        parsed=parsed,
+        content_hash=content_hash,
+    )
+
+
+def _positions_from(positions: List[int], start: int) -> Iterator[int]:
+    """정렬된 위치 목록에서 start 이상인 위치만 순회 (복사 없이)"""
+    for i in range(bisect_left(positions, start), len(positions)):
+        yield positions[i]
+
+
+class ScenarioStore:
+    """시나리오 파일을 캐시하고 scenario_id 조회와 risk_level / difficulty / weather 필터(query)를 제공"""
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 시나리오 JSON 파일 경로
+        """
+        self.file_path = file_path
+        self._source = ReloadableJSON(file_path, self._build, ScenarioSnapshot(), "시나리오")
+
+    def snapshot(self) -> ScenarioSnapshot:
+        """현재 스냅샷 반환 (파일이 바뀌었으면 먼저 재적재, 파일이 없으면 빈 스냅샷)"""
+        return self._source.get()
+
+    def _build(self, scenarios: Any, content_hash: str) -> ScenarioSnapshot:
+        if not isinstance(scenarios, list):
+            scenarios = []
+        print(f"📂 시나리오 {len(scenarios)}개 적재: {self.file_path}")
+        snapshot = _build_snapshot(scenarios, content_hash)
+        # 라이브러리 전체를 공유 LRU에 넣으면 max_entries를 넘는 순간 서로 밀어내므로 별도 등록
+        situation_parser.pin(self.file_path, snapshot.parsed)
+        return snapshot
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self.snapshot().scenarios
+
+    def get(self, scenario_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().by_id.get(scenario_id)
+
+    def query(self, min_risk_level: Optional[float] = None, difficulty: Optional[str] = None,
+              weather: Optional[str] = None, after: Optional[int] = None,
+              limit: Optional[int] = None,
+              snapshot: Optional[ScenarioSnapshot] = None) -> Tuple[ScenarioSnapshot, List[int], Optional[int]]:
+        """
+        필터 + 커서 페이지네이션 (인덱스를 따라가며 한 페이지 분량만 확인)
+        커서는 목록 내 위치라 scenario_id가 없는 항목도 건너뛰지 않는다.
+
+        Args:
+            min_risk_level: risk_level 하한 (이상)
+            difficulty: 난이도 일치
+            weather: situation.weather 일치
+            after: 이 위치 다음부터 (이전 페이지 마지막 항목의 위치)
+            limit: 페이지 크기 (None이면 전체)
+            snapshot: 조회할 스냅샷 (커서를 발급/검증한 스냅샷, 없으면 현재 스냅샷)
+
+        Returns:
+            (조회한 스냅샷, 페이지 항목 위치 목록, 다음 페이지의 after 위치 또는 None)
+        """
+        snap = snapshot if snapshot is not None else self.snapshot()
+        start = 0 if after is None else after + 1
+
+        # 후보 위치 스트림: 조건별 인덱스 중 가장 작은 것을 따라가고 나머지 조건은 항목에서 확인
+        candidates = []
+        if min_risk_level is not None:
+            lists = [snap.positions_by_risk[level] for level in snap.risk_levels
+                     if level >= min_risk_level]
+            candidates.append((sum(len(l) for l in lists),
+                               lambda lists=lists: heapq.merge(*(_positions_from(l, start) for l in lists))))
+        if difficulty is not None:
+            positions = snap.positions_by_difficulty.get(difficulty, [])
+            candidates.append((len(positions), lambda p=positions: _positions_from(p, start)))
+        if weather is not None:
+            positions = snap.positions_by_weather.get(weather, [])
+            candidates.append((len(positions), lambda p=positions: _positions_from(p, start)))
+
+        if candidates:
+            stream = min(candidates, key=lambda c: c[0])[1]()
+        else:
+            stream = iter(range(start, len(snap.scenarios)))
+
+        def matches(scenario: Dict[str, Any]) -> bool:
+            if min_risk_level is not None:
+                risk_level = scenario.get("risk_level")
+                if not isinstance(risk_level, (int, float)) or risk_level < min_risk_level:
+                    return False
+            if difficulty is not None and scenario.get("difficulty") != difficulty:
+                return False
+            if weather is not None and _weather(scenario) != weather:
+                return False
+            return True
+
+        page: List[int] = []
+        for position in stream:
+            if not matches(snap.scenarios[position]):
+                continue
+            if len(page) == limit:
+                # 다음 페이지가 존재함을 확인한 경우에만 커서 발급
+                return snap, page, page[-1]
+            page.append(position)
+        return snap, page, None
@@ -0,0 +1,241 @@
+"""
+지식 검색 인덱스 - 규정/판례 본문에 대한 BM25 역색인
+형태소 분석기 없이 한국어 복합어/조사 변형에도 걸리도록 어절 내부 문자 n-gram(기본 2-gram)을
+색인어로 쓴다. 기동 시 한 번 빌드해 디스크에 저장하고, 검색은 메모리에서 postings 배열만 합산한다.
+"""
+import os
+import re
+import json
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INDEX_FORMAT = 1
+KINDS = ("rules", "cases")
+
+# 검색 대상 필드 (title은 결과 표시와 제목 일치 가중을 위해 함께 색인)
+RULE_FIELDS = ("title", "summary", "full_text")
+CASE_FIELDS = ("title", "incident_description", "analysis", "judgment", "lessons")
+
+SNIPPET_CHARS = 160
+SNIPPET_LEAD = 40
+
+_WORD = re.compile(r"\w+")
+
+
+def _lower(text: str) -> str:
+    lowered = text.lower()
+    # 하이라이트 오프셋이 원문과 맞아야 하므로 길이가 바뀌는 대소문자 변환은 쓰지 않음
+    return lowered if len(lowered) == len(text) else text
+
+
+def tokenize(text: str, n: int = 2) -> List[Tuple[str, int]]:
+    """
+    어절(\\w+) 안에서 문자 n-gram을 만든다 (n보다 짧은 어절은 그대로)
+
+    Returns:
+        (색인어, 원문 내 시작 위치) 목록
+    """
+    tokens = []
+    for match in _WORD.finditer(_lower(text or "")):
+        word, start = match.group(), match.start()
+        if len(word) <= n:
+            tokens.append((word, start))
+            continue
+        tokens.extend((word[i:i + n], start + i) for i in range(len(word) - n + 1))
+    return tokens
+
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _clean(value: Any) -> str:
+    # 원본 JSON의 들여쓰기 공백을 정리 (하이라이트 오프셋은 정리된 텍스트 기준)
+    return " ".join(str(value or "").split())
+
+
+def source_documents(rules: Iterable[Dict[str, Any]],
+                     cases: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """colregs_rules.json / kmst_cases.json 항목 → 검색 문서"""
+    docs = []
+    for rule in rules:
+        if rule.get("id") is None:
+            continue
+        docs.append({"kind": "rules", "id": str(rule["id"]), "title": rule.get("title"),
+                     "fields": {f: _clean(rule.get(f)) for f in RULE_FIELDS}})
+    for case in cases:
+        if case.get("case_id") is None:
+            continue
+        fields = {f: _clean(case.get(f)) for f in CASE_FIELDS if f != "lessons"}
+        fields["lessons"] = " / ".join(_clean(lesson) for lesson in case.get("lessons_learned") or [])
+        docs.append({"kind": "cases", "id": str(case["case_id"]), "title": case.get("title"),
+                     "fields": fields})
+    return docs
+
+
+class SearchIndex:
+    """문서 목록 + 색인어별 (문서 번호, 빈도) postings + BM25 통계"""
+
+    def __init__(self, docs: List[Dict[str, Any]], postings: Dict[str, List[List[int]]],
+                 doc_lengths: Sequence[int], source_hash: str = "", ngram: int = 2,
+                 k1: float = 1.2, b: float = 0.75):
+        self.docs = docs
+        self.ngram = ngram
+        self.k1 = k1
+        self.b = b
+        self.source_hash = source_hash
+        self._raw_postings = postings
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.avg_length = float(self.doc_lengths.mean()) if len(docs) else 0.0
+        n_docs = len(docs)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, entries in postings.items():
+            doc_ids = np.fromiter((e[0] for e in entries), dtype=np.intp, count=len(entries))
+            freqs = np.fromiter((e[1] for e in entries), dtype=np.float32, count=len(entries))
+            idf = float(np.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5)))
+            self.postings[term] = (doc_ids, freqs, idf)
+        self.kind_masks = {kind: np.array([d["kind"] == kind for d in docs], dtype=bool)
+                           for kind in KINDS}
+
+    @classmethod
+    def build(cls, docs: List[Dict[str, Any]], source_hash: str = "", ngram: int = 2) -> "SearchIndex":
+        postings: Dict[str, List[List[int]]] = {}
+        lengths = []
+        for doc_id, doc in enumerate(docs):
+            freqs: Dict[str, int] = {}
+            for text in doc["fields"].values():
+                for term, _ in tokenize(text, ngram):
+                    freqs[term] = freqs.get(term, 0) + 1
+            for term, freq in freqs.items():
+                postings.setdefault(term, []).append([doc_id, freq])
+            lengths.append(sum(freqs.values()))
+        return cls(docs, postings, lengths, source_hash, ngram)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": INDEX_FORMAT,
+                "ngram": self.ngram,
+                "source_hash": self.source_hash,
+                "docs": self.docs,
+                "doc_lengths": self.doc_lengths.astype(int).tolist(),
+                "postings": self._raw_postings,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"검색 인덱스 형식 불일치: {data.get('format')}")
+        return cls(data["docs"], data["postings"], data["doc_lengths"],
+                   data.get("source_hash", ""), data.get("ngram", 2))
+
+    @classmethod
+    def open(cls, path: str, docs: List[Dict[str, Any]], source_hash: str,
+             ngram: int = 2) -> "SearchIndex":
+        """저장된 인덱스가 같은 원본으로 만든 것이면 읽고, 아니면 다시 빌드해 저장"""
+        try:
+            index = cls.load(path)
+            if index.source_hash == source_hash and index.ngram == ngram:
+                return index
+        except (OSError, ValueError, KeyError) as e:
+            print(f"ℹ️ 검색 인덱스 재생성 ({e})")
+        index = cls.build(docs, source_hash, ngram)
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"⚠️ 검색 인덱스 저장 실패 (메모리 인덱스로 계속): {e}")
+        print(f"🔎 검색 인덱스 빌드: 문서 {len(index.docs)}개, 색인어 {len(index.postings)}개 ({path})")
+        return index
+
+    def query_terms(self, query: str) -> List[str]:
+        return list(dict.fromkeys(term for term, _ in tokenize(query, self.ngram)))
+
+    def search(self, query: str, kind: Optional[str] = None, offset: int = 0,
+               limit: int = 10) -> Dict[str, Any]:
+        """
+        Args:
+            query: 검색어
+            kind: "rules" 또는 "cases" (None이면 전체)
+            offset, limit: 점수 내림차순 결과의 페이지 범위
+
+        Returns:
+            {"total": 일치 문서 수, "results": [{kind, id, title, score, highlights}]}
+        """
+        terms = self.query_terms(query)
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term in terms:
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            doc_ids, freqs, idf = entry
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_ids] / self.avg_length)
+            scores[doc_ids] += idf * freqs * (self.k1 + 1) / (freqs + norm)
+        if kind is not None:
+            scores[~self.kind_masks[kind]] = 0
+        matched = np.flatnonzero(scores > 0)
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        page = ranked[offset:offset + limit]
+
+        term_set = set(terms)
+        results = []
+        for doc_id in page:
+            doc = self.docs[doc_id]
+            results.append({
+                "kind": doc["kind"],
+                "id": doc["id"],
+                "title": doc["title"],
+                "score": round(float(scores[doc_id]), 4),
+                "highlights": self._highlights(doc, term_set),
+            })
+        return {"total": int(len(ranked)), "results": results}
+
+    def _highlights(self, doc: Dict[str, Any], terms: set) -> List[Dict[str, Any]]:
+        """
+        필드별 스니펫과 일치 구간 (offset은 필드 원문 기준 스니펫 시작 위치,
+        spans는 스니펫 기준 [시작, 끝) 문자 위치)
+        """
+        highlights = []
+        for field, text in doc["fields"].items():
+            spans = _merge_spans([(start, start + len(term)) for term, start in tokenize(text, self.ngram)
+                                  if term in terms])
+            if not spans:
+                continue
+            if field == "title" or len(text) <= SNIPPET_CHARS:
+                start, end = 0, len(text)
+            else:
+                start = max(0, min(spans[0][0] - SNIPPET_LEAD, len(text) - SNIPPET_CHARS))
+                end = start + SNIPPET_CHARS
+            highlights.append({
+                "field": field,
+                "offset": start,
+                "text": text[start:end],
+                "spans": [[max(s, start) - start, min(e, end) - start]
+                          for s, e in spans if s < end and e > start],
+                "matches": len(spans),
+            })
+        return highlights
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self.docs),
+            "terms": len(self.postings),
+            **{kind: int(self.kind_masks[kind].sum()) for kind in KINDS},
+        }
+
+
+def combined_hash(*content_hashes: str) -> str:
+    """원본 파일 해시들 → 인덱스 원본 식별자"""
+    return hashlib.sha256("\0".join(content_hashes).encode("utf-8")).hexdigest()
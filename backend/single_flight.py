@@ -0,0 +1,102 @@
+"""
+Single-flight 요청 병합
+같은 키의 작업이 이미 진행 중이면 새로 실행하지 않고 그 결과를 함께 기다린다.
+위험 상황 발생 시 여러 대시보드가 동시에 같은 분석을 요청해도 실제 작업은 키당 1회로 제한된다.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """스레드 기반 single-flight (동기 엔진용)"""
+
+    def __init__(self):
+        self._inflight: Dict[str, "_Call"] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Args:
+            key: 병합 기준 키
+            fn: 실제 작업
+
+        Returns:
+            (결과, 다른 호출의 결과를 공유했는지 여부)
+        """
+        with self._lock:
+            call = self._inflight.get(key)
+            if call is not None:
+                self.followers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._inflight[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "leaders": self.leaders,
+                "followers": self.followers}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class AsyncSingleFlight:
+    """asyncio 기반 single-flight (비동기 엔진용)"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.followers += 1
+        else:
+            # 작업은 별도 태스크로 실행: 처음 요청한 클라이언트가 끊겨도
+            # 기다리는 다른 요청들은 결과를 받는다
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._release(k, _t))
+            self.leaders += 1
+        return await asyncio.shield(task), shared
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 기다리는 쪽이 없을 때 "exception was never retrieved" 경고 방지
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "leaders": self.leaders,
+                "followers": self.followers}
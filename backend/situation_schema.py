@@ -0,0 +1,330 @@
+"""
+상황 데이터 스키마 - 자유 형식 문자열 필드를 단위가 통일된 수치 레코드로 변환
+"12노트", "0.5마일", "045°", "3분", "50미터 (농무)" 같은 값을 노트/해리/도/초와
+시계 등급(enum)으로 한 번만 파싱한다. 단위가 없는 값은 필드별 기본 단위(TCPA는 분)로 보고,
+모르는 단위는 NaN으로 두고 unit_warnings에 기록한다. 결과는 상황 해시(situation_key)별로 메모이즈되어
+같은 시나리오의 반복 분석에서는 문자열 처리 없이 배열만 재사용한다.
+타선 값은 타선별 배열(struct of arrays)로 보관해 encounter/kinematics/triage가 바로 벡터 연산한다.
+"""
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analysis_cache import situation_key
+
+NM_PER_METER = 1 / 1852.0
+
+_QUANTITY = re.compile(r"(-?\d+(?:\.\d+)?)\s*([^\d\s(),;]*)")
+
+# 단위 표기 → 기준 단위(노트/해리/도/초) 배율
+SPEED_UNITS = {"노트": 1.0, "kn": 1.0, "kt": 1.0, "kts": 1.0, "knot": 1.0, "knots": 1.0,
+               "km/h": 1 / 1.852, "kmh": 1 / 1.852, "m/s": 3600 / 1852.0}
+DISTANCE_UNITS = {"마일": 1.0, "해리": 1.0, "nm": 1.0, "mile": 1.0, "miles": 1.0, "nmi": 1.0,
+                  "케이블": 0.1, "cable": 0.1, "cables": 0.1,
+                  "미터": NM_PER_METER, "m": NM_PER_METER, "km": 1000 * NM_PER_METER,
+                  "킬로미터": 1000 * NM_PER_METER}
+ANGLE_UNITS = {"°": 1.0, "도": 1.0, "deg": 1.0, "degree": 1.0, "degrees": 1.0}
+DURATION_UNITS = {"초": 1.0, "s": 1.0, "sec": 1.0, "분": 60.0, "min": 60.0, "mins": 60.0,
+                  "minute": 60.0, "minutes": 60.0, "m": 60.0,
+                  "시간": 3600.0, "h": 3600.0, "hr": 3600.0}
+
+
+class VisibilityClass(str, Enum):
+    """시계 등급 (해리 기준 경계는 VISIBILITY_BOUNDS)"""
+    DENSE_FOG = "dense_fog"
+    FOG = "fog"
+    POOR = "poor"
+    MODERATE = "moderate"
+    GOOD = "good"
+    UNKNOWN = "unknown"
+
+    @property
+    def restricted(self) -> bool:
+        """Rule 19 시계 제한 상태로 볼지"""
+        return self in (VisibilityClass.DENSE_FOG, VisibilityClass.FOG, VisibilityClass.POOR)
+
+
+# (상한 해리, 등급) - 오름차순
+VISIBILITY_BOUNDS = ((0.1, VisibilityClass.DENSE_FOG), (0.5, VisibilityClass.FOG),
+                     (2.0, VisibilityClass.POOR), (5.0, VisibilityClass.MODERATE))
+# 기상 표현 → 등급 (거리 등급과 비교해 더 나쁜 쪽을 쓴다)
+VISIBILITY_KEYWORDS = (("농무", VisibilityClass.DENSE_FOG), ("안개", VisibilityClass.FOG),
+                       ("폭우", VisibilityClass.POOR), ("눈", VisibilityClass.POOR),
+                       ("모래폭풍", VisibilityClass.POOR), ("맑음", VisibilityClass.GOOD))
+# 나쁜 순서 (UNKNOWN은 다른 정보가 있으면 항상 밀림)
+_SEVERITY = [c for _, c in VISIBILITY_BOUNDS] + [VisibilityClass.GOOD, VisibilityClass.UNKNOWN]
+
+# 상황 데이터에 명시된 타선 위치(relative_position) 표현 → 위치 코드
+POSITION_KEYWORDS = (("우현", "starboard"), ("starboard", "starboard"),
+                     ("좌현", "port"), ("port", "port"),
+                     ("정선수", "ahead"), ("정면", "ahead"), ("ahead", "ahead"),
+                     ("선미", "astern"), ("후방", "astern"), ("astern", "astern"))
+# 역할(role) 표현 → 역할 코드 (encounter.GIVE_WAY / STAND_ON과 같은 값)
+ROLE_KEYWORDS = (("피항선", "give_way"), ("give-way", "give_way"), ("give_way", "give_way"),
+                 ("유지선", "stand_on"), ("stand-on", "stand_on"), ("stand_on", "stand_on"))
+_OPPOSITE_ROLE = {"give_way": "stand_on", "stand_on": "give_way"}
+
+
+def _unit_parser(units: Dict[str, float], default_unit: str):
+    """
+    units 표기를 기준 단위로 환산하는 파서
+    숫자만 있는 값(3, "3")은 default_unit으로 보고, 모르는 단위는 ValueError
+    """
+    default_scale = units[default_unit]
+
+    # 같은 표기("12노트", "045°")가 반복되므로 문자열 단위로 캐시 (ValueError는 캐시되지 않음)
+    @lru_cache(maxsize=4096)
+    def parse_text(text: str) -> float:
+        match = _QUANTITY.search(text)
+        if match is None:
+            return float("nan")
+        unit = match.group(2).lower().rstrip(".")
+        if unit and unit not in units:
+            raise ValueError(f"알 수 없는 단위: {text!r}")
+        return float(match.group(1)) * (units[unit] if unit else default_scale)
+
+    def parse(value: Any) -> float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value) * default_scale
+        return float("nan") if value is None else parse_text(str(value))
+
+    return parse
+
+
+_speed = _unit_parser(SPEED_UNITS, "노트")
+_distance = _unit_parser(DISTANCE_UNITS, "마일")
+_angle = _unit_parser(ANGLE_UNITS, "°")
+_duration = _unit_parser(DURATION_UNITS, "분")
+
+
+def parse_speed(value: Any) -> float:
+    """노트 (단위가 없으면 노트)"""
+    return _speed(value)
+
+
+def parse_distance(value: Any) -> float:
+    """해리 (단위가 없으면 해리)"""
+    return _distance(value)
+
+
+def parse_angle(value: Any) -> float:
+    """도 (0~360, 숫자가 없으면 NaN)"""
+    return _angle(value) % 360.0
+
+
+def parse_duration(value: Any) -> float:
+    """초 (단위가 없으면 분: TCPA는 분 단위로 보고됨)"""
+    return _duration(value)
+
+
+def parse_visibility(value: Any) -> Tuple[float, VisibilityClass]:
+    """
+    시계 → (해리, 등급)
+    거리 표기와 기상 표현("50미터 (농무)")이 함께 있으면 더 나쁜 쪽 등급을 쓴다.
+    """
+    distance = parse_distance(value)
+    return distance, _combined_visibility_class(distance, value)
+
+
+def _combined_visibility_class(distance_nm: float, value: Any) -> VisibilityClass:
+    text = str(value or "")
+    candidates = [_visibility_class(distance_nm)]
+    candidates += [c for keyword, c in VISIBILITY_KEYWORDS if keyword in text]
+    return min(candidates, key=_SEVERITY.index)
+
+
+def _keyword_code(value: Any, keywords) -> str:
+    text = str(value or "").lower()
+    return next((code for keyword, code in keywords if keyword in text), "")
+
+
+def parse_relative_position(value: Any) -> str:
+    """"우현 (Starboard)" → "starboard" (starboard/port/ahead/astern, 없으면 "")"""
+    return _keyword_code(value, POSITION_KEYWORDS)
+
+
+def parse_role(value: Any) -> str:
+    """"유지선 (Stand-on)" → "stand_on" (give_way/stand_on, 없으면 "")"""
+    return _keyword_code(value, ROLE_KEYWORDS)
+
+
+def _own_role(own_ship: Dict[str, Any], target: Dict[str, Any]) -> str:
+    # 자선 역할이 명시되어 있으면 우선, 없으면 타선 역할의 반대
+    own = parse_role(own_ship.get("role"))
+    return own or _OPPOSITE_ROLE.get(parse_role(target.get("role")), "")
+
+
+def _visibility_class(distance_nm: float) -> VisibilityClass:
+    if np.isnan(distance_nm):
+        return VisibilityClass.UNKNOWN
+    for bound, visibility_class in VISIBILITY_BOUNDS:
+        if distance_nm < bound:
+            return visibility_class
+    return VisibilityClass.GOOD
+
+
+def _target_course(target: Dict[str, Any]) -> Any:
+    for key in ("course", "cog", "heading"):
+        if target.get(key) is not None:
+            return target[key]
+    return None
+
+
+def _shows_both_sidelights(target: Dict[str, Any]) -> bool:
+    lights = str(target.get("lights_visible") or "").lower()
+    return ("홍등" in lights or "red" in lights) and ("녹등" in lights or "green" in lights)
+
+
+def _infer_course(target: Dict[str, Any], bearing: float, course: float) -> float:
+    """
+    타선 침로 (도)
+    침로가 없어도 양 현등이 함께 보이면(Rule 14(b)) 타선 선수가 자선을 향한 것으로 본다.
+    """
+    if np.isnan(course) and _shows_both_sidelights(target):
+        return (bearing + 180.0) % 360.0
+    return course
+
+
+def _readonly(values) -> np.ndarray:
+    array = np.array(values, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class ParsedSituation:
+    """
+    situation_data를 파싱한 수치 레코드 (읽기 전용, 여러 요청이 공유)
+    타선 배열은 모두 target_vessels 순서의 shape (N,)이며 값이 없으면 NaN
+    """
+    visibility_nm: float
+    visibility_class: VisibilityClass
+    own_heading_deg: float
+    own_speed_kn: float
+    target_ids: Tuple[Any, ...]
+    target_types: Tuple[str, ...]
+    bearing_deg: np.ndarray
+    distance_nm: np.ndarray
+    course_deg: np.ndarray
+    speed_kn: np.ndarray
+    reported_cpa_nm: np.ndarray     # 센서(ARPA 등)가 보고한 값
+    reported_tcpa_s: np.ndarray
+    reported_positions: Tuple[str, ...]     # parse_relative_position 코드 ("" = 명시 없음)
+    reported_roles: Tuple[str, ...]         # 타선별 자선 역할 (parse_role 코드)
+    unit_warnings: Tuple[str, ...]          # 단위를 알 수 없어 NaN으로 둔 필드 ("target_001.tcpa='3 fortnights'")
+
+    def __len__(self) -> int:
+        return len(self.target_ids)
+
+
+def build_parsed_situation(situation_data: Dict[str, Any]) -> ParsedSituation:
+    situation = (situation_data or {}).get("situation") or {}
+    own_ship = situation.get("own_ship") or {}
+    targets = situation.get("target_vessels") or []
+    warnings: List[str] = []
+
+    def field(parse, value: Any, name: str) -> float:
+        try:
+            return parse(value)
+        except ValueError:
+            warnings.append(f"{name}={value!r}")
+            return float("nan")
+
+    def target_values(parse, key: str) -> List[float]:
+        return [field(parse, t.get(key), f"{t.get('id')}.{key}") for t in targets]
+
+    visibility = situation.get("visibility")
+    visibility_nm = field(parse_distance, visibility, "visibility")
+    bearings = target_values(parse_angle, "bearing")
+    courses = [field(parse_angle, _target_course(t), f"{t.get('id')}.course") for t in targets]
+    return ParsedSituation(
+        visibility_nm=visibility_nm,
+        visibility_class=_combined_visibility_class(visibility_nm, visibility),
+        own_heading_deg=field(parse_angle, own_ship.get("heading"), "own_ship.heading"),
+        own_speed_kn=field(parse_speed, own_ship.get("speed"), "own_ship.speed"),
+        target_ids=tuple(t.get("id") for t in targets),
+        target_types=tuple(str(t.get("type") or "") for t in targets),
+        bearing_deg=_readonly(bearings),
+        distance_nm=_readonly(target_values(parse_distance, "distance")),
+        course_deg=_readonly([_infer_course(t, b, c) for t, b, c in zip(targets, bearings, courses)]),
+        speed_kn=_readonly(target_values(parse_speed, "speed")),
+        reported_cpa_nm=_readonly(target_values(parse_distance, "cpa")),
+        reported_tcpa_s=_readonly(target_values(parse_duration, "tcpa")),
+        reported_positions=tuple(parse_relative_position(t.get("relative_position")) for t in targets),
+        reported_roles=tuple(_own_role(own_ship, t) for t in targets),
+        unit_warnings=tuple(warnings),
+    )
+
+
+class SituationParser:
+    """
+    상황 해시별 ParsedSituation 메모 (LRU)
+    시나리오 라이브러리처럼 적재 시점에 통째로 파싱한 레코드는 pin()으로 따로 등록해
+    LRU 용량을 쓰지 않는다 (라이브러리가 max_entries보다 커도 요청 시점 파싱이 다시 생기지 않음).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ParsedSituation]" = OrderedDict()
+        self._pinned: Dict[str, Dict[str, ParsedSituation]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def pin(self, name: str, records: Dict[str, ParsedSituation]):
+        """
+        이름 단위로 미리 파싱한 레코드 집합을 교체
+
+        Args:
+            name: 레코드 집합 이름 (예: 시나리오 파일 경로)
+            records: situation_key → ParsedSituation (호출 측 스냅샷의 dict를 그대로 참조)
+        """
+        with self._lock:
+            self._pinned[name] = records
+
+    def parse(self, situation_data: Dict[str, Any], key: Optional[str] = None) -> ParsedSituation:
+        """
+        Args:
+            situation_data: 시나리오 또는 상황 데이터
+            key: situation_key(situation_data) (호출 측에서 이미 계산했으면 전달)
+        """
+        if key is None:
+            key = situation_key(situation_data)
+        with self._lock:
+            for records in self._pinned.values():
+                parsed = records.get(key)
+                if parsed is not None:
+                    self.hits += 1
+                    return parsed
+            parsed = self._entries.get(key)
+            if parsed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return parsed
+        parsed = build_parsed_situation(situation_data)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = parsed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "pinned": sum(len(records) for records in self._pinned.values()),
+                    "hits": self.hits, "misses": self.misses}
+
+
+situation_parser = SituationParser()
+
+
+def parse_situation(situation_data: Dict[str, Any], key: Optional[str] = None) -> ParsedSituation:
+    return situation_parser.parse(situation_data, key)
@@ -0,0 +1,96 @@
+"""
+원본 데이터 파일 - data/raw JSON 읽기를 한 곳에서 처리
+read_sources: 규정(colregs_rules.json)과 판례(kmst_cases.json)를 읽고, 파생 인덱스(그래프/벡터/요약)가
+원본 변경을 알아챌 수 있도록 두 파일 바이트의 해시를 함께 돌려준다.
+ReloadableJSON: 서버가 요청마다 보는 파일(시나리오, 규정/판례 리소스)을 바뀐 경우에만 다시 읽는다.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+RULES_FILE = "colregs_rules.json"
+CASES_FILE = "kmst_cases.json"
+
+T = TypeVar("T")
+
+
+def read_sources(data_dir: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], str]:
+    """
+    Returns:
+        (규정 목록, 판례 목록, 원본 해시)
+    """
+    with open(os.path.join(data_dir, RULES_FILE), 'rb') as f:
+        rules_raw = f.read()
+    with open(os.path.join(data_dir, CASES_FILE), 'rb') as f:
+        cases_raw = f.read()
+    source_hash = hashlib.sha256(rules_raw + b"\0" + cases_raw).hexdigest()
+    return json.loads(rules_raw), json.loads(cases_raw), source_hash
+
+
+class ReloadableJSON(Generic[T]):
+    """
+    JSON 파일 하나와 그 파일로 만든 스냅샷 (build(파싱 결과, 내용 해시) → 스냅샷)
+    mtime/크기가 바뀌었을 때만 파일을 읽고, 내용 해시까지 같으면(touch 등) 다시 만들지 않는다.
+    - 파일이 없으면: empty로 비운다 (삭제된 데이터를 계속 제공하지 않음)
+    - 읽기/파싱 실패(쓰는 도중의 파일 등): 기존 스냅샷 유지, 다음 조회에서 다시 시도
+    """
+
+    def __init__(self, file_path: str, build: Callable[[Any, str], T], empty: T, label: str):
+        """
+        Args:
+            file_path: JSON 파일 경로
+            build: (파싱된 JSON, sha256 hex) → 스냅샷
+            empty: 파일이 없을 때의 스냅샷
+            label: 로그용 이름
+        """
+        self.file_path = file_path
+        self._build = build
+        self._empty = empty
+        self._label = label
+        self._value = empty
+        self._stamp: Optional[Tuple[int, int]] = None  # 현재 스냅샷을 만든 파일의 (mtime_ns, size)
+        self._content_hash = ""
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.file_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def get(self) -> T:
+        """현재 스냅샷 (파일이 바뀌었으면 먼저 재적재)"""
+        stat = self._stat()
+        if stat == self._stamp:
+            return self._value
+        with self._lock:
+            # 다른 스레드가 이미 재적재했을 수 있음
+            if stat is None:
+                if self._stamp is not None:
+                    print(f"⚠️ {self._label} 파일 없음 (데이터 비움): {self.file_path}")
+                self._value, self._stamp, self._content_hash = self._empty, None, ""
+            elif stat != self._stamp:
+                self._reload()
+            return self._value
+
+    def _reload(self):
+        try:
+            with open(self.file_path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                raw = f.read()
+        except OSError:
+            return
+
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if content_hash != self._content_hash:
+            try:
+                data = json.loads(raw.decode('utf-8'))
+            except (ValueError, UnicodeDecodeError) as e:
+                print(f"⚠️ {self._label} 파일 파싱 실패 (기존 데이터 유지): {self.file_path}: {e}")
+                return
+            self._value = self._build(data, content_hash)
+            self._content_hash = content_hash
+        self._stamp = (st.st_mtime_ns, st.st_size)
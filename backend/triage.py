@@ -0,0 +1,112 @@
+"""
+타선 위험도 선별 (triage)
+CPA/TCPA, 접근 속력, 시계, 선종으로 타선별 충돌 위험 점수(0~1)를 계산하고,
+기준 점수 이상인 상위 k척만 그래프 조회와 LLM 분석으로 넘긴다.
+교통이 밀집해도 분석 1회의 비용이 타선 수에 비례해 늘지 않도록 하기 위함이다.
+"""
+from functools import lru_cache
+from typing import Any, Dict
+
+import numpy as np
+
+from situation_schema import ParsedSituation, VisibilityClass
+
+DEFAULT_TOP_K = 5
+DEFAULT_THRESHOLD = 0.3
+
+# 점수가 0이 되는 거리/시간/속력 (이보다 가까울수록 위험)
+CPA_SCALE_NM = 2.0
+TCPA_SCALE_MIN = 30.0
+CLOSING_SCALE_KN = 30.0
+# CPA를 모르는 타선은 현재 거리로 대신 판단 (레이더 경계 범위)
+RANGE_SCALE_NM = 6.0
+# 값을 모르는 항목은 중간 위험으로 본다 (Rule 7(c): 불충분한 정보로 위험이 없다고 추정하지 않음)
+UNKNOWN_TERM = 0.5
+# Rule 7 기준(CPA 0.5해리/TCPA 6분)에 걸린 타선의 최소 점수
+RULE7_FLOOR = 0.8
+
+WEIGHTS = {"cpa": 0.5, "tcpa": 0.3, "closing": 0.2}
+
+RESTRICTED_VISIBILITY_FACTOR = 1.3
+
+# 선종 가중치 (조종 제한/인명 피해/레이더 탐지 취약)
+VESSEL_TYPE_FACTORS = {
+    "여객선": 1.3,
+    "탱커": 1.3,
+    "어선": 1.2,
+    "소형": 1.2,
+    "예인": 1.15,
+}
+
+
+def visibility_factor(visibility_class: VisibilityClass) -> float:
+    """시계 제한(Rule 19)이면 가중"""
+    return RESTRICTED_VISIBILITY_FACTOR if visibility_class.restricted else 1.0
+
+
+@lru_cache(maxsize=1024)
+def vessel_type_factor(vessel_type: str) -> float:
+    return max([f for name, f in VESSEL_TYPE_FACTORS.items() if name in vessel_type], default=1.0)
+
+
+def _closeness(values: np.ndarray, scale: float) -> np.ndarray:
+    return np.clip(1.0 - values / scale, 0.0, 1.0)
+
+
+def risk_scores(cpa_nm: np.ndarray, tcpa_min: np.ndarray, range_rate_kn: np.ndarray,
+                distances_nm: np.ndarray, rule7_risk: np.ndarray, type_factors: np.ndarray,
+                vis_factor: float = 1.0) -> np.ndarray:
+    """
+    타선별 충돌 위험 점수 (모든 입력 shape (N,), 모르는 값은 NaN)
+
+    Returns:
+        0~1 점수 배열
+    """
+    cpa_nm, tcpa_min, range_rate_kn, distances_nm = (
+        np.asarray(a, dtype=np.float64) for a in (cpa_nm, tcpa_min, range_rate_kn, distances_nm))
+
+    cpa_term = np.where(np.isnan(cpa_nm),
+                        np.where(np.isnan(distances_nm), UNKNOWN_TERM,
+                                 _closeness(np.nan_to_num(distances_nm), RANGE_SCALE_NM)),
+                        _closeness(np.nan_to_num(cpa_nm), CPA_SCALE_NM))
+    # 이미 CPA를 지난 타선(TCPA < 0)은 시간 항목 0
+    tcpa_term = np.where(np.isnan(tcpa_min), UNKNOWN_TERM,
+                         np.where(tcpa_min < 0, 0.0, _closeness(np.nan_to_num(tcpa_min), TCPA_SCALE_MIN)))
+    closing_term = np.where(np.isnan(range_rate_kn), UNKNOWN_TERM,
+                            np.clip(-np.nan_to_num(range_rate_kn) / CLOSING_SCALE_KN, 0.0, 1.0))
+
+    base = (WEIGHTS["cpa"] * cpa_term + WEIGHTS["tcpa"] * tcpa_term
+            + WEIGHTS["closing"] * closing_term)
+    scores = np.clip(base * np.asarray(type_factors, dtype=np.float64) * vis_factor, 0.0, 1.0)
+    return np.where(np.asarray(rule7_risk, dtype=bool), np.maximum(scores, RULE7_FLOOR), scores)
+
+
+def select_targets(scores: np.ndarray, top_k: int, threshold: float) -> np.ndarray:
+    """기준 이상 타선 중 점수 상위 top_k의 인덱스 (점수 내림차순, 동점은 원래 순서)"""
+    candidates = np.flatnonzero(scores >= threshold)
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return order[:max(0, top_k)]
+
+
+def triage_targets(parsed: ParsedSituation, kinematics: Dict[str, np.ndarray],
+                   top_k: int = DEFAULT_TOP_K, threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """
+    Args:
+        parsed: situation_schema.ParsedSituation
+        kinematics: kinematics.situation_kinematics 결과 (같은 타선 순서의 배열)
+
+    Returns:
+        {"scores": 타선 순서의 점수 목록, "selected": 선별된 타선 인덱스(점수순), ...}
+    """
+    scores = risk_scores(
+        kinematics["cpa_nm"], kinematics["tcpa_min"], kinematics["range_rate_kn"],
+        parsed.distance_nm, kinematics["risk"],
+        np.array([vessel_type_factor(t) for t in parsed.target_types], dtype=np.float64),
+        visibility_factor(parsed.visibility_class),
+    )
+    return {
+        "scores": np.round(scores, 3).tolist(),
+        "selected": select_targets(scores, top_k, threshold).tolist(),
+        "top_k": top_k,
+        "threshold": threshold,
+    }
@@ -0,0 +1,244 @@
+"""
+규정/판례 벡터 인덱스 - 그래프가 좁힌 후보를 상황 임베딩과의 코사인 유사도로 재정렬
+(README의 "Graph Search 1차 → 좁혀진 범위에서 Vector Search 2차")
+
+규정/판례 텍스트 임베딩을 L2 정규화된 float32 행렬로 미리 계산해 .npy로 저장하고,
+서버는 np.load(mmap_mode='r')로 열어 요청마다 후보 행만 모아 내적한다.
+임베더는 교체 가능하며 기본값은 네트워크 호출 없는 로컬 해싱 임베더다.
+
+빌드:
+    python backend/vector_index.py --data-dir data/raw --out data/index
+"""
+import os
+import sys
+import json
+import zlib
+import argparse
+import importlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from source_files import read_sources
+
+KINDS = ("rules", "cases")
+META_FILE = "meta.json"
+
+
+class HashingEmbedder:
+    """
+    문자 n-gram 해싱 임베더 (feature hashing, 부호 있는 해시)
+    형태소 분석기 없이 한국어 복합어/조사 변형에도 부분 일치가 잡히고,
+    학습/다운로드가 필요 없어 선박 탑재 환경에서도 같은 벡터를 만든다.
+    """
+
+    def __init__(self, dim: int = 1024, ngrams: Sequence[int] = (2, 3)):
+        """
+        Args:
+            dim: 벡터 차원
+            ngrams: 사용할 문자 n-gram 길이
+        """
+        self.dim = int(dim)
+        self.ngrams = tuple(ngrams)
+        self.name = f"hashing-{self.dim}-{'-'.join(map(str, self.ngrams))}"
+
+    def _features(self, text: str) -> np.ndarray:
+        text = " " + " ".join(str(text or "").lower().split()) + " "
+        grams = [text[i:i + n] for n in self.ngrams for i in range(len(text) - n + 1)]
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams),
+                           dtype=np.uint64, count=len(grams))
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32, 각 행은 L2 정규화 (빈 텍스트는 0벡터)"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = self._features(text)
+            if hashes.size == 0:
+                continue
+            signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+            np.add.at(matrix[row], (hashes % self.dim).astype(np.intp), signs)
+        return normalize(matrix)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+EMBEDDERS = {"hashing": HashingEmbedder}
+
+
+def create_embedder(spec: str = "hashing"):
+    """
+    임베더 생성
+
+    Args:
+        spec: "hashing", "hashing:512"(차원 지정) 또는 "package.module:factory"
+              (factory()는 name, dim 속성과 embed(texts) -> ndarray 메서드를 가진 객체를 반환)
+    """
+    name, _, arg = spec.partition(":")
+    if name in EMBEDDERS:
+        return EMBEDDERS[name](int(arg)) if arg else EMBEDDERS[name]()
+    if not arg:
+        raise ValueError(f"알 수 없는 임베더: {spec}")
+    return getattr(importlib.import_module(name), arg)()
+
+
+def rule_text(rule: Dict[str, Any]) -> str:
+    # neo4j_loader.py의 임베딩 텍스트(제목 + 요약 + 전문)에 적용 상황을 더함
+    return "\n".join(filter(None, [
+        rule.get("title"), rule.get("summary"), rule.get("full_text"),
+        " ".join(rule.get("trigger_situations") or []),
+    ]))
+
+
+def case_text(case: Dict[str, Any]) -> str:
+    return "\n".join(filter(None, [
+        case.get("title"), case.get("situation_type"), case.get("incident_description"),
+        case.get("analysis"), " ".join(case.get("lessons_learned") or []),
+    ]))
+
+
+class VectorIndex:
+    """종류(rules/cases)별 id 목록 + 정규화된 임베딩 행렬"""
+
+    def __init__(self, embedder, matrices: Dict[str, np.ndarray], ids: Dict[str, List[str]],
+                 source_hash: str = ""):
+        self.embedder = embedder
+        self.matrices = matrices
+        self.ids = ids
+        self.rows = {kind: {item_id: row for row, item_id in enumerate(ids[kind])} for kind in ids}
+        self.source_hash = source_hash
+
+    @classmethod
+    def build(cls, data_dir: str, embedder) -> "VectorIndex":
+        """data/raw의 규정/판례 JSON으로 인덱스 구성 (메모리)"""
+        return cls.build_items(*read_sources(data_dir), embedder)
+
+    @classmethod
+    def build_items(cls, rules: List[Dict[str, Any]], cases: List[Dict[str, Any]],
+                    source_hash: str, embedder) -> "VectorIndex":
+        """
+        규정/판례 목록으로 인덱스 구성 (메모리)
+
+        Args:
+            rules, cases: data/raw JSON 또는 GraphStore.export_snapshot()과 같은 필드의 목록
+            source_hash: 목록 내용 해시 (저장된 인덱스 재사용 판단 기준)
+        """
+        rules = [r for r in rules if r.get("id") is not None]
+        cases = [c for c in cases if c.get("case_id") is not None]
+        matrices = {
+            "rules": np.ascontiguousarray(embedder.embed([rule_text(r) for r in rules]), dtype=np.float32),
+            "cases": np.ascontiguousarray(embedder.embed([case_text(c) for c in cases]), dtype=np.float32),
+        }
+        ids = {"rules": [str(r["id"]) for r in rules], "cases": [str(c["case_id"]) for c in cases]}
+        return cls(embedder, matrices, ids, source_hash)
+
+    def save(self, index_dir: str):
+        """<kind>.npy + <kind>.ids.json + meta.json (임시 파일에 쓴 뒤 교체)"""
+        os.makedirs(index_dir, exist_ok=True)
+        for kind in KINDS:
+            tmp = os.path.join(index_dir, f".{kind}.tmp.npy")
+            np.save(tmp, self.matrices[kind])
+            os.replace(tmp, os.path.join(index_dir, f"{kind}.npy"))
+            self._write_json(os.path.join(index_dir, f"{kind}.ids.json"), self.ids[kind])
+        # meta.json을 마지막에 써서, 중간에 중단되면 다음 기동 시 다시 빌드된다
+        self._write_json(os.path.join(index_dir, META_FILE), {
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "source_hash": self.source_hash,
+            "counts": {kind: len(self.ids[kind]) for kind in KINDS},
+        })
+
+    @staticmethod
+    def _write_json(path: str, payload: Any):
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, index_dir: str, embedder) -> "VectorIndex":
+        """저장된 인덱스를 메모리 맵으로 연다 (임베더가 다르면 ValueError)"""
+        with open(os.path.join(index_dir, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("embedder") != embedder.name or meta.get("dim") != embedder.dim:
+            raise ValueError(f"인덱스 임베더 불일치: {meta.get('embedder')} != {embedder.name}")
+        matrices, ids = {}, {}
+        for kind in KINDS:
+            matrices[kind] = np.load(os.path.join(index_dir, f"{kind}.npy"), mmap_mode='r')
+            with open(os.path.join(index_dir, f"{kind}.ids.json"), 'r', encoding='utf-8') as f:
+                ids[kind] = json.load(f)
+            if matrices[kind].shape != (len(ids[kind]), embedder.dim):
+                raise ValueError(f"인덱스 크기 불일치: {kind}.npy {matrices[kind].shape}")
+        return cls(embedder, matrices, ids, meta.get("source_hash", ""))
+
+    @classmethod
+    def open(cls, data_dir: str, index_dir: str, embedder) -> "VectorIndex":
+        """data/raw 원본 기준으로 open_items"""
+        return cls.open_items(*read_sources(data_dir), index_dir, embedder)
+
+    @classmethod
+    def open_items(cls, rules: List[Dict[str, Any]], cases: List[Dict[str, Any]], source_hash: str,
+                   index_dir: str, embedder) -> "VectorIndex":
+        """저장된 인덱스가 source_hash/임베더와 맞으면 열고, 아니면 다시 빌드해 저장한 뒤 연다"""
+        try:
+            index = cls.load(index_dir, embedder)
+            if index.source_hash == source_hash:
+                return index
+        except (OSError, ValueError) as e:
+            print(f"ℹ️ 벡터 인덱스 재생성 ({e})")
+        cls.build_items(rules, cases, source_hash, embedder).save(index_dir)
+        index = cls.load(index_dir, embedder)
+        print(f"🧭 벡터 인덱스 저장: 규정 {len(index.ids['rules'])}개, 판례 {len(index.ids['cases'])}개 "
+              f"({embedder.name}, {index_dir})")
+        return index
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embedder.embed([text])[0]
+
+    def similarity(self, kind: str, query: np.ndarray, item_ids: Sequence[str]) -> np.ndarray:
+        """후보 id들과 질의 벡터의 코사인 유사도 (인덱스에 없는 id는 0)"""
+        rows = self.rows[kind]
+        positions = np.fromiter((rows.get(str(i), -1) for i in item_ids), dtype=np.intp,
+                                count=len(item_ids))
+        scores = np.zeros(len(item_ids), dtype=np.float32)
+        known = positions >= 0
+        if known.any():
+            scores[known] = self.matrices[kind][positions[known]] @ query
+        return scores
+
+    def rerank(self, kind: str, query: np.ndarray, items: List[Dict[str, Any]], id_key: str,
+               limit: int) -> List[Dict[str, Any]]:
+        """
+        그래프 후보를 유사도 내림차순으로 재정렬해 상위 limit건 반환
+        동점은 기존 순서(legal_weight 내림차순)를 유지하며, 각 항목에 similarity를 붙인다.
+        """
+        if not items:
+            return items
+        scores = self.similarity(kind, query, [item.get(id_key) for item in items])
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [dict(items[i], similarity=round(float(scores[i]), 4)) for i in order]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"embedder": self.embedder.name,
+                **{kind: len(self.ids[kind]) for kind in KINDS}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규정/판례 벡터 인덱스 빌드")
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--data-dir", default=os.path.join(base_dir, "data", "raw"))
+    parser.add_argument("--out", default=os.path.join(base_dir, "data", "index"))
+    parser.add_argument("--embedder", default=os.getenv("VECTOR_EMBEDDER", "hashing"))
+    args = parser.parse_args()
+
+    embedder = create_embedder(args.embedder)
+    index = VectorIndex.build(args.data_dir, embedder)
+    index.save(args.out)
+    print(f"✅ 벡터 인덱스 빌드 완료: 규정 {len(index.ids['rules'])}개, 판례 {len(index.ids['cases'])}개 "
+          f"→ {args.out} ({embedder.name})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -88,13 +88,25 @@ st.markdown("""
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_scenario_summaries() -> List[Dict[str, Any]]:
+    # 실패는 예외로 올려 캐시하지 않음
+    scenarios = []
+    params = {"view": "summary", "limit": 500}
+    while True:
+        response = requests.get(f"{API_BASE_URL}/scenarios", params=params)
+        response.raise_for_status()
+        page = response.json()
+        scenarios.extend(page["scenarios"])
+        if not page.get("next_cursor"):
+            return scenarios
+        params["cursor"] = page["next_cursor"]
+
+
 def get_scenarios() -> List[Dict[str, Any]]:
-    """시나리오 목록 가져오기"""
+    """시나리오 목록 가져오기 (사이드바용 summary 뷰, 페이지 단위 조회)"""
     try:
-        response = requests.get(f"{API_BASE_URL}/scenarios")
-        if response.status_code == 200:
-            return response.json()["scenarios"]
-        return []
+        return _fetch_scenario_summaries()
     except:
         return []
 
@@ -113,8 +125,10 @@ def get_scenario_detail(scenario_id: str) -> Dict[str, Any]:
 def analyze_scenario(scenario_id: str) -> Dict[str, Any]:
     """시나리오 분석 요청"""
     try:
+        # 화면에 쓰지 않는 규정 전문/판례 본문은 받지 않음 (summary 뷰)
         response = requests.post(
             f"{API_BASE_URL}/analyze",
+            params={"view": "summary"},
             json={"scenario_id": scenario_id}
         )
         if response.status_code == 200:
@@ -220,7 +234,9 @@ def main():
 
         # 상황 정보
         st.header("🌊 현재 상황")
-        situation = analysis.get("situation", {}).get("situation", {})
+        # summary 응답에는 입력 상황이 없으므로 시나리오 상세에서 가져옴
+        situation_source = analysis.get("situation") or get_scenario_detail(result.get("scenario_id"))
+        situation = situation_source.get("situation", {})
 
         col1, col2, col3 = st.columns(3)
         with col1:
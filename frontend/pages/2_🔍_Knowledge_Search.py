@@ -3,11 +3,15 @@ Legis-Indexer Pro
 HWP/PDF Semantic Indexing and Hybrid RAG Search
 """
 
+import os
+import html
 import streamlit as st
 import requests
 from pathlib import Path
 from datetime import datetime
 
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+
 # Page configuration
 st.set_page_config(
     page_title="Knowledge Search - Maritime Safety Platform",
@@ -69,116 +73,105 @@ with search_col1:
 with search_col2:
     advanced_mode = st.checkbox("고급 검색 모드", value=False)
 
+search_kind = "전체"
+page_size = 10
+if advanced_mode:
+    filter_col1, filter_col2 = st.columns(2)
+    with filter_col1:
+        search_kind = st.radio("검색 대상", ["전체", "규정", "판례"], horizontal=True)
+    with filter_col2:
+        page_size = st.select_slider("페이지당 결과", options=[5, 10, 20, 50], value=10)
+
 st.markdown("<br>", unsafe_allow_html=True)
 
 # Perform search
-if search_button and search_query:
-    with st.spinner("검색 중..."):
-        st.markdown("""
-        <div class="step-box">
-            <div class="step-number">1</div>
-            <div class="step-title">입법 의도 분석 및 법률 도메인 매핑...</div>
-            <div class="step-content">
-                사용자 질의를 분석하여 관련 법규 도메인(COLREGs, 해양안전법)과
-                의도(규정 조회, 사례 검색, 권고 조치)를 파악합니다.
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Sample search - will be replaced with actual backend API call
-        st.markdown("<br>", unsafe_allow_html=True)
-
-        st.markdown("""
-        <div class="section-header">
-            📊 검색 결과
-        </div>
-        """, unsafe_allow_html=True)
-
-        # RAG Integrated Intelligence Response
-        st.markdown("""
-        <div class="info-card">
-            <h3>🧠 RAG 통합 인텔리전스 응답</h3>
-            <p style="line-height: 1.8;">
-            현재 대한민국에서는 논의 중인 인공지능 기본법(인공지능 산업 육성 및 신뢰 기반 조성 등에 관한 법률안)이 따라,
-            주요 처벌 수위는 3년 이하의 징역 또는 3천만 원 이하의 벌금이 예상됩니다. 제26조 제2항에 따르면 신뢰성 확보를 위한 의무를
-            해태하거나 보호조치를 하지 않아 인권침해가 발생한 경우 3% 이하의 과태료가 부과됩니다. 다만, 인공지능을 수단으로 활용하여 저지른
-            개인정보보호법 위반이나 스토이커범죄의 처벌 등에 관한 법률 위반 등은 이미 해당 법령에서 3년 이상의 징역이 가능합니다.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-
-        st.markdown("<br>", unsafe_allow_html=True)
-
-        # Semantic chunks (Regulation results)
-        st.markdown("""
+def search_knowledge(query, kind=None, offset=0, limit=10):
+    """백엔드 /search (BM25) 호출"""
+    params = {"q": query, "offset": offset, "limit": limit}
+    if kind:
+        params["kind"] = kind
+    response = requests.get(f"{API_BASE_URL}/search", params=params, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def render_highlight(highlight):
+    """spans(스니펫 기준 [시작, 끝)) 구간을 <mark>로 감싼 HTML"""
+    text = highlight["text"]
+    parts, cursor = [], 0
+    for start, end in highlight["spans"]:
+        parts.append(html.escape(text[cursor:start]))
+        parts.append(f"<mark>{html.escape(text[start:end])}</mark>")
+        cursor = end
+    parts.append(html.escape(text[cursor:]))
+    prefix = "..." if highlight["offset"] > 0 else ""
+    return prefix + "".join(parts)
+
+
+FIELD_LABELS = {
+    "title": "제목", "summary": "요약", "full_text": "전문",
+    "incident_description": "사고 개요", "analysis": "분석", "judgment": "재결", "lessons": "교훈"
+}
+KIND_LABELS = {"rules": "COLREGs 규정", "cases": "KMST 판례"}
+
+if search_button:
+    st.session_state.search_offset = 0
+
+if search_query and (search_button or "search_offset" in st.session_state):
+    kind = {"전체": None, "규정": "rules", "판례": "cases"}[search_kind]
+    offset = st.session_state.get("search_offset", 0)
+    try:
+        with st.spinner("검색 중..."):
+            result = search_knowledge(search_query, kind=kind, offset=offset, limit=page_size)
+    except requests.exceptions.RequestException as e:
+        st.error(f"검색 실패: {e}")
+        result = None
+
+    if result is not None:
+        st.session_state.last_search = result
+        st.markdown(f"""
         <div class="section-header">
-            🗂️ 온톨로지 검색 결과 (SEMANTIC CHUNKS)
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Result 1 - Regulation
-        st.markdown("""
-        <div class="search-result">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
-                <h4 style="margin: 0;">인공지능 산업 육성 및 신뢰 기반 조성 등에 관한 법률안(대안)</h4>
-                <div class="relevance-score">95% RELEVANCE</div>
-            </div>
-            <p style="color: var(--primary-blue); font-size: 0.9rem; margin-bottom: 0.75rem;">
-                <strong>CLASS: HTTPS://LIKMS.ASSEMBLY.GO.KR/BILL/MAIN.DO</strong>
-            </p>
-            <p style="line-height: 1.8;">
-                "...제40조(과태료) ① 다음 각 호의 어느 하나에 해당하는 자에게는 3천만원 이하의 과태료를 부과한다.
-                1. 제26조제2항을 위반하여 고지하지 아니한 자. 2. 제26조제3항을 위반하여 허위로 표시를 하거나 허위로 공표한 자.
-                3. 제26조제2항에 따른 신뢰도록 요구조치를 이행하거나 요구조치를 순수하지 아니한 자..."
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Result 2 - Case law
-        st.markdown("""
-        <div class="search-result">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
-                <h4 style="margin: 0;">개인정보보호 법정관 개정안 매뉴얼</h4>
-                <div class="relevance-score">88% RELEVANCE</div>
-            </div>
-            <p style="color: var(--primary-blue); font-size: 0.9rem; margin-bottom: 0.75rem;">
-                <strong>CLASS: HTTPS://WWW.PIPC.GO.KR</strong>
-            </p>
-            <p style="line-height: 1.8;">
-                "...인공지능 더유 한국 산업을 의의미어서. 가. 인증자치나 스스이커의 가능성이 승이는 AI시스템의 존재합니다.
-                그로서 위반한 고위험 AI시스템에 관리 기준를 명확히 치정한다면, 지인 집합법률 이용 서비스자 AI. 개인자치
-                인즈법의 이용이나에 대응 개발의 가은 세치. 개인 지정법실적 연구개연 경과 위반할 이발한, 계온 새치로 이의
-                부위로각 기 AI원자 의무의 지향을 명확히..."
-            </p>
+            📊 검색 결과 {result['total']}건 ({result['took_ms']:.1f}ms)
         </div>
         """, unsafe_allow_html=True)
 
-        # Result 3 - Maritime specific
-        st.markdown("""
-        <div class="search-result">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
-                <h4 style="margin: 0;">Rule 19 - Conduct in Restricted Visibility</h4>
-                <div class="relevance-score">92% RELEVANCE</div>
+        if not result["results"]:
+            st.info("일치하는 규정/판례가 없습니다.")
+
+        for item in result["results"]:
+            snippets = "".join(
+                f"<p style=\"line-height: 1.8;\"><strong>{FIELD_LABELS.get(h['field'], h['field'])}:</strong> "
+                f"{render_highlight(h)}</p>"
+                for h in item["highlights"] if h["field"] != "title"
+            )
+            st.markdown(f"""
+            <div class="search-result">
+                <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
+                    <h4 style="margin: 0;">{html.escape(item['title'] or item['id'])}</h4>
+                    <div class="relevance-score">BM25 {item['score']:.2f}</div>
+                </div>
+                <p style="color: var(--primary-blue); font-size: 0.9rem; margin-bottom: 0.75rem;">
+                    <strong>{KIND_LABELS.get(item['kind'], item['kind'])} / {html.escape(item['id'])}</strong>
+                </p>
+                {snippets}
             </div>
-            <p style="color: var(--primary-blue); font-size: 0.9rem; margin-bottom: 0.75rem;">
-                <strong>CLASS: COLREGS/RULE-19</strong>
-            </p>
-            <p style="line-height: 1.8;">
-                "This Rule applies to vessels not in sight of one another when navigating in or near an area of restricted visibility.
-                (a) Every vessel shall proceed at a safe speed adapted to the prevailing circumstances and conditions of restricted visibility.
-                A power-driven vessel shall have her engines ready for immediate manoeuvre.
-                (b) Every vessel shall have due regard to the prevailing circumstances and conditions of restricted visibility when complying
-                with the Rules of Section I of this Part.
-                (c) A vessel which detects by radar alone the presence of another vessel shall determine if a close-quarters situation is
-                developing and/or risk of collision exists. If so, she shall take avoiding action in ample time..."
-            </p>
-            <div style="margin-top: 1rem; padding: 1rem; background: rgba(59, 130, 246, 0.1); border-radius: 0.5rem;">
-                <strong>관련 사례:</strong> KMST-2023-001 (안개 중 어선과 화물선 충돌)
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-elif search_button and not search_query:
+            """, unsafe_allow_html=True)
+
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            if offset > 0 and st.button("◀ 이전", use_container_width=True):
+                st.session_state.search_offset = max(0, offset - page_size)
+                st.rerun()
+        with page_col:
+            if result["total"]:
+                last = min(offset + page_size, result["total"])
+                st.caption(f"{offset + 1}-{last} / {result['total']}건")
+        with next_col:
+            if result["next_offset"] is not None and st.button("다음 ▶", use_container_width=True):
+                st.session_state.search_offset = result["next_offset"]
+                st.rerun()
+
+if search_button and not search_query:
     st.warning("검색어를 입력해주세요.")
 
 # Example queries
@@ -242,17 +235,20 @@ st.markdown("""
 
 stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
 
+last_search = st.session_state.get("last_search")
+index_stats = last_search["index"] if last_search else {}
+
 with stats_col1:
-    st.metric("총 인덱싱 문서", "224개", "+13 this month")
+    st.metric("총 인덱싱 문서", f"{index_stats['documents']}개" if index_stats else "-")
 
 with stats_col2:
-    st.metric("검색 가능 규정", "13개", "COLREGs")
+    st.metric("검색 가능 규정", f"{index_stats['rules']}개" if index_stats else "-", "COLREGs")
 
 with stats_col3:
-    st.metric("평균 검색 시간", "0.45초", "-0.1s")
+    st.metric("검색 가능 판례", f"{index_stats['cases']}개" if index_stats else "-", "KMST")
 
 with stats_col4:
-    st.metric("검색 정확도", "95%", "+2%")
+    st.metric("최근 검색 시간", f"{last_search['took_ms']:.1f}ms" if last_search else "-")
 
 st.markdown("---")
 
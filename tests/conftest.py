@@ -0,0 +1,17 @@
+import os
+import sys
+import json
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# backend 모듈은 평면 구조로 서로 import하므로 backend 디렉터리를 경로에 추가
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+DATA_DIR = os.path.join(ROOT, "data", "raw")
+
+
+@pytest.fixture(scope="session")
+def demo_scenarios():
+    with open(os.path.join(DATA_DIR, "demo_scenarios.json"), "r", encoding="utf-8") as f:
+        return {s["scenario_id"]: s for s in json.load(f)}
@@ -0,0 +1,9 @@
+from analysis_cache import situation_key
+
+
+def test_situation_key_covers_rerank_fields(demo_scenarios):
+    scenario = demo_scenarios["scenario_002"]
+    retitled = dict(scenario, title="다른 제목")
+    spaced = dict(scenario, title="  " + scenario["title"] + " ")
+    assert situation_key(retitled) != situation_key(scenario)
+    assert situation_key(spaced) == situation_key(scenario)
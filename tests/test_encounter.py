@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from encounter import (classify_encounters, classify_situation, HEAD_ON, CROSSING_STARBOARD,
+                       CROSSING_PORT, OVERTAKING, UNKNOWN, GIVE_WAY, STAND_ON, BOTH_GIVE_WAY)
+from situation_schema import build_parsed_situation
+
+
+def classify(situation_data):
+    result = classify_situation(build_parsed_situation(situation_data))
+    return list(zip(result["encounter"], result["role"]))
+
+
+# 시나리오 expected_reasoning_flow 기준 자선 역할
+@pytest.mark.parametrize("scenario_id, expected", [
+    ("scenario_001", [(UNKNOWN, UNKNOWN)]),                  # 표류 어선, 침로 미상
+    ("scenario_002", [(CROSSING_STARBOARD, GIVE_WAY)]),      # relative_position 우현
+    ("scenario_003", [(HEAD_ON, BOTH_GIVE_WAY)]),            # 양 현등 보임
+    ("scenario_006", [(UNKNOWN, STAND_ON)]),                 # 자선 역할 명시
+])
+def test_demo_scenario_roles(demo_scenarios, scenario_id, expected):
+    assert classify(demo_scenarios[scenario_id]) == expected
+
+
+def test_unknown_course_is_not_head_on():
+    result = classify_encounters(45.0, np.array([45.0, 90.0]), np.array([np.nan, np.nan]))
+    assert list(result["encounter"]) == [UNKNOWN, UNKNOWN]
+
+
+def test_geometry_with_known_courses():
+    # 정면 / 우현 횡단 / 좌현 횡단 / 자선이 추월
+    result = classify_encounters(0.0, np.array([0.0, 45.0, 315.0, 0.0]),
+                                 np.array([180.0, 270.0, 90.0, 0.0]))
+    assert list(result["encounter"]) == [HEAD_ON, CROSSING_STARBOARD, CROSSING_PORT, OVERTAKING]
+
+
+def situation(target, own_ship=None):
+    own = {"heading": "000°", "speed": "12노트", **(own_ship or {})}
+    return {"situation": {"own_ship": own, "target_vessels": [target]}}
+
+
+def test_reported_position_overrides_geometry():
+    # 방위상 좌현이지만 상황 데이터가 우현으로 명시
+    target = {"id": "t", "bearing": "315°", "course": "090°", "relative_position": "우현 (Starboard)"}
+    assert classify(situation(target)) == [(CROSSING_STARBOARD, GIVE_WAY)]
+
+
+def test_reported_role_conflict_downgrades_encounter():
+    # 방위상 우현 횡단(피항선)이지만 자선이 유지선으로 명시
+    target = {"id": "t", "bearing": "045°", "course": "270°"}
+    assert classify(situation(target, {"role": "유지선 (Stand-on)"})) == [(UNKNOWN, STAND_ON)]
+
+
+def test_target_role_implies_own_role():
+    target = {"id": "t", "bearing": "315°", "course": "090°", "role": "피항선 (Give-way)"}
+    assert classify(situation(target)) == [(CROSSING_PORT, STAND_ON)]
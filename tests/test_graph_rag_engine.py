@@ -0,0 +1,72 @@
+import pytest
+
+from analysis_cache import AnalysisCache, situation_key
+from graph_rag_engine import GraphGuidedRAG, LLM_FAILURE_MESSAGE
+from graph_store import InMemoryGraphStore
+
+from conftest import DATA_DIR
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class BrokenStreamModel:
+    """첫 청크 뒤에 끊기는 스트리밍 응답"""
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        def chunks():
+            yield Chunk("우현 변침 ")
+            raise ConnectionError("stream reset")
+        return chunks() if stream else Chunk("분석")
+
+
+@pytest.fixture
+def engine():
+    rag = GraphGuidedRAG(gemini_api_key="test", store=InMemoryGraphStore.from_json(DATA_DIR),
+                         result_cache=AnalysisCache(), coalesce_requests=False)
+    rag.model = BrokenStreamModel()
+    return rag
+
+
+def test_partial_stream_failure_is_not_cached(engine, demo_scenarios):
+    scenario = demo_scenarios["scenario_002"]
+    events = list(engine.stream_analysis(scenario))
+    analysis = events[-1]["data"]["analysis"]
+    assert analysis.startswith("우현 변침") and analysis.endswith(LLM_FAILURE_MESSAGE)
+    assert engine.result_cache.get(situation_key(scenario)) is None
+
+
+def test_successful_analysis_is_cached(engine, demo_scenarios):
+    scenario = demo_scenarios["scenario_002"]
+    engine.analyze_situation(scenario)
+    assert engine.result_cache.get(situation_key(scenario)) is not None
+
+
+class LastRuleIndex:
+    """규정은 마지막 후보 1건만 남기고 판례는 그대로 두는 재정렬"""
+
+    def embed_query(self, text):
+        return text
+
+    def rerank(self, kind, query_vector, items, id_key, limit):
+        return items[-1:] if kind == "rules" else items[:limit]
+
+
+def test_combined_retrieval_drops_cases_of_cut_rules(demo_scenarios):
+    store = InMemoryGraphStore.from_json(DATA_DIR)
+    rag = GraphGuidedRAG(gemini_api_key="test", store=store, result_cache=AnalysisCache(),
+                         coalesce_requests=False, vector_index=LastRuleIndex())
+    rag.model = BrokenStreamModel()
+    result = rag.analyze_situation(demo_scenarios["scenario_001"])
+
+    kept = {r["rule_id"] for r in result["relevant_rules"]}
+    assert len(kept) == 1
+    for case in result["relevant_cases"]:
+        assert kept & set(case["violated_rules"])
+
+    # 필터가 실제로 무언가를 걸러냈는지 (잘린 규정만 위반한 판례 후보가 있었는지) 확인
+    situations = result["graph_context"]["identified_situations"]
+    candidates = store.retrieve(situations, rag.rule_candidates, rag.case_candidates)["cases"]
+    assert any(not kept & set(c["violated_rules"]) for c in candidates)
@@ -0,0 +1,62 @@
+import pytest
+
+from graph_store import GraphStore, InMemoryGraphStore, SnapshotGraphStore
+
+
+class FakeSource:
+    def __init__(self, version):
+        self.version = version
+        self.exports = 0
+
+    def graph_version(self):
+        return self.version
+
+    def export_snapshot(self):
+        self.exports += 1
+        return {"version": self.version, "cases": [],
+                "rules": [{"id": "rule_15", "trigger_situations": ["횡단 상황"]}]}
+
+
+def test_snapshot_without_version_marker_loads_once():
+    source = FakeSource(None)
+    store = SnapshotGraphStore(source)
+    for _ in range(5):
+        store.graph_version()
+    assert source.exports == 1
+    assert store.stats()["reloads"] == 0
+
+
+def test_snapshot_reloads_on_marker_change():
+    source = FakeSource(None)
+    store = SnapshotGraphStore(source)
+    store.graph_version()
+    source.version = 1
+    store.graph_version()
+    store.graph_version()
+    source.version = 2
+    assert store.graph_version() == 2
+    assert source.exports == 3
+    assert store.stats()["source_version"] == 2
+
+
+def test_incomplete_store_fails_on_creation():
+    class NoVersion(GraphStore):
+        def graph_context(self, situation_types):
+            return []
+
+        def rules_for_situations(self, situation_types, limit=10):
+            return []
+
+        def cases_for_rules(self, rule_ids, limit=10):
+            return []
+
+    with pytest.raises(TypeError):
+        NoVersion()
+
+
+def test_snapshot_export_matches_what_it_serves():
+    store = SnapshotGraphStore(FakeSource("v1"))
+    data = store.export_snapshot()
+    assert data["version"] == "v1" and [r["id"] for r in data["rules"]] == ["rule_15"]
+    rebuilt = InMemoryGraphStore(data["rules"], data["cases"])
+    assert rebuilt.rules_for_situations(["횡단 상황"]) == store.rules_for_situations(["횡단 상황"])
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import re
+
+from llm_batcher import LLMBatcher, split_batch_response
+
+
+class Reply:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """묶음 프롬프트에는 mode에 따라 응답, 개별 프롬프트에는 "single" 응답"""
+
+    def __init__(self, mode="json"):
+        self.mode = mode
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        count = len(re.findall(r"^### 항목 \d+", prompt, re.M))
+        if self.mode == "error":
+            raise RuntimeError("429 quota exceeded")
+        if not count:
+            return Reply("single")
+        if self.mode == "partial":
+            return Reply(json.dumps([{"id": "1", "answer": "batched"}]))
+        return Reply(json.dumps([{"id": str(i), "answer": "batched"} for i in range(1, count + 1)]))
+
+
+def run(model, count, max_batch=8):
+    batcher = LLMBatcher(model, window_ms=5, max_batch=max_batch)
+
+    async def main():
+        return await asyncio.gather(*(batcher.generate(f"prompt {i}") for i in range(count)),
+                                    return_exceptions=True)
+    return asyncio.run(main()), batcher
+
+
+def test_concurrent_prompts_share_one_request():
+    model = FakeModel()
+    results, _ = run(model, 5)
+    assert model.calls == 1
+    assert results == [("batched", True)] * 5
+
+
+def test_missing_answers_fall_back_to_single_calls():
+    model = FakeModel("partial")
+    results, batcher = run(model, 3)
+    assert results == [("batched", True), ("single", False), ("single", False)]
+    assert model.calls == 3 and batcher.fallbacks == 2
+
+
+def test_failed_batch_request_is_not_retried_per_item():
+    model = FakeModel("error")
+    results, batcher = run(model, 5)
+    assert model.calls == 1 and batcher.failed_batches == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_split_batch_response_ignores_bad_entries():
+    text = '```json\n[{"id": "2", "answer": "x"}, {"id": "9", "answer": "y"}, {"id": "a"}, 3]\n```'
+    assert split_batch_response(text, 2) == {1: "x"}
+    assert split_batch_response("죄송합니다", 2) == {}
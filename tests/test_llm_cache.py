@@ -0,0 +1,62 @@
+import sqlite3
+
+from llm_cache import LLMResponseCache, prompt_key
+
+
+def _last_access(cache, prompt):
+    return sqlite3.connect(cache.db_path).execute(
+        "SELECT last_access FROM llm_responses WHERE key = ?",
+        (prompt_key("m", prompt),)
+    ).fetchone()[0]
+
+
+def test_totals_follow_inserts_replacements_and_evictions(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.sqlite3"), max_bytes=10_000, max_entries=3)
+    cache.put("m", "a", "x" * 10)
+    cache.put("m", "a", "x" * 4)
+    cache.put("m", "b", "y" * 6)
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == (2, 10)
+
+    cache.put("m", "c", "z")
+    cache.put("m", "d", "w")
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evictions"] == 1
+    assert cache.get("m", "a") is None
+
+
+def test_hits_do_not_write_until_flush(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.sqlite3"), access_flush_size=2,
+                             access_flush_interval=3600)
+    cache.put("m", "a", "1")
+    cache.put("m", "b", "2")
+    before = _last_access(cache, "a")
+
+    assert cache.get("m", "a") == "1"
+    assert _last_access(cache, "a") == before
+
+    cache.get("m", "b")
+    assert _last_access(cache, "a") > before
+
+
+def test_eviction_sees_pending_hits(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "c.sqlite3"), max_entries=2,
+                             access_flush_interval=3600)
+    cache.put("m", "old", "1")
+    cache.put("m", "new", "2")
+    cache.get("m", "old")
+    cache.put("m", "third", "3")
+    assert cache.get("m", "old") == "1"
+    assert cache.get("m", "new") is None
+
+
+def test_existing_file_gets_totals(tmp_path):
+    path = str(tmp_path / "c.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE llm_responses (key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                 "response TEXT NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL, "
+                 "last_access REAL NOT NULL)")
+    conn.execute("INSERT INTO llm_responses VALUES ('k', 'm', 'abc', 3, 0, 0)")
+    conn.commit()
+    conn.close()
+    stats = LLMResponseCache(path).stats()
+    assert (stats["entries"], stats["bytes"]) == (1, 3)
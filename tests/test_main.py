@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from analysis_cache import AnalysisCache
+from graph_rag_engine import AsyncGraphGuidedRAG
+from graph_store import AsyncInMemoryGraphStore, InMemoryGraphStore
+from knowledge_base import KnowledgeBase
+
+from conftest import DATA_DIR
+
+
+class Response:
+    text = "우현 변침"
+
+
+class FakeModel:
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        return Response()
+
+
+@pytest.fixture
+def snapshot_engine(monkeypatch):
+    monkeypatch.setattr(main, "snapshot_source_breaker", main._create_breaker("Neo4j 스냅샷 원본"))
+    # 접속할 수 없는 Neo4j를 원본으로 하고, 스냅샷은 이미 적재된 상태
+    store = main._create_snapshot_store("bolt://127.0.0.1:1", "neo4j", "x")
+    store._swap(InMemoryGraphStore.from_json(DATA_DIR), "v1")
+    rag = AsyncGraphGuidedRAG(gemini_api_key="test", store=store,
+                              result_cache=AnalysisCache(), coalesce_requests=False)
+    rag.model = FakeModel()
+    monkeypatch.setattr(main, "GRAPH_BACKEND", "snapshot")
+    monkeypatch.setattr(main, "rag_engine", rag)
+    monkeypatch.setattr(main, "neo4j_breaker", main._create_breaker("Neo4j"))
+    yield rag
+    asyncio.run(store.close())
+
+
+def test_snapshot_keeps_serving_when_source_polls_fail(snapshot_engine):
+    failures = snapshot_engine.store.source.breaker.failure_threshold + 2
+    for _ in range(failures):
+        asyncio.run(main._check_graph_version())
+    assert snapshot_engine.store.refresh_failures == failures
+    # 원본 회로만 열리고 요청 경로의 회로는 그대로
+    assert not snapshot_engine.store.source.breaker.allow()
+    assert main.neo4j_breaker.allow()
+
+    response = TestClient(main.app).post("/analyze", json={"scenario_id": "scenario_002"})
+    assert response.status_code == 200
+    analysis = response.json()["analysis"]
+    assert "error" not in analysis
+    assert analysis["relevant_rules"]
+
+
+def test_open_breaker_only_blocks_the_neo4j_backend(snapshot_engine, monkeypatch):
+    main.neo4j_breaker.trip("connection refused")
+    client = TestClient(main.app)
+
+    analysis = client.post("/analyze", json={"scenario_id": "scenario_002"}).json()["analysis"]
+    assert "error" not in analysis
+
+    monkeypatch.setattr(main, "GRAPH_BACKEND", "neo4j")
+    analysis = client.post("/analyze", json={"scenario_id": "scenario_002"}).json()["analysis"]
+    assert analysis["error"] == "DB Connection Failed"
+
+
+@pytest.fixture
+def unsynced(monkeypatch, tmp_path):
+    """그래프에서 만드는 파생 데이터를 초기 상태로 (인덱스 파일은 tmp_path에)"""
+    monkeypatch.setattr(main, "knowledge_base", KnowledgeBase(DATA_DIR))
+    monkeypatch.setattr(main, "graph_knowledge_version", main._UNSYNCED)
+    monkeypatch.setattr(main, "vector_index", None)
+    monkeypatch.setattr(main, "VECTOR_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "digest_store", None)
+    monkeypatch.setattr(main, "DIGEST_PATH", str(tmp_path / "digests.json"))
+
+
+def test_resources_follow_the_engine_graph(unsynced):
+    rules = [{"id": "rule_99", "title": "그래프에만 있는 규정", "trigger_situations": ["횡단 상황"]}]
+    store = AsyncInMemoryGraphStore(rules, [])
+    rag = AsyncGraphGuidedRAG(gemini_api_key="test", store=store,
+                              result_cache=AnalysisCache(), coalesce_requests=False)
+    client = TestClient(main.app)
+    assert client.get("/rules/rule_99").status_code == 404
+
+    asyncio.run(main._sync_graph_knowledge(rag, store.version))
+    assert client.get("/rules/rule_99").json()["title"] == "그래프에만 있는 규정"
+    ids = [item["id"] for item in client.get("/rules").json()["items"]]
+    assert ids == ["rule_99"]
+
+
+def test_vector_index_follows_the_engine_graph(unsynced):
+    rules = [{"id": "rule_99", "title": "그래프에만 있는 규정", "summary": "횡단 시 피항",
+              "trigger_situations": ["횡단 상황"]}]
+    store = AsyncInMemoryGraphStore(rules, [])
+    rag = AsyncGraphGuidedRAG(gemini_api_key="test", store=store,
+                              result_cache=AnalysisCache(), coalesce_requests=False)
+
+    asyncio.run(main._sync_graph_knowledge(rag, store.version))
+    assert rag.vector_index.ids["rules"] == ["rule_99"]
+    query = rag.vector_index.embed_query("횡단 상황 피항")
+    assert rag.vector_index.similarity("rules", query, ["rule_99"])[0] > 0
+    assert rag.rule_candidates == 5 * rag.candidate_factor
+
+
+def test_digests_follow_the_engine_graph(unsynced):
+    rules = [{"id": "rule_99", "title": "그래프에만 있는 규정", "summary": "횡단 시 피항한다.",
+              "actions": ["우현 변침"], "trigger_situations": ["횡단 상황"]}]
+    store = AsyncInMemoryGraphStore(rules, [])
+    rag = AsyncGraphGuidedRAG(gemini_api_key="test", store=store,
+                              result_cache=AnalysisCache(), coalesce_requests=False)
+
+    asyncio.run(main._sync_graph_knowledge(rag, store.version))
+    assert list(rag.digests.rules) == ["rule_99"]
+    assert "우현 변침" in rag.digests.rules["rule_99"]["text"]
+
+
+def test_analyze_rejects_unknown_or_missing_input(snapshot_engine):
+    client = TestClient(main.app)
+    response = client.post("/analyze", json={"scenario_id": "no_such_scenario"})
+    assert response.status_code == 404 and response.json()["detail"] == "Scenario not found"
+    assert client.post("/analyze", json={}).status_code == 422
@@ -0,0 +1,17 @@
+import pytest
+
+from metrics import Counter, _Metric
+
+
+def test_metric_without_samples_fails_on_creation():
+    class Gauge(_Metric):
+        kind = "gauge"
+
+    with pytest.raises(TypeError):
+        Gauge("g", "doc")
+
+
+def test_counter_renders_samples():
+    counter = Counter("errors_total", "에러 수", ["endpoint"])
+    counter.inc(endpoint="analyze")
+    assert counter.render()[-1] == 'errors_total{endpoint="analyze"} 1'
@@ -0,0 +1,49 @@
+import json
+
+from scenario_store import ScenarioStore
+
+
+def make_store(tmp_path, scenarios):
+    path = tmp_path / "scenarios.json"
+    path.write_text(json.dumps(scenarios, ensure_ascii=False), encoding="utf-8")
+    return ScenarioStore(str(path))
+
+
+def collect(store, **filters):
+    positions, after = [], None
+    while True:
+        _, page, after = store.query(after=after, limit=2, **filters)
+        positions += page
+        if after is None:
+            return positions
+
+
+def test_paging_does_not_stop_at_scenario_without_id(tmp_path):
+    store = make_store(tmp_path, [{"scenario_id": "a"}, {"title": "id 없음"},
+                                  {"scenario_id": "c"}, {"scenario_id": "d"}, {"scenario_id": "e"}])
+    assert collect(store) == [0, 1, 2, 3, 4]
+
+
+def test_filtered_paging_and_unpaged_default(tmp_path):
+    scenarios = [{"scenario_id": str(i), "risk_level": i % 3, "difficulty": "hard" if i % 2 else "easy"}
+                 for i in range(10)]
+    store = make_store(tmp_path, scenarios)
+    assert collect(store, min_risk_level=2) == [2, 5, 8]
+    assert collect(store, min_risk_level=1, difficulty="hard") == [1, 5, 7]
+    _, page, after = store.query()
+    assert page == list(range(10)) and after is None
+
+
+def test_library_larger_than_parser_memo_stays_parsed(tmp_path, monkeypatch, demo_scenarios):
+    import scenario_store
+    import situation_schema
+
+    parser = situation_schema.SituationParser(max_entries=2)
+    monkeypatch.setattr(situation_schema, "situation_parser", parser)
+    monkeypatch.setattr(scenario_store, "situation_parser", parser)
+
+    store = make_store(tmp_path, list(demo_scenarios.values()))
+    for scenario in store.list():
+        situation_schema.parse_situation(scenario)
+    assert parser.misses == 0 and parser.hits == len(demo_scenarios) > parser.max_entries
+    assert parser.stats()["entries"] == 0
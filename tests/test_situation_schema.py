@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from situation_schema import (build_parsed_situation, parse_angle, parse_distance, parse_duration,
+                              parse_speed, parse_visibility, VisibilityClass)
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("3분", 180.0), ("90초", 90.0), ("3", 180.0), (3, 180.0), (2.5, 150.0), ("1시간", 3600.0),
+])
+def test_duration_defaults_to_minutes(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("parse, value, expected", [
+    (parse_speed, 12, 12.0), (parse_speed, "12", 12.0), (parse_speed, "12 knots", 12.0),
+    (parse_distance, 0.5, 0.5), (parse_distance, "0.5", 0.5), (parse_distance, "926미터", 0.5),
+    (parse_angle, 45, 45.0), (parse_angle, "045", 45.0), (parse_angle, "405°", 45.0),
+])
+def test_unitless_values_use_field_default_unit(parse, value, expected):
+    assert parse(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("parse, value", [
+    (parse_speed, "12 furlongs"), (parse_distance, "3 parsecs"), (parse_duration, "3 fortnights"),
+])
+def test_unknown_unit_is_rejected(parse, value):
+    with pytest.raises(ValueError):
+        parse(value)
+
+
+def test_missing_values_are_nan():
+    assert math.isnan(parse_duration(None)) and math.isnan(parse_speed("정보 없음"))
+
+
+def test_visibility_uses_worse_of_distance_and_weather():
+    assert parse_visibility("50미터 (농무)")[1] == VisibilityClass.DENSE_FOG
+    assert parse_visibility("3마일 (안개)")[1] == VisibilityClass.FOG
+    assert parse_visibility("10마일 (맑음)")[1] == VisibilityClass.GOOD
+
+
+def test_parsed_situation_flags_unknown_units():
+    parsed = build_parsed_situation({"situation": {
+        "own_ship": {"heading": "045°", "speed": 12},
+        "target_vessels": [{"id": "t1", "bearing": "090", "distance": 2, "tcpa": 3, "cpa": 0.2},
+                           {"id": "t2", "bearing": "100°", "tcpa": "3 fortnights"}],
+    }})
+    assert parsed.reported_tcpa_s[0] == pytest.approx(180.0)
+    assert parsed.reported_cpa_nm[0] == pytest.approx(0.2)
+    assert math.isnan(parsed.reported_tcpa_s[1])
+    assert parsed.unit_warnings == ("t2.tcpa='3 fortnights'",)
@@ -0,0 +1,48 @@
+import json
+import os
+
+from knowledge_base import ResourceFile
+from scenario_store import ScenarioStore
+from source_files import ReloadableJSON
+
+
+def write(path, data, mtime_ns=None):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reload_only_when_content_changes(tmp_path):
+    path = tmp_path / "items.json"
+    write(path, [1, 2], mtime_ns=1_000_000_000)
+    builds = []
+    source = ReloadableJSON(str(path), lambda data, h: builds.append(data) or list(data), [], "테스트")
+    assert source.get() == [1, 2]
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))  # touch: 내용 동일
+    assert source.get() == [1, 2] and len(builds) == 1
+    write(path, [3], mtime_ns=3_000_000_000)
+    assert source.get() == [3] and len(builds) == 2
+
+
+def test_parse_failure_keeps_previous_snapshot(tmp_path):
+    path = tmp_path / "items.json"
+    write(path, [1], mtime_ns=1_000_000_000)
+    source = ReloadableJSON(str(path), lambda data, h: data, [], "테스트")
+    assert source.get() == [1]
+    path.write_text("[1,", encoding="utf-8")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert source.get() == [1]
+
+
+def test_missing_file_clears_scenarios_and_resources(tmp_path):
+    scenarios, rules = tmp_path / "scenarios.json", tmp_path / "rules.json"
+    write(scenarios, [{"scenario_id": "s1", "situation": {}}])
+    write(rules, [{"id": "rule_01", "title": "적용"}])
+    store = ScenarioStore(str(scenarios))
+    resources = ResourceFile(str(rules), "id", ("id", "title"))
+    assert store.get("s1") is not None and resources.get("rule_01") is not None
+
+    scenarios.unlink()
+    rules.unlink()
+    assert store.get("s1") is None and store.snapshot().content_hash == ""
+    assert resources.get("rule_01") is None and resources.list("summary") is None